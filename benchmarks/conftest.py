@@ -0,0 +1,94 @@
+"""
+Fixtures for the benchmark suite. Every benchmark runs against in-memory databases
+(DuckDB and SQLite, through SQLAlchemy and DB-API connections), so the suite
+doesn't need network access
+"""
+
+import sqlite3
+
+import duckdb
+import matplotlib
+import pytest
+from sqlalchemy import create_engine
+
+from sql._testing import TestingShell
+from sql.connection import ConnectionManager
+
+matplotlib.use("agg")
+
+CONNECTIONS = {
+    "duckdb-sqlalchemy": lambda: create_engine("duckdb://"),
+    "duckdb-dbapi": lambda: duckdb.connect(),
+    "sqlite-sqlalchemy": lambda: create_engine("sqlite://"),
+    "sqlite-dbapi": lambda: sqlite3.connect(":memory:"),
+}
+
+DEFAULTS = {"autopandas": False, "autopolars": False, "displaylimit": 10}
+
+
+@pytest.fixture(scope="session")
+def shell():
+    shell = TestingShell.preconfigured_shell()
+    shell.run_line_magic("load_ext", "sql")
+    shell.run_line_magic("config", "SqlMagic.displaycon = False")
+    shell.run_line_magic("config", "SqlMagic.feedback = 0")
+
+    for alias, connect in CONNECTIONS.items():
+        shell.user_ns["conn"] = connect()
+        shell.run_line_magic("sql", f"conn --alias {alias}")
+
+    yield shell
+    ConnectionManager.close_all()
+
+
+@pytest.fixture(params=list(CONNECTIONS))
+def ip(request, shell):
+    """Shell whose current connection is the one in the parameter"""
+    shell.run_line_magic("sql", request.param)
+    yield shell
+
+    for key, value in DEFAULTS.items():
+        shell.run_line_magic("config", f"SqlMagic.{key} = {value!r}")
+
+
+def _column(k):
+    if k % 3 == 0:
+        return f"i + {k} AS c{k}"
+    elif k % 3 == 1:
+        return f"(i * {k}) / 7.0 AS c{k}"
+    else:
+        return f"'value_' || CAST(i % 100 AS VARCHAR) AS c{k}"
+
+
+_tables = set()
+
+
+def _make_table(ip, rows, cols):
+    alias = ConnectionManager.current.alias
+    name = f"data_{rows}_{cols}"
+
+    if (alias, name) not in _tables:
+        columns = ", ".join(_column(k) for k in range(cols))
+
+        if alias.startswith("duckdb"):
+            select = f"SELECT {columns} FROM range({rows}) AS t(i)"
+        else:
+            select = (
+                "WITH RECURSIVE t(i) AS "
+                f"(SELECT 0 UNION ALL SELECT i + 1 FROM t WHERE i < {rows - 1}) "
+                f"SELECT {columns} FROM t"
+            )
+
+        ip.run_cell(f"%sql CREATE TABLE {name} AS {select}")
+        _tables.add((alias, name))
+
+    return name
+
+
+@pytest.fixture
+def make_table(ip):
+    """
+    Returns a function that creates a table with rows x cols (integers, floats and
+    strings) in the current connection, and returns its name
+    """
+    return lambda rows, cols: _make_table(ip, rows, cols)
@@ -0,0 +1,44 @@
+"""
+Benchmark for the dialect information that the plotting functions request for every
+query (backticks support, identifiers, sqlglot dialect). Compares resolving it on
+every call (previous implementation) with the DialectCapabilities that each
+connection resolves once
+
+>>> python dialect_capabilities.py
+"""
+
+import timeit
+
+from sqlalchemy import create_engine
+
+from sql.connection import SQLAlchemyConnection
+from sql.connection.connection import DialectCapabilities
+
+number = 10_000
+repeat = 5
+
+conn = SQLAlchemyConnection(create_engine("sqlite://"))
+
+
+def plot_path(capabilities):
+    # what _histogram, _bar and _pie request before generating a query
+    capabilities().use_backticks
+    capabilities().sqlglot_dialect == "snowflake"
+    capabilities().identifiers
+
+
+def resolve_every_time():
+    plot_path(lambda: DialectCapabilities.from_connection(conn))
+
+
+def resolve_once():
+    plot_path(lambda: conn.capabilities)
+
+
+if __name__ == "__main__":
+    for name, fn in [
+        ("resolve every time", resolve_every_time),
+        ("resolve once", resolve_once),
+    ]:
+        seconds = min(timeit.repeat(fn, number=number, repeat=repeat)) / number
+        print(f"{name}: {seconds * 1e6:.2f} us per query")
@@ -0,0 +1,60 @@
+"""
+Benchmark for the time it takes to import the extension (what %load_ext sql does).
+Runs python -X importtime in a new interpreter and prints the total import time
+and the packages that take the longest to import. Imports IPython first since it's
+already loaded in a kernel
+
+>>> python import_time.py
+"""
+
+import subprocess
+import sys
+from collections import defaultdict
+
+repeat = 5
+top = 10
+
+
+def import_times():
+    """Returns the cumulative import time of sql and the self time per package"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import IPython; import sql.magic"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    # lines look like "import time:   self [us] |  cumulative | module"
+    lines = [
+        line.split(":", 1)[1].split("|")
+        for line in result.stderr.splitlines()
+        if line.startswith("import time:") and "[us]" not in line
+    ]
+
+    total = 0
+    per_package = defaultdict(int)
+    seen_ipython = False
+
+    for self_us, cumulative_us, module in lines:
+        name = module.strip()
+
+        if name == "IPython":
+            seen_ipython = True
+        elif seen_ipython:
+            per_package[name.split(".")[0]] += int(self_us)
+
+        # importing sql.magic imports the sql package first, which includes the rest
+        if name == "sql":
+            total = int(cumulative_us)
+
+    return total, per_package
+
+
+if __name__ == "__main__":
+    runs = [import_times() for _ in range(repeat)]
+    total, per_package = min(runs, key=lambda run: run[0])
+
+    print(f"import sql: {total / 1e3:.1f} ms")
+
+    for name, self_us in sorted(per_package.items(), key=lambda item: -item[1])[:top]:
+        print(f"  {name}: {self_us / 1e3:.1f} ms")
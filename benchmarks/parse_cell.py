@@ -0,0 +1,67 @@
+"""
+Benchmark for the per-cell parsing overhead of small queries. Compares the previous
+implementation (each step tokenizes the cell again: sqlparse.split and
+sqlparse.format in run_statements, sqlparse.split when executing, sqlparse.parse to
+decide if DuckDB needs a commit) with sql.cell.ParsedCell, which parses the cell
+once. It also measures the time to run a cell with %%sql
+
+>>> python parse_cell.py
+"""
+
+import timeit
+
+import sqlparse
+from IPython import InteractiveShell
+
+from sql.cell import ParsedCell
+from sql.connection import detect_duckdb_summarize_or_select
+
+number = 500
+repeat = 5
+
+query = """
+-- number of rows per group
+SELECT x % 3 AS grp, COUNT(*) AS n
+FROM numbers
+WHERE x > 2
+GROUP BY grp
+ORDER BY grp
+"""
+
+
+def parse_previous():
+    for statement in sqlparse.split(query):
+        statement = sqlparse.format(statement, strip_comments=True)
+
+        if not statement:
+            continue
+
+        len(sqlparse.split(statement))
+        detect_duckdb_summarize_or_select(statement)
+
+
+def parse_once():
+    for statement in ParsedCell(query).statements:
+        detect_duckdb_summarize_or_select(statement)
+
+
+shell = InteractiveShell()
+shell.run_line_magic("load_ext", "sql")
+shell.run_line_magic("config", "SqlMagic.displaycon = False")
+shell.run_line_magic("config", "SqlMagic.feedback = 0")
+shell.run_line_magic("sql", "duckdb://")
+shell.run_line_magic("sql", "CREATE TABLE numbers AS SELECT range AS x FROM range(100)")
+
+
+def run_cell():
+    shell.run_cell_magic("sql", "", query)
+
+
+if __name__ == "__main__":
+    for name, fn in [
+        ("previous parsing", parse_previous),
+        ("parsing once", parse_once),
+        ("%%sql cell", run_cell),
+    ]:
+        seconds = min(timeit.repeat(fn, number=number, repeat=repeat)) / number
+        print(f"{name}: {seconds * 1000:.2f} ms per cell")
@@ -0,0 +1,52 @@
+"""
+Benchmark for rendering a ResultSet as HTML, compares the previous implementation
+(PrettyTable + html.unescape + regex) with sql.run.table.render_html_table
+
+>>> python render_html.py
+"""
+
+import re
+import timeit
+from html import unescape
+
+import numpy as np
+
+from sql.run.table import CustomPrettyTable, render_html_table
+
+num_rows = 1_000
+num_cols = 200
+repeat = 5
+
+rng = np.random.default_rng(0)
+field_names = [f"col_{i}" for i in range(num_cols)]
+values = rng.standard_normal((num_rows, num_cols))
+# mix numbers, strings, and links
+rows = [
+    tuple(
+        value if j % 3 == 0 else f"value {value:.3f}" if j % 3 == 1 else "https://x.y"
+        for j, value in enumerate(row.tolist())
+    )
+    for row in values
+]
+
+_cell_with_spaces_pattern = re.compile(r"(<td>)( {2,})")
+
+
+def render_prettytable():
+    pretty = CustomPrettyTable(field_names)
+    pretty.add_rows(rows)
+    result = unescape(pretty.get_html_string())
+    return _cell_with_spaces_pattern.sub(
+        lambda match: match.group(1) + "&nbsp;" * len(match.group(2)), result
+    )
+
+
+def render_fast():
+    return render_html_table(field_names, rows)
+
+
+if __name__ == "__main__":
+    for name, fn in [("prettytable", render_prettytable), ("fast", render_fast)]:
+        seconds = min(timeit.repeat(fn, number=1, repeat=repeat))
+        size = len(fn()) / 1024 / 1024
+        print(f"{name}: {seconds:.3f}s ({num_rows} x {num_cols}, {size:.1f} MB)")
@@ -0,0 +1,50 @@
+"""
+Benchmarks for %sql: running a query and fetching the results, rendering them, and
+exporting them to CSV
+"""
+
+import pytest
+
+SHAPES = [(1_000, 10), (100_000, 10), (10_000, 50)]
+
+
+@pytest.mark.parametrize("rows, cols", SHAPES, ids=lambda value: str(value))
+@pytest.mark.parametrize("output", ["resultset", "autopandas", "autopolars"])
+def test_select(benchmark, ip, make_table, rows, cols, output):
+    table = make_table(rows, cols)
+
+    if output != "resultset":
+        ip.run_line_magic("config", f"SqlMagic.{output} = True")
+
+    def select():
+        result = ip.run_line_magic("sql", f"SELECT * FROM {table}")
+
+        if output == "resultset":
+            result.fetchall()
+
+        return result
+
+    assert len(benchmark(select)) == rows
+
+
+@pytest.mark.parametrize("displaylimit", [10, 100, 1_000])
+def test_repr_html(benchmark, ip, make_table, displaylimit):
+    table = make_table(100_000, 10)
+    ip.run_line_magic("config", f"SqlMagic.displaylimit = {displaylimit}")
+
+    def render():
+        # the rendered table is cached, so we run the query every time
+        return ip.run_line_magic("sql", f"SELECT * FROM {table}")._repr_html_()
+
+    assert "<table>" in benchmark(render)
+
+
+@pytest.mark.parametrize("rows", [1_000, 100_000])
+def test_to_csv(benchmark, ip, make_table, tmp_path, rows):
+    table = make_table(rows, 10)
+    path = tmp_path / "data.csv"
+
+    def export():
+        return ip.run_line_magic("sql", f"SELECT * FROM {table}").to_csv(path)
+
+    assert benchmark(export) == rows
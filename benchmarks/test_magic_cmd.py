@@ -0,0 +1,14 @@
+"""
+Benchmarks for %sqlcmd, which run queries to inspect tables
+"""
+
+import pytest
+
+
+@pytest.mark.parametrize("cols", [10, 50])
+def test_sqlcmd_profile(benchmark, ip, make_table, cols):
+    table = make_table(10_000, cols)
+
+    result = benchmark(ip.run_line_magic, "sqlcmd", f"profile --table {table}")
+
+    assert result is not None
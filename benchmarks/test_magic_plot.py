@@ -0,0 +1,23 @@
+"""
+Benchmarks for %sqlplot, which runs aggregation queries in the database
+"""
+
+import matplotlib.pyplot as plt
+import pytest
+
+from sql.connection import ConnectionManager
+
+
+@pytest.mark.parametrize("kind", ["histogram", "boxplot"])
+def test_sqlplot(benchmark, ip, make_table, kind):
+    if kind == "boxplot" and ConnectionManager.current.alias.startswith("sqlite"):
+        pytest.skip("SQLite doesn't support percentiles")
+
+    table = make_table(100_000, 10)
+
+    def plot():
+        ax = ip.run_line_magic("sqlplot", f"{kind} --table {table} --column c0")
+        plt.close("all")
+        return ax
+
+    assert benchmark(plot) is not None
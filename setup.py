@@ -55,6 +55,8 @@ DEV = [
     "psutil",
     # for running tests for %sqlcmd connect
     "jupyter-server",
+    # for running the benchmarks
+    "pytest-benchmark",
 ]
 
 # dependencies for running integration tests
@@ -0,0 +1,48 @@
+"""
+Deferred imports for heavy optional dependencies (e.g., pandas, matplotlib, pyarrow)
+so loading the extension doesn't import them
+"""
+
+import importlib
+import importlib.util
+
+
+class LazyModule:
+    """A module that's imported the first time one of its attributes is accessed
+
+    Parameters
+    ----------
+    name : str
+        Name of the module (e.g., ``"matplotlib.pyplot"``)
+    """
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def _load(self):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+
+        return self._module
+
+    def __getattr__(self, attr):
+        # attributes aren't stored so patching the module (e.g., in tests) works
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        return f"<lazy module {self._name!r}>"
+
+
+def lazy_import(name):
+    """
+    Returns a LazyModule for the module, or None if it's not installed. Only the
+    top-level package is looked up, so this doesn't import anything
+    """
+    if importlib.util.find_spec(name.partition(".")[0]) is None:
+        return None
+
+    return LazyModule(name)
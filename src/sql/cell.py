@@ -0,0 +1,121 @@
+"""
+SQL code of a cell, parsed once. The magic, the snippet store, run_statements and
+the connections need to know the statements in the cell, their types, and the
+tables they use. Computing each of these with sqlparse or sqlglot tokenizes the
+whole cell again, so we parse it once and share the results
+"""
+
+import sqlparse
+from sqlparse import engine, filters
+
+from sql import util
+
+
+class ParsedStatement:
+    """A single SQL statement with the comments removed
+
+    Parameters
+    ----------
+    statement : sqlparse.sql.Statement
+        Grouped statement (as returned by ``sqlparse.parse``) without comments
+    """
+
+    def __init__(self, statement):
+        self.parsed = statement
+        # same output as sqlparse.format(..., strip_comments=True)
+        self.sql = filters.SerializerUnicode.process(statement).strip()
+        self._type = None
+
+    @property
+    def type(self):
+        """Statement type as returned by sqlparse (e.g., "SELECT" or "UNKNOWN")"""
+        if self._type is None:
+            self._type = self.parsed.get_type()
+
+        return self._type
+
+    @property
+    def first_keyword(self):
+        """First word of the statement (lowercase)"""
+        words = self.sql.split(None, 1)
+        return words[0].lower() if words else ""
+
+    def __str__(self):
+        return self.sql
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.sql!r})"
+
+
+def parse_statements(sql):
+    """
+    Splits the SQL code in statements and removes the comments, in a single pass.
+    Statements that are empty (or only have comments) are skipped
+    """
+    stack = engine.FilterStack()
+    stack.enable_grouping()
+    stack.stmtprocess.append(filters.StripCommentsFilter())
+
+    statements = [ParsedStatement(statement) for statement in stack.run(sql)]
+    return [statement for statement in statements if statement.sql]
+
+
+class ParsedCell:
+    """
+    SQL code of a cell. Statements, the query type and the tables are computed
+    the first time they're requested
+
+    Parameters
+    ----------
+    sql : str
+        SQL code
+    """
+
+    def __init__(self, sql):
+        self.sql = sql
+        self._statements = None
+        self._tables = None
+
+    @property
+    def statements(self):
+        """List of ParsedStatement in the cell (without comments)"""
+        if self._statements is None:
+            self._statements = parse_statements(self.sql)
+
+        return self._statements
+
+    @property
+    def query_type(self):
+        """Type of the first statement (e.g., "SELECT"), None if unknown"""
+        if not self.statements:
+            return None
+
+        query_type = self.statements[0].type
+        return None if query_type == "UNKNOWN" else query_type
+
+    @property
+    def tables(self):
+        """Names of the tables used in the cell ([] if the SQL can't be parsed)"""
+        if self._tables is None:
+            self._tables = util.extract_tables_from_query(self.sql)
+
+        return self._tables
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.sql!r})"
+
+
+def as_parsed_cell(sql):
+    """Returns a ParsedCell for the SQL code (a string or a ParsedCell)"""
+    if isinstance(sql, ParsedCell):
+        return sql
+
+    return ParsedCell(sql)
+
+
+def strip_comments(statement):
+    """Returns the statement without comments"""
+    if isinstance(statement, ParsedStatement):
+        return statement.sql
+
+    return sqlparse.format(statement, strip_comments=True).strip()
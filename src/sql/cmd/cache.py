@@ -0,0 +1,56 @@
+from sql.cmd.cmd_utils import CmdParser
+from sql.display import Table, Message
+from sql import _current
+from sql.run.cache import query_cache, get_disk_cache
+
+
+def cache(others, user_ns):
+    """
+    Implementation of `%sqlcmd cache`
+    Shows the number of cached query results and their size (in memory and, if
+    SqlMagic.query_cache_disk is enabled, on disk), or removes them with
+    `%sqlcmd cache clear`
+
+    Parameters
+    ----------
+    others : str,
+        A string containing the command line arguments.
+
+    user_ns : dict,
+        User namespace of IPython kernel
+    """
+    parser = CmdParser()
+    parser.add_argument(
+        "action",
+        nargs="?",
+        choices=["clear"],
+        help="Remove all cached query results",
+    )
+    args = parser.parse_args(others)
+    disk_cache = get_disk_cache(_current._get_sql_magic())
+
+    if args.action == "clear":
+        n_entries = len(query_cache)
+        query_cache.clear()
+
+        if disk_cache is None:
+            return Message(f"Removed {n_entries} cached results")
+
+        n_files = disk_cache.clear()
+        return Message(
+            f"Removed {n_entries} cached results from memory and {n_files} from disk"
+        )
+
+    headers = ["Cached results", "Size (MB)", "Hits", "Misses"]
+    row = [
+        len(query_cache),
+        round(query_cache.nbytes / 1024**2, 2),
+        query_cache.hits,
+        query_cache.misses,
+    ]
+
+    if disk_cache is not None:
+        headers += ["Cached results on disk", "Size on disk (MB)"]
+        row += [len(disk_cache), round(disk_cache.nbytes / 1024**2, 2)]
+
+    return Table(headers, [row])
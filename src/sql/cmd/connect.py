@@ -1,10 +1,9 @@
-try:
-    from jupysql_plugin.widgets import ConnectorWidget
-except ModuleNotFoundError:
-    ConnectorWidget = None
-
 from ploomber_core.dependencies import requires
 
+from sql._lazy import lazy_import
+
+widgets = lazy_import("jupysql_plugin.widgets")
+
 
 @requires(["jupysql-plugin", "ipywidgets"])
 def connect(others):
@@ -12,5 +11,5 @@ def connect(others):
     Implementation of `%sqlcmd connect`
     """
 
-    connectorwidget = ConnectorWidget()
+    connectorwidget = widgets.ConnectorWidget()
     return connectorwidget
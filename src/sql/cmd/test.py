@@ -1,9 +1,11 @@
 from sql import exceptions
 import sql.connection
-from sqlglot import select, condition
 from prettytable import PrettyTable
 from sql.cmd.cmd_utils import CmdParser
 from sql.util import expand_args, is_rendering_required
+from sql._lazy import lazy_import
+
+sqlglot = lazy_import("sqlglot")
 
 
 def return_test_results(args, conn, query):
@@ -28,12 +30,12 @@ def run_each_individually(args, conn):
         table_ = f"{args.schema}.{args.table}"
     else:
         table_ = args.table
-    base_query = select("*").from_(table_)
+    base_query = sqlglot.select("*").from_(table_)
 
     storage = {}
 
     if args.greater:
-        where = condition(args.column + "<=" + args.greater)
+        where = sqlglot.condition(args.column + "<=" + args.greater)
         current_query = base_query.where(where).sql()
 
         res = return_test_results(args, conn, query=current_query)
@@ -41,7 +43,7 @@ def run_each_individually(args, conn):
         if res is not None:
             storage["greater"] = res
     if args.greater_or_equal:
-        where = condition(args.column + "<" + args.greater_or_equal)
+        where = sqlglot.condition(args.column + "<" + args.greater_or_equal)
 
         current_query = base_query.where(where).sql()
 
@@ -51,7 +53,7 @@ def run_each_individually(args, conn):
             storage["greater_or_equal"] = res
 
     if args.less_than_or_equal:
-        where = condition(args.column + ">" + args.less_than_or_equal)
+        where = sqlglot.condition(args.column + ">" + args.less_than_or_equal)
         current_query = base_query.where(where).sql()
 
         res = return_test_results(args, conn, query=current_query)
@@ -59,7 +61,7 @@ def run_each_individually(args, conn):
         if res is not None:
             storage["less_than_or_equal"] = res
     if args.less_than:
-        where = condition(args.column + ">=" + args.less_than)
+        where = sqlglot.condition(args.column + ">=" + args.less_than)
         current_query = base_query.where(where).sql()
 
         res = return_test_results(args, conn, query=current_query)
@@ -67,7 +69,7 @@ def run_each_individually(args, conn):
         if res is not None:
             storage["less_than"] = res
     if args.no_nulls:
-        where = condition("{} is NULL".format(args.column))
+        where = sqlglot.condition("{} is NULL".format(args.column))
         current_query = base_query.where(where).sql()
 
         res = return_test_results(args, conn, query=current_query)
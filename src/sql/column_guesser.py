@@ -4,6 +4,8 @@ makes guesses about the role of each column for plotting purposes
 (X values, Y values, and text labels).
 """
 
+from operator import itemgetter
+
 
 class Column(list):
     "Store a column of tabular data; record its name and whether it is numeric"
@@ -11,8 +13,10 @@ class Column(list):
     is_quantity = True
     name = ""
 
-    def __init__(self, *arg, **kwarg):
-        pass
+    def __init__(self, values=(), name="", is_quantity=True):
+        super().__init__(values)
+        self.name = name
+        self.is_quantity = is_quantity
 
 
 def is_quantity(val):
@@ -23,6 +27,17 @@ def is_quantity(val):
     return hasattr(val, "__sub__")
 
 
+def is_quantity_column(values):
+    """Are all the values in a column (ignoring None) quantities?
+
+    Values of the same type behave the same, so each type is only checked once.
+    """
+    return all(
+        type_ is type(None) or hasattr(type_, "__sub__")
+        for type_ in set(map(type, values))
+    )
+
+
 class ColumnGuesserMixin(object):
     """
     plot: [x, y, y...], y
@@ -32,17 +47,16 @@ class ColumnGuesserMixin(object):
     def __init__(self):
         self.keys = None
 
-    def _build_columns(self):
-        self.columns = [Column() for col in self.keys]
-        for row in self:
-            for col_idx, col_val in enumerate(row):
-                col = self.columns[col_idx]
-                col.append(col_val)
-                if (col_val is not None) and (not is_quantity(col_val)):
-                    col.is_quantity = False
+    def _column_values(self):
+        """Returns the values of each column"""
+        rows = list(self)
+        return [list(map(itemgetter(idx), rows)) for idx in range(len(self.keys))]
 
-        for idx, key_name in enumerate(self.keys):
-            self.columns[idx].name = key_name
+    def _build_columns(self):
+        self.columns = [
+            Column(values, name=name, is_quantity=is_quantity_column(values))
+            for name, values in zip(self.keys, self._column_values())
+        ]
 
         self.x = Column()
         self.ys = []
@@ -62,10 +76,9 @@ class ColumnGuesserMixin(object):
     def _get_xlabel(self, xlabel_sep=" "):
         self.xlabels = []
         if self.columns:
-            for row_idx in range(len(self.columns[0])):
-                self.xlabels.append(
-                    xlabel_sep.join(str(c[row_idx]) for c in self.columns)
-                )
+            self.xlabels = list(
+                map(xlabel_sep.join, zip(*(map(str, c) for c in self.columns)))
+            )
         self.xlabel = ", ".join(c.name for c in self.columns)
 
     def _guess_columns(self):
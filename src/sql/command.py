@@ -1,12 +1,12 @@
 from pathlib import Path
-from jinja2 import Template
 
 from sqlalchemy.engine import Engine
 
 from sql import parse, exceptions
+from sql.cell import ParsedCell
 from sql.store import store
 from sql.connection import ConnectionManager, is_pep249_compliant, is_spark
-from sql.util import validate_nonidentifier_connection
+from sql.util import validate_nonidentifier_connection, render_template
 
 
 class SQLPlotCommand:
@@ -25,6 +25,7 @@ class SQLCommand:
     def __init__(self, magic, user_ns, line, cell) -> None:
         self._line = line
         self._cell = cell
+        self._parsed_cells = {}
 
         self.args = parse.magic_args(
             magic.execute,
@@ -91,7 +92,7 @@ class SQLCommand:
 
         if self.args.with_:
             self.args.with_ = [
-                Template(item).render(user_ns) for item in self.args.with_
+                render_template(item, user_ns) for item in self.args.with_
             ]
             final = store.render(self.parsed["sql"], with_=self.args.with_)
             self.parsed["sql"] = str(final)
@@ -119,6 +120,27 @@ class SQLCommand:
         """
         return self.parsed["sql_original"]
 
+    @property
+    def parsed_cell(self):
+        """
+        Returns the SQL query to execute as a ParsedCell, so it's parsed only once
+        """
+        return self._parsed_cell(self.sql)
+
+    @property
+    def parsed_cell_original(self):
+        """
+        Returns the raw SQL query as a ParsedCell (the same object as
+        ``parsed_cell`` if not using --with)
+        """
+        return self._parsed_cell(self.sql_original)
+
+    def _parsed_cell(self, sql):
+        if sql not in self._parsed_cells:
+            self._parsed_cells[sql] = ParsedCell(sql)
+
+        return self._parsed_cells[sql]
+
     @property
     def connection(self):
         """Returns the connection string"""
@@ -135,7 +157,7 @@ class SQLCommand:
         return self.parsed["return_result_var"]
 
     def _var_expand(self, sql, user_ns):
-        return Template(sql).render(user_ns)
+        return render_template(sql, user_ns)
 
     def __repr__(self) -> str:
         return (
@@ -9,6 +9,7 @@ from sql.connection.connection import (
     default_alias_for_engine,
     ResultSetCollection,
     detect_duckdb_summarize_or_select,
+    transpile_query,
 )
 
 
@@ -23,4 +24,5 @@ __all__ = [
     "default_alias_for_engine",
     "ResultSetCollection",
     "detect_duckdb_summarize_or_select",
+    "transpile_query",
 ]
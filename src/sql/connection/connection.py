@@ -1,13 +1,19 @@
 import warnings
 import difflib
 import abc
+import copy
 import os
+import threading
+import weakref
+from contextlib import contextmanager
 from difflib import get_close_matches
 import atexit
-from functools import partial
+from dataclasses import dataclass
+from functools import lru_cache, partial
 
 import sqlalchemy
 from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
 from sqlalchemy.exc import (
     NoSuchModuleError,
     OperationalError,
@@ -15,12 +21,16 @@ from sqlalchemy.exc import (
     PendingRollbackError,
     InternalError,
     ProgrammingError,
+    SQLAlchemyError,
 )
 
 from sql.run.sparkdataframe import handle_spark_dataframe
+from sql.run.cache import query_cache, is_mutating
+from sql.run.run import is_postgres_or_redshift
+from sql.run.resultset import _result_sets
+from sql.cell import ParsedStatement
 
 from IPython.core.error import UsageError
-import sqlglot
 import sqlparse
 
 
@@ -34,7 +44,11 @@ from sql.parse import (
 )
 from sql.warnings import JupySQLQuotedNamedParametersWarning, JupySQLRollbackPerformed
 from sql import _current
+from sql._lazy import lazy_import
 from sql.connection import error_handling
+from sql.util import get_config_option
+
+sqlglot = lazy_import("sqlglot")
 
 BASE_DOC_URL = "https://jupysql.readthedocs.io/en/latest"
 
@@ -86,6 +100,10 @@ DBNAME_2_DOC_LINK = {
 
 DIALECT_NAME_SQLALCHEMY_TO_SQLGLOT_MAPPING = {"postgresql": "postgres", "mssql": "tsql"}
 
+# number of transpiled queries to keep, the plotting and profiling functions run
+# many small queries that only differ in the table or column names
+TRANSPILE_CACHE_SIZE = 1024
+
 # All the DBs and their respective documentation links
 DB_DOCS_LINKS = {
     "duckdb": f"{BASE_DOC_URL}/integrations/duckdb.html",
@@ -124,6 +142,14 @@ class ResultSetCollection:
 
         return self._result_sets[-1] is result
 
+    def stop_prefetch(self):
+        """
+        Stops fetching rows in the background, must be called before running a new
+        query since the cursors might share the same connection
+        """
+        for r in self._result_sets:
+            r._stop_prefetch()
+
     def close_all(self):
         for r in self._result_sets:
             r.close()
@@ -414,17 +440,20 @@ class ConnectionManager:
     ):
         """Creates a new connection from a connection string"""
         connect_args = connect_args or {}
+        pool_options = _pool_options(config)
 
         try:
             if creator:
-                engine = sqlalchemy.create_engine(
+                engine = _create_engine(
                     connect_str,
+                    pool_options,
                     connect_args=connect_args,
                     creator=creator,
                 )
             else:
-                engine = sqlalchemy.create_engine(
+                engine = _create_engine(
                     connect_str,
+                    pool_options,
                     connect_args=connect_args,
                 )
         except (ModuleNotFoundError, NoSuchModuleError) as e:
@@ -467,6 +496,81 @@ class ConnectionManager:
                 )
 
 
+@dataclass(frozen=True)
+class DialectCapabilities:
+    """Dialect information of a connection. It's computed once per connection
+    (see ``AbstractConnection.capabilities``) since the functions that generate
+    queries (e.g., plotting) need it for every query
+
+    Parameters
+    ----------
+    dialect : str
+        Dialect name (as reported by the driver)
+
+    driver : str
+        Driver name
+
+    sqlglot_dialect : str
+        Dialect name in sqlglot, used for transpilation
+
+    identifiers : tuple
+        Characters that can enclose identifiers (e.g., ``"``)
+
+    use_backticks : bool
+        True if the dialect supports enclosing identifiers with backticks
+    """
+
+    dialect: str
+    driver: str
+    sqlglot_dialect: str
+    identifiers: tuple
+    use_backticks: bool
+
+    @classmethod
+    def from_connection(cls, conn):
+        """Resolves the capabilities of a connection"""
+        connection_info = conn._get_database_information()
+        sqlglot_dialect = conn._get_sqlglot_dialect()
+
+        return cls(
+            dialect=connection_info.get("dialect"),
+            driver=connection_info.get("driver"),
+            sqlglot_dialect=sqlglot_dialect,
+            identifiers=tuple(_identifiers_for_dialect(connection_info)),
+            use_backticks=_use_backticks_for_dialect(sqlglot_dialect),
+        )
+
+
+def _use_backticks_for_dialect(sqlglot_dialect):
+    if not sqlglot_dialect:
+        return False
+    try:
+        return (
+            "`" in sqlglot.Dialect.get_or_raise(sqlglot_dialect).Tokenizer.IDENTIFIERS
+        )
+    except (ValueError, AttributeError, TypeError):
+        return False
+
+
+def _identifiers_for_dialect(connection_info):
+    identifiers = ["", '"']
+    try:
+        if connection_info:
+            cur_dialect = connection_info["dialect"]
+            identifiers_ = sqlglot.Dialect.get_or_raise(
+                cur_dialect
+            ).Tokenizer.IDENTIFIERS
+
+            identifiers = [*set(identifiers + identifiers_)]
+    except ValueError:
+        pass
+    except AttributeError:
+        # this might be a DBAPI connection
+        pass
+
+    return identifiers
+
+
 class AbstractConnection(abc.ABC):
     """The abstract base class for all connections"""
 
@@ -477,6 +581,23 @@ class AbstractConnection(abc.ABC):
         ConnectionManager.connections[alias] = self
 
         self._result_sets = ResultSetCollection()
+        self._capabilities = None
+        # held while running queries (see _running), reentrant since worker threads
+        # (e.g., %%sql --async) hold it while calling run_statements
+        self._async_lock = threading.RLock()
+        # statement timeout set in the database (see _set_server_side_timeout)
+        self._server_side_timeout = 0
+
+    @property
+    def capabilities(self):
+        """
+        Returns the DialectCapabilities of the connection, resolved the first time
+        it's requested
+        """
+        if self._capabilities is None:
+            self._capabilities = DialectCapabilities.from_connection(self)
+
+        return self._capabilities
 
     @abc.abstractproperty
     def dialect(self):
@@ -484,7 +605,7 @@ class AbstractConnection(abc.ABC):
         pass
 
     @abc.abstractmethod
-    def raw_execute(self, query, parameters=None):
+    def raw_execute(self, query, parameters=None, parsed=None):
         """Run the query without any pre-processing"""
         pass
 
@@ -501,8 +622,179 @@ class AbstractConnection(abc.ABC):
         """Create a table from a pandas DataFrame"""
         pass
 
+    def _worker_connection(self):
+        """
+        Returns a connection to run queries from a worker thread (e.g., with
+        %%sql --async). By default, this same connection is returned, so queries
+        from worker threads run one at a time (see _running). Subclasses return
+        a copy that uses a separate database connection when the database supports
+        it, so queries run concurrently
+        """
+        return self
+
+    def _copy_with_connection(self):
+        """
+        Returns a copy of this object to use a separate database connection. The
+        copy is not registered in the ConnectionManager
+        """
+        worker = copy.copy(self)
+        worker._result_sets = ResultSetCollection()
+        worker._async_lock = threading.RLock()
+        # the statement timeout of the new connection is unknown (e.g., a previous
+        # checkout from the pool might have set it), so it's set the first time
+        # it's needed
+        worker._server_side_timeout = None
+        return worker
+
+    def _release_worker_connection(self, worker):
+        """Closes a connection returned by _worker_connection"""
+        if worker is self:
+            return
+
+        worker._result_sets.stop_prefetch()
+        worker._connection.close()
+
+    def _pooled_connection(self):
+        """
+        Returns the connection to run the statements of a %sql execution. By
+        default, this same connection is returned (SQLAlchemyConnection returns a
+        connection from the engine's pool if connection pooling is enabled)
+        """
+        return self
+
+    def _release_pooled_connection(self, pooled, result):
+        """
+        Called once the statements run on a connection returned by
+        _pooled_connection, result is the object returned to the user
+        """
+        pass
+
+    def _release_results(self, result_set):
+        """
+        Called when a result set no longer needs its connection (e.g., it fetched
+        all the rows)
+        """
+        pass
+
+    def _dbapi_connection(self):
+        """Returns the DBAPI connection (None if there isn't one)"""
+        return None
+
+    def _cancel_function(self):
+        """
+        Returns a function that cancels the statement running in this connection
+        from another thread (None if the driver doesn't support it). Uses
+        interrupt() (e.g., DuckDB and SQLite) or cancel() (e.g., psycopg)
+        """
+        return _find_cancel_method(self._dbapi_connection())
+
+    def _set_server_side_timeout(self, timeout):
+        """
+        Sets the statement timeout in the database, returns False if it's not
+        supported (in such case, statements are cancelled from the client)
+        """
+        return False
+
+    def _rollback_after_cancel(self):
+        """Leaves the connection ready to run more statements after cancelling one"""
+        pass
+
+    @contextmanager
+    def _running(self):
+        """
+        Context manager to run queries on this connection. Worker threads (e.g.,
+        %%sql --async) might use this same connection (see _worker_connection),
+        so it waits until the queries they're running finish
+        """
+        if not self._async_lock.acquire(blocking=False):
+            display.message(
+                "Waiting for the queries running in the background on this "
+                "connection to finish..."
+            )
+            self._async_lock.acquire()
+
+        try:
+            yield
+        finally:
+            self._async_lock.release()
+
+    @contextmanager
+    def cancellable(self, timeout=0):
+        """
+        Context manager to run a statement so it's cancelled if it takes longer than
+        timeout seconds (0 means no timeout), or if the user interrupts the kernel.
+        Note that the timeout applies to running the statement, not to fetching
+        the rows
+
+        Examples
+        --------
+        >>> with conn.cancellable(timeout=10):
+        ...     cursor = conn.raw_execute(query)
+        """
+        # setting the timeout runs a statement, so the results being prefetched in
+        # the background must stop using the connection first
+        self._result_sets.stop_prefetch()
+        server_side = self._set_server_side_timeout(timeout)
+        cancel = None
+        timer = None
+        timed_out = threading.Event()
+        # prevents cancelling once the statement finished (some drivers might
+        # cancel the next one)
+        lock = threading.Lock()
+        finished = False
+
+        def cancel_after_timeout():
+            with lock:
+                if not finished:
+                    timed_out.set()
+                    cancel()
+
+        if timeout and not server_side:
+            cancel = self._cancel_function()
+
+            if cancel is None:
+                display.message_warning(
+                    "This connection doesn't support cancelling queries, "
+                    "the query will run without a timeout"
+                )
+            else:
+                timer = threading.Timer(timeout, cancel_after_timeout)
+                timer.daemon = True
+                timer.start()
+
+        try:
+            yield
+        except KeyboardInterrupt:
+            cancel = cancel or self._cancel_function()
+
+            if cancel is not None:
+                with lock:
+                    _call_ignoring_errors(cancel)
+
+            self._rollback_after_cancel()
+            raise
+        except Exception as e:
+            if timed_out.is_set() or (server_side and "statement timeout" in str(e)):
+                self._rollback_after_cancel()
+                raise exceptions.RuntimeError(
+                    "The query was cancelled since it took longer than the "
+                    f"timeout ({timeout} seconds)"
+                ) from e
+
+            raise
+        finally:
+            with lock:
+                finished = True
+
+            if timer is not None:
+                timer.cancel()
+
     def close(self):
         """Close the connection"""
+        self._result_sets.stop_prefetch()
+        # the alias might be used by another connection later
+        query_cache.invalidate(self.alias)
+
         for rs in self._result_sets:
             # this might be None if it didn't run any query
             if rs._sqlaproxy is not None:
@@ -542,7 +834,7 @@ class AbstractConnection(abc.ABC):
         str
             SQL clause that's compatible to current connected dialect
         """
-        write_dialect = self._get_sqlglot_dialect()
+        write_dialect = self.capabilities.sqlglot_dialect
 
         # we write queries to be duckdb-compatible so we don't need to transpile
         # them. Furthermore, sqlglot does not guarantee roundtrip conversion
@@ -550,14 +842,9 @@ class AbstractConnection(abc.ABC):
         if write_dialect == "duckdb":
             return query
 
-        try:
-            return ";\n".join(
-                [p.sql(dialect=write_dialect) for p in sqlglot.parse(query)]
-            )
-        except Exception:
-            return query
+        return transpile_query(query, write_dialect)
 
-    def _prepare_query(self, query, with_=None) -> str:
+    def _prepare_query(self, query, with_=None, transpile=True) -> str:
         """
         Returns a textual representation of a query based
         on the current connection
@@ -569,23 +856,31 @@ class AbstractConnection(abc.ABC):
 
         with_ : string, default None
             The key to use in with sql clause
+
+        transpile : bool, default True
+            If False, the query is not transpiled to the connection's dialect
         """
         if with_:
             query = self._resolve_cte(query, with_)
 
-        query = self._transpile_query(query)
+        if transpile:
+            query = self._transpile_query(query)
 
         return query
 
     def _resolve_cte(self, query, with_):
         return str(store.render(query, with_=with_))
 
-    def execute(self, query, with_=None):
+    def execute(self, query, with_=None, transpile=True):
         """
-        Executes SQL query on a given connection
+        Executes SQL query on a given connection. The query is transpiled to the
+        connection's dialect unless ``transpile=False`` (e.g., if it's already
+        written for the connection's dialect)
         """
-        query_prepared = self._prepare_query(query, with_)
-        return self.raw_execute(query_prepared)
+        query_prepared = self._prepare_query(query, with_, transpile=transpile)
+
+        with self._running():
+            return self.raw_execute(query_prepared)
 
     def is_use_backtick_template(self):
         """Get if the dialect support backtick (`) syntax as identifier
@@ -595,15 +890,7 @@ class AbstractConnection(abc.ABC):
         bool
             Indicate if the dialect can use backtick identifier in the SQL clause
         """
-        cur_dialect = self._get_sqlglot_dialect()
-        if not cur_dialect:
-            return False
-        try:
-            return (
-                "`" in sqlglot.Dialect.get_or_raise(cur_dialect).Tokenizer.IDENTIFIERS
-            )
-        except (ValueError, AttributeError, TypeError):
-            return False
+        return self.capabilities.use_backticks
 
     def get_curr_identifiers(self) -> list:
         """
@@ -611,23 +898,7 @@ class AbstractConnection(abc.ABC):
 
         Default identifiers are : ["", '"']
         """
-        identifiers = ["", '"']
-        try:
-            connection_info = self._get_database_information()
-            if connection_info:
-                cur_dialect = connection_info["dialect"]
-                identifiers_ = sqlglot.Dialect.get_or_raise(
-                    cur_dialect
-                ).Tokenizer.IDENTIFIERS
-
-                identifiers = [*set(identifiers + identifiers_)]
-        except ValueError:
-            pass
-        except AttributeError:
-            # this might be a DBAPI connection
-            pass
-
-        return identifiers
+        return list(self.capabilities.identifiers)
 
 
 # some dialects break when commit is used
@@ -677,6 +948,20 @@ class SQLAlchemyConnection(AbstractConnection):
         self._driver = db_info["driver"]
 
         autocommit = True if config is None else config.autocommit
+        self._autocommit = autocommit
+
+        # with connection pooling, statements run on connections checked out from
+        # the engine's pool. In-memory databases aren't shared across connections,
+        # so they keep using a single connection
+        self._pooled = get_config_option(
+            config, "connection_pooling", bool, False
+        ) and not _is_in_memory_database(engine.url)
+        # the connection that returned this copy (see _pooled_connection)
+        self._pool_parent = None
+        # weak references to result sets that still need their pooled connection
+        self._pooled_results = []
+        # functions to release the connection, by result set id (in pooled copies)
+        self._releases = {}
 
         if autocommit:
             success = set_sqlalchemy_isolation_level(self._connection_sqlalchemy)
@@ -710,7 +995,162 @@ class SQLAlchemyConnection(AbstractConnection):
     def driver(self):
         return self._driver
 
-    def _connection_execute(self, query, parameters=None):
+    def _worker_connection(self):
+        """
+        Returns a copy of this connection with a new connection from the engine's
+        pool. In-memory databases are not shared across connections, so this
+        connection is returned instead
+        """
+        engine = self._connection.engine
+
+        if _is_in_memory_database(engine.url):
+            if self.dialect == "sqlite":
+                raise exceptions.UsageError(
+                    "Running queries in a background thread (e.g., with --async or "
+                    "--parallel) is not supported for in-memory SQLite databases, "
+                    "since their connection can only be used from the thread that "
+                    "created it"
+                )
+
+            return self
+
+        return self._checkout_connection()
+
+    def _checkout_connection(self):
+        """
+        Returns a copy of this connection that uses a new connection from the
+        engine's pool
+        """
+        worker = self._copy_with_connection()
+        worker._connection_sqlalchemy = self._start_sqlalchemy_connection(
+            self._connection.engine, self._url
+        )
+
+        if self._autocommit:
+            set_sqlalchemy_isolation_level(worker._connection_sqlalchemy)
+
+        # the copy runs statements on its own connection
+        worker._pooled = False
+        worker._pooled_results = []
+        worker._releases = {}
+        return worker
+
+    def _pooled_connection(self):
+        """
+        With connection pooling, returns a copy that uses a connection checked out
+        from the engine's pool (which replaces connections closed by the server if
+        pool_pre_ping is enabled), otherwise, returns this connection
+        """
+        if not self._pooled:
+            return self
+
+        self._release_least_recent_results()
+        pooled = self._checkout_connection()
+        pooled._pool_parent = self
+        return pooled
+
+    def _release_pooled_connection(self, pooled, result):
+        if pooled is self:
+            return
+
+        held = [
+            result_set
+            for result_set in _result_sets(result)
+            if result_set._conn is pooled
+        ]
+
+        if not held:
+            pooled._connection.close()
+            return
+
+        # the results need the connection to fetch the remaining rows, it goes back
+        # to the pool once all of them are fetched, closed or garbage collected
+        lease = _ConnectionLease(pooled._connection, len(held))
+
+        for result_set in held:
+            self._pooled_results.append(weakref.ref(result_set))
+            pooled._releases[id(result_set)] = weakref.finalize(
+                result_set, lease.release
+            )
+
+    def _release_results(self, result_set):
+        if self._pool_parent is None or result_set._conn is not self:
+            return
+
+        result_set._conn = self._pool_parent
+        release = self._releases.pop(id(result_set), None)
+
+        # this is None if the results don't need the connection by the time the
+        # statements finish running (the connection is returned right after)
+        if release is not None:
+            release()
+
+    def _held_pooled_results(self):
+        """Returns the result sets that still need their pooled connection"""
+        result_sets = [ref() for ref in self._pooled_results]
+        result_sets = [
+            result_set
+            for result_set in result_sets
+            if result_set is not None and result_set._conn is not self
+        ]
+        self._pooled_results = [weakref.ref(result_set) for result_set in result_sets]
+        return result_sets
+
+    def _release_least_recent_results(self):
+        """
+        Returns the connections of the least recently used result sets to the pool
+        if it's full, so checking out a connection doesn't block. Those result sets
+        run the query again (on this connection) if they need more rows
+        """
+        pool = self._connection.engine.pool
+        pool_size = pool.size() if isinstance(pool, QueuePool) else 0
+
+        if not pool_size:
+            return
+
+        result_sets = self._held_pooled_results()
+        excess = len(result_sets) - pool_size + 1
+
+        for result_set in result_sets:
+            if excess <= 0:
+                break
+
+            # result sets that are being iterated (e.g., with iter_batches) keep
+            # their connection
+            if not result_set._streamed:
+                result_set._detach_connection()
+                excess -= 1
+
+    def _dbapi_connection(self):
+        pool_connection = self._connection.connection
+        # dbapi_connection was added in SQLAlchemy 1.4.24
+        return getattr(pool_connection, "dbapi_connection", None) or getattr(
+            pool_connection, "connection", None
+        )
+
+    def _set_server_side_timeout(self, timeout):
+        """Sets statement_timeout in PostgreSQL and Redshift"""
+        if not is_postgres_or_redshift(self.dialect):
+            return False
+
+        if self._server_side_timeout != timeout:
+            self._connection.exec_driver_sql(
+                f"SET statement_timeout = {int(timeout * 1000)}"
+            )
+            self._server_side_timeout = timeout
+
+        return True
+
+    def _rollback_after_cancel(self):
+        try:
+            self._connection.rollback()
+        except SQLAlchemyError:
+            pass
+
+        # rolling back might undo the SET statement_timeout
+        self._server_side_timeout = None
+
+    def _connection_execute(self, query, parameters=None, parsed=None):
         """Call the connection execute method
 
         Parameters
@@ -720,20 +1160,28 @@ class SQLAlchemyConnection(AbstractConnection):
 
         parameters : dict, default None
             Parameters to use in the query (:variable format)
+
+        parsed : sql.cell.ParsedStatement, default None
+            The parsed query, if passed, the query is not parsed again
         """
         # we do not support multiple statements
-        if len(sqlparse.split(query)) > 1:
+        if parsed is None and len(sqlparse.split(query)) > 1:
             raise NotImplementedError("Only one statement is supported.")
 
+        self._result_sets.stop_prefetch()
+
         operation = partial(self._execute_with_parameters, query, parameters)
         out = self._execute_with_error_handling(operation)
 
         if self._requires_manual_commit:
             # Calling connection.commit() when using duckdb-engine will yield
             # empty results if we commit after a SELECT or SUMMARIZE statement,
-            # see: https://github.com/Mause/duckdb_engine/issues/734.
+            # see: https://github.com/Mause/duckdb_engine/issues/734. The same
+            # happens with other read-only statements (e.g., SHOW or DESCRIBE)
             if self.dialect == "duckdb":
-                no_commit = detect_duckdb_summarize_or_select(query)
+                no_commit = detect_duckdb_summarize_or_select(
+                    parsed or query
+                ) or not is_mutating(parsed or query)
                 if no_commit:
                     return out
 
@@ -755,7 +1203,9 @@ class SQLAlchemyConnection(AbstractConnection):
 
     def _execute_with_parameters(self, query, parameters):
         """Execute the query with the given parameters"""
-        if parameters == {}:
+        # parameters might be a view of the user's namespace, so we avoid comparing
+        # it with {} which copies it
+        if parameters is not None and not parameters:
             return self._connection.exec_driver_sql(query)
 
         parameters = parameters or {}
@@ -768,7 +1218,7 @@ class SQLAlchemyConnection(AbstractConnection):
 
         return out
 
-    def raw_execute(self, query, parameters=None, with_=None):
+    def raw_execute(self, query, parameters=None, with_=None, parsed=None):
         """Run the query without any preprocessing
 
         Parameters
@@ -782,6 +1232,10 @@ class SQLAlchemyConnection(AbstractConnection):
 
         with_ : list, default None
             List of CTEs to use in the query
+
+        parsed : sql.cell.ParsedStatement, default None
+            The parsed query (e.g., when running the statements in a cell), if
+            passed, the query is not parsed again
         """
         # mssql with pyodbc does not support multiple open result sets, so we need
         # to close them all before issuing a new query
@@ -790,11 +1244,14 @@ class SQLAlchemyConnection(AbstractConnection):
 
         if with_:
             query = self._resolve_cte(query, with_)
+            parsed = None
 
         query, quoted_named_parameters = escape_string_literals_with_colon_prefix(query)
 
         if quoted_named_parameters and parameters:
-            intersection = set(quoted_named_parameters) & set(parameters)
+            intersection = {
+                name for name in quoted_named_parameters if name in parameters
+            }
 
             if intersection:
                 intersection_ = ", ".join(sorted(intersection))
@@ -807,8 +1264,9 @@ class SQLAlchemyConnection(AbstractConnection):
 
         if parameters:
             required_parameters = set(sqlalchemy.text(query).compile().params)
-            available_parameters = set(parameters)
-            missing_parameters = required_parameters - available_parameters
+            missing_parameters = {
+                name for name in required_parameters if name not in parameters
+            }
 
             if missing_parameters:
                 raise exceptions.InvalidQueryParameters(
@@ -816,10 +1274,10 @@ class SQLAlchemyConnection(AbstractConnection):
                     "variables are undefined: {}".format(", ".join(missing_parameters))
                 )
 
-            return self._connection_execute(query, parameters)
+            return self._connection_execute(query, parameters, parsed=parsed)
         else:
             try:
-                return self._connection_execute(query, parameters)
+                return self._connection_execute(query, parameters, parsed=parsed)
             except StatementError as e:
                 # add a more helpful message if the users passes :variable but
                 # the feature isn't enabled
@@ -837,7 +1295,7 @@ class SQLAlchemyConnection(AbstractConnection):
                             "For more info, see the docs: "
                             "https://jupysql.readthedocs.io/en/latest/api/configuration.html#named-parameters"  # noqa
                         )
-                elif parameters == {}:
+                elif parameters is not None and not parameters:
                     e.add_detail(
                         'The named parameters feature is "disabled". '
                         'Enable it with: %config SqlMagic.named_parameters="enabled".\n'
@@ -943,6 +1401,9 @@ class SQLAlchemyConnection(AbstractConnection):
         return self._connection_sqlalchemy
 
     def close(self):
+        for result_set in self._held_pooled_results():
+            result_set.close()
+
         super().close()
 
         # NOTE: in SQLAlchemy 2.x, we need to call engine.dispose() to completely
@@ -999,6 +1460,8 @@ class DBAPIConnection(AbstractConnection):
 
         self._connection = connection
         self._connection_class_name = type(connection).__name__
+        # cursor used by the last statement
+        self._cursor = None
 
         # calling init from AbstractConnection must be the last thing we do as it
         # register the connection
@@ -1015,7 +1478,39 @@ class DBAPIConnection(AbstractConnection):
     def driver(self):
         return self._driver
 
-    def raw_execute(self, query, parameters=None, with_=None):
+    def _worker_connection(self):
+        """
+        Returns a copy of this connection that uses a duplicate of the DuckDB
+        connection (they share the same database, including in-memory ones). Other
+        drivers return this connection
+        """
+        if not self._is_duckdb_native:
+            return self
+
+        worker = self._copy_with_connection()
+        worker._connection = self._connection.cursor()
+        return worker
+
+    def _dbapi_connection(self):
+        return self._connection
+
+    def _cancel_function(self):
+        """
+        Returns a function that cancels the running statement. Uses the cursor's
+        interrupt() or cancel() if it has them (e.g., native DuckDB, where cursors
+        are separate connections, or pyodbc), otherwise, the connection's
+        """
+        connection_cancel = super()._cancel_function()
+
+        if connection_cancel is None and _find_cancel_method(self._cursor) is None:
+            return None
+
+        def cancel():
+            (_find_cancel_method(self._cursor) or connection_cancel)()
+
+        return cancel
+
+    def raw_execute(self, query, parameters=None, with_=None, parsed=None):
         """Run the query without any preprocessing
 
         Parameters
@@ -1026,16 +1521,25 @@ class DBAPIConnection(AbstractConnection):
         parameters : dict, default None
             This parameter is added for consistency with SQLAlchemy connections but
             it is not used
+
+        with_ : list, default None
+            List of CTEs to use in the query
+
+        parsed : sql.cell.ParsedStatement, default None
+            The parsed query, if passed, the query is not parsed again
         """
         # we do not support multiple statements (this might actually work in some
         # drivers but we need to add this for consistency with SQLAlchemyConnection)
-        if len(sqlparse.split(query)) > 1:
+        if parsed is None and len(sqlparse.split(query)) > 1:
             raise NotImplementedError("Only one statement is supported.")
 
         if with_:
             query = self._resolve_cte(query, with_)
 
+        self._result_sets.stop_prefetch()
+
         cur = self._connection.cursor()
+        self._cursor = cur
 
         # NOTE: this is a workaround for duckdb 1.1.0 and higher so we keep the
         # existing behavior of being able to query data frames
@@ -1081,6 +1585,22 @@ class DBAPIConnection(AbstractConnection):
         )
 
 
+class _ConnectionLease:
+    """Closes a connection once all the result sets using it release it"""
+
+    def __init__(self, connection, count):
+        self._connection = connection
+        self._count = count
+        self._lock = threading.Lock()
+
+    def release(self):
+        with self._lock:
+            self._count -= 1
+
+            if not self._count:
+                self._connection.close()
+
+
 class SparkConnectConnection(AbstractConnection):
     is_dbapi_connection = False
 
@@ -1104,7 +1624,7 @@ class SparkConnectConnection(AbstractConnection):
         """Returns a string with the SQL dialect name"""
         return "spark2"
 
-    def raw_execute(self, query, parameters=None):
+    def raw_execute(self, query, parameters=None, parsed=None):
         """Run the query without any pre-processing"""
         return handle_spark_dataframe(self._connection.sql(query))
 
@@ -1222,6 +1742,66 @@ def _suggest_fix(env_var, connect_str=None):
     return "\n\n".join(options)
 
 
+def _find_cancel_method(obj):
+    """
+    Returns the method that cancels the running statement of a DBAPI connection
+    or cursor (interrupt or cancel), None if it has none
+    """
+    for name in ("interrupt", "cancel"):
+        method = getattr(obj, name, None)
+
+        if callable(method):
+            return method
+
+    return None
+
+
+def _call_ignoring_errors(function):
+    """Calls the function, errors are ignored"""
+    try:
+        function()
+    except Exception:
+        pass
+
+
+def _pool_options(config):
+    """
+    Returns the arguments to configure the engine's pool when connection pooling
+    is enabled (SqlMagic.connection_pooling)
+    """
+    if not get_config_option(config, "connection_pooling", bool, False):
+        return {}
+
+    return {
+        "pool_size": get_config_option(config, "pool_size", int, 5),
+        "pool_pre_ping": get_config_option(config, "pool_pre_ping", bool, True),
+        # SQLAlchemy uses -1 to never recycle connections
+        "pool_recycle": get_config_option(config, "pool_recycle", int, 0) or -1,
+    }
+
+
+def _create_engine(connect_str, pool_options, **kwargs):
+    """
+    Creates an engine with the given pool options, pool_size is dropped if the
+    dialect's pool doesn't support it (e.g., SQLite uses NullPool for some URLs)
+    """
+    try:
+        return sqlalchemy.create_engine(connect_str, **pool_options, **kwargs)
+    except TypeError:
+        if "pool_size" not in pool_options:
+            raise
+
+        pool_options = {
+            key: value for key, value in pool_options.items() if key != "pool_size"
+        }
+        return sqlalchemy.create_engine(connect_str, **pool_options, **kwargs)
+
+
+def _is_in_memory_database(url):
+    """Checks if the URL points to an in-memory database (e.g., sqlite://)"""
+    return url.database in {None, "", ":memory:"}
+
+
 def is_pep249_compliant(conn):
     """
     Checks if given connection object complies with PEP 249
@@ -1286,13 +1866,35 @@ def set_sqlalchemy_isolation_level(conn):
         return False
 
 
+@lru_cache(maxsize=TRANSPILE_CACHE_SIZE)
+def transpile_query(query, write_dialect):
+    """
+    Translates the query to the given sqlglot dialect, returns the query unchanged
+    if sqlglot cannot translate it. Results are cached by query and dialect, use
+    ``transpile_query.cache_info()`` to get the number of hits and misses, and
+    ``transpile_query.cache_clear()`` to clear the cache
+    """
+    try:
+        return ";\n".join(
+            [p.sql(dialect=write_dialect) for p in sqlglot.parse(query)]
+        )
+    except Exception:
+        return query
+
+
 def detect_duckdb_summarize_or_select(query):
     """
-    Checks if the SQL query is a DuckDB SELECT or SUMMARIZE statement.
+    Checks if the SQL query (a string or a sql.cell.ParsedStatement) is a DuckDB
+    SELECT or SUMMARIZE statement.
 
     Note:
     Assumes there is only one SQL statement in the query.
     """
+    if isinstance(query, ParsedStatement):
+        return query.type == "SELECT" or (
+            query.type == "UNKNOWN" and query.first_keyword in {"from", "summarize"}
+        )
+
     statements = sqlparse.parse(query)
     if statements:
         if len(statements) > 1:
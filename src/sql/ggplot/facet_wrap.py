@@ -2,6 +2,7 @@ from jinja2 import Template
 import math
 import sql.connection
 from sql.util import enclose_table_with_double_quotations
+from sql.run.cache import execute_cached
 
 
 class facet:
@@ -19,7 +20,7 @@ class facet:
         )
         query = template.render(table=table, column=column)
 
-        values = conn.execute(query, with_).fetchall()
+        values = execute_cached(conn, query, with_).fetchall()
         # Added to make histogram more inclusive to NULLs
         # Filter out NULL values
         # If value[0] is NULL we skip it
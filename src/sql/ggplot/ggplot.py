@@ -1,10 +1,12 @@
 from sql.ggplot.aes import aes
 from sql.ggplot.geom.geom import geom
 from sql.ggplot.facet_wrap import facet_wrap
-import matplotlib as mpl
-import matplotlib.pyplot as plt
+from sql._lazy import lazy_import
 from ploomber_core.dependencies import requires
 
+mpl = lazy_import("matplotlib")
+plt = lazy_import("matplotlib.pyplot")
+
 
 def _expand_to_multipanel_ax(figure, ax_to_clear=None):
     figure.subplots_adjust(hspace=0.7, wspace=0.5)
@@ -24,7 +26,7 @@ class ggplot:
     Create a new ggplot
     """
 
-    figure: mpl.figure.Figure
+    figure: "mpl.figure.Figure"
     axs: list
 
     def __init__(self, table, mapping: aes = None, conn=None, with_=None) -> None:
@@ -49,7 +51,7 @@ class ggplot:
     def __iadd__(self, other):
         return other.__add__(self)
 
-    def _draw(self, other) -> mpl.figure.Figure:
+    def _draw(self, other) -> "mpl.figure.Figure":
         """
         Draws plot
         """
@@ -423,7 +423,7 @@ class TableDescription(DatabaseInspection):
 
         current = ConnectionManager.current
         database = current.dialect
-        db_driver = current._get_database_information()["driver"]
+        db_driver = current.capabilities.driver
 
         if database and "duckdb" in database:
             db_message = ""
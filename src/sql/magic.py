@@ -3,12 +3,6 @@ import os
 import re
 from pathlib import Path
 
-import sqlparse
-
-try:
-    from ipywidgets import interact
-except ModuleNotFoundError:
-    interact = None
 from IPython.core.magic import (
     Magics,
     cell_magic,
@@ -33,26 +27,28 @@ import shlex
 import sql.connection
 import sql.parse
 from sql.run.run import run_statements
+from sql.run.cache import invalidate_cached
+from sql.run.future import QueryFuture
+from sql.run.parallel import run_statements_parallel
 from sql.parse import _option_strings_from_parser
 from sql import display, exceptions
 from sql.store import store
 from sql.command import SQLCommand
+from sql.cell import ParsedCell
 from sql.magic_plot import SqlPlotMagic
 from sql.magic_cmd import SqlCmdMagic
 from sql._patch import patch_ipython_usage_error
 from sql import util
 from sql.error_handler import handle_exception
 from sql._current import _set_sql_magic
+from sql._lazy import lazy_import
 
 
 from ploomber_core.dependencies import check_installed
 
 
-try:
-    from pandas.core.frame import DataFrame, Series
-except ModuleNotFoundError:
-    DataFrame = None
-    Series = None
+ipywidgets = lazy_import("ipywidgets")
+pd = lazy_import("pandas")
 
 
 SUPPORT_INTERACTIVE_WIDGETS = ["Checkbox", "Text", "IntSlider", ""]
@@ -114,11 +110,44 @@ class SqlMagic(Magics, Configurable):
         config=True,
         help="Return Polars DataFrames instead of regular result sets",
     )
+    background_fetch = Bool(
+        default_value=False,
+        config=True,
+        help=(
+            "Fetch the remaining rows in a background thread after displaying the "
+            "results so converting them (e.g., to a data frame) is faster"
+        ),
+    )
+    background_fetch_max_bytes = Int(
+        default_value=268_435_456,
+        config=True,
+        help=(
+            "Stop fetching rows in the background once they use this many bytes "
+            "(approximately), 0 means no limit"
+        ),
+    )
+    columnar_results = Bool(
+        default_value=False,
+        config=True,
+        help=(
+            "Store fetched rows column by column instead of keeping the row objects "
+            "returned by the driver (reduces memory usage for large results)"
+        ),
+    )
     column_local_vars = Bool(
         default_value=False,
         config=True,
         help="Return data into local variables from column names",
     )
+    connection_pooling = Bool(
+        default_value=False,
+        config=True,
+        help=(
+            "Run each query on a connection checked out from the engine's pool "
+            "instead of a single connection per alias (applies to connections "
+            "opened afterwards)"
+        ),
+    )
     displaycon = Bool(
         default_value=True, config=True, help="Show connection string after execution"
     )
@@ -139,6 +168,15 @@ class SqlMagic(Magics, Configurable):
         "a sqlalchemy connection string is formed from the "
         "matching section in the DSN file.",
     )
+    fetch_batch_size = Int(
+        default_value=0,
+        config=True,
+        help=(
+            "Number of rows to request from the database per round trip when "
+            "fetching all the results and the cursor's arraysize (0 uses the "
+            "driver's default)"
+        ),
+    )
     feedback = Int(
         default_value=1,
         config=True,
@@ -161,6 +199,14 @@ class SqlMagic(Magics, Configurable):
             "(i.e., 'SELECT * FROM foo WHERE bar = :bar')"
         ),
     )
+    prefetch_rows = Int(
+        default_value=0,
+        config=True,
+        help=(
+            "Number of rows to fetch when running a query, set it to displaylimit + 1 "
+            "to display the results with a single round trip (0 fetches 2 rows)"
+        ),
+    )
     polars_dataframe_kwargs = Dict(
         default_value={},
         config=True,
@@ -169,6 +215,89 @@ class SqlMagic(Magics, Configurable):
             "(e.g. infer_schema_length, nan_to_null, schema_overrides, etc)"
         ),
     )
+    pool_pre_ping = Bool(
+        default_value=True,
+        config=True,
+        help=(
+            "Test pooled connections before using them and replace the ones the "
+            "server closed (requires connection_pooling)"
+        ),
+    )
+    pool_recycle = Int(
+        default_value=0,
+        config=True,
+        help=(
+            "Replace pooled connections after this many seconds, 0 means they're "
+            "never replaced (requires connection_pooling)"
+        ),
+    )
+    pool_size = Int(
+        default_value=5,
+        config=True,
+        help=(
+            "Number of connections to keep in the pool, 0 means no limit "
+            "(requires connection_pooling)"
+        ),
+    )
+    query_cache = Bool(
+        default_value=False,
+        config=True,
+        help=(
+            "Cache the results of read-only queries and return them when running "
+            "the same query (with the same parameters and connection) again"
+        ),
+    )
+    query_cache_dir = Unicode(
+        default_value="~/.jupysql/cache",
+        config=True,
+        help="Directory to store the cached results when query_cache_disk is True",
+    )
+    query_cache_disk = Bool(
+        default_value=False,
+        config=True,
+        help=(
+            "Also store the cached results on disk (requires pyarrow), so they "
+            "can be reused after restarting the kernel. Only applies to databases "
+            "stored in a file or server, not to in-memory databases"
+        ),
+    )
+    query_cache_disk_max_bytes = Int(
+        default_value=1_073_741_824,
+        config=True,
+        help=(
+            "Maximum size of the cached results stored on disk, the least "
+            "recently used ones are removed when exceeding it, 0 means no limit"
+        ),
+    )
+    query_cache_max_bytes = Int(
+        default_value=268_435_456,
+        config=True,
+        help=(
+            "Maximum size (approximately) of the cached results, the least "
+            "recently used ones are removed when exceeding it, 0 means no limit"
+        ),
+    )
+    query_cache_ttl = Int(
+        default_value=0,
+        config=True,
+        help="Seconds after which cached results expire, 0 means they never expire",
+    )
+    query_timeout = Int(
+        default_value=0,
+        config=True,
+        help=(
+            "Cancel queries that take longer than this many seconds to run, "
+            "0 means no timeout"
+        ),
+    )
+    result_memory_limit = Int(
+        default_value=0,
+        config=True,
+        help=(
+            "Write the rows of a result set to a temporary file once the rows in "
+            "memory use this many bytes (approximately), 0 means no limit"
+        ),
+    )
     short_errors = Bool(
         default_value=True,
         config=True,
@@ -218,6 +347,27 @@ class SqlMagic(Magics, Configurable):
         except ValueError:
             raise TraitError("{}: displaylimit is not an integer".format(value))
 
+    @validate(
+        "background_fetch_max_bytes",
+        "fetch_batch_size",
+        "pool_recycle",
+        "pool_size",
+        "prefetch_rows",
+        "query_cache_disk_max_bytes",
+        "query_cache_max_bytes",
+        "query_cache_ttl",
+        "query_timeout",
+        "result_memory_limit",
+    )
+    def _valid_non_negative(self, proposal):
+        if proposal["value"] < 0:
+            raise TraitError(
+                "{}: {} cannot be a negative integer".format(
+                    proposal["value"], proposal["trait"].name
+                )
+            )
+        return proposal["value"]
+
     @observe("autopandas", "autopolars")
     def _mutex_autopandas_autopolars(self, change):
         # When enabling autopandas or autopolars, automatically disable the
@@ -335,6 +485,42 @@ class SqlMagic(Magics, Configurable):
         action="append",
         help="Interactive mode",
     )
+    @argument(
+        "--export",
+        type=str,
+        help=(
+            "Write the results to this path instead of returning them "
+            "(.csv, .parquet, .ndjson, or .jsonl, optionally with .gz or .zst)"
+        ),
+    )
+    @argument(
+        "--no-cache",
+        action="store_true",
+        help="Run the query even if its results are cached",
+    )
+    @argument(
+        "--timeout",
+        type=int,
+        help=(
+            "Cancel the query if it takes longer than this many seconds to run "
+            "(overrides SqlMagic.query_timeout)"
+        ),
+    )
+    @argument(
+        "--async",
+        action="store_true",
+        dest="async_",
+        help="Run the query in the background and return a QueryFuture",
+    )
+    @argument(
+        "--parallel",
+        type=int,
+        metavar="N",
+        help=(
+            "Run the statements that don't depend on each other concurrently, on up "
+            "to N connections, and return their timings"
+        ),
+    )
     def execute(self, line="", cell="", local_ns=None):
         """
         Runs SQL statement against a database, specified by
@@ -396,9 +582,9 @@ class SqlMagic(Magics, Configurable):
         if local_ns is None:
             local_ns = {}
 
-        # save globals and locals so they can be referenced in bind vars
-        user_ns = self.shell.user_ns.copy()
-        user_ns.update(local_ns)
+        # save globals and locals so they can be referenced in bind vars, this is
+        # a view (not a copy) since the namespace might have many variables
+        user_ns = util.namespace_view(local_ns, self.shell.user_ns)
 
         command = SQLCommand(self, user_ns, line, cell)
         # args.line: contains the line after the magic with all options removed
@@ -415,15 +601,16 @@ class SqlMagic(Magics, Configurable):
             )
 
         is_cte = command.sql_original.strip().lower().startswith("with ")
+        parsed_original = command.parsed_cell_original
 
         # only expand CTE if this is not a CTE itself
         if not is_cte:
             if args.with_:
                 with_ = args.with_
             else:
-                with_ = self._store.infer_dependencies(command.sql_original, args.save)
+                with_ = self._store.infer_dependencies(parsed_original, args.save)
                 if with_:
-                    query_type = get_query_type(command.sql_original)
+                    query_type = parsed_original.query_type
 
                     if query_type != "SELECT":
                         display.message_warning(
@@ -439,15 +626,13 @@ class SqlMagic(Magics, Configurable):
                 else:
                     with_ = None
         else:
-            query_type = get_query_type(command.sql_original)
+            query_type = parsed_original.query_type
             if args.with_:
                 raise exceptions.UsageError(
                     "Cannot use --with with CTEs, remove --with and re-run the cell"
                 )
 
-            dependencies = self._store.infer_dependencies(
-                command.sql_original, args.save
-            )
+            dependencies = self._store.infer_dependencies(parsed_original, args.save)
 
             if dependencies:
                 if query_type != "SELECT":
@@ -471,7 +656,7 @@ class SqlMagic(Magics, Configurable):
                 "Interactive mode, please interact with below "
                 "widget(s) to control the variable"
             )
-            interact(interactive_execute_wrapper, **interactive_dict)
+            ipywidgets.interact(interactive_execute_wrapper, **interactive_dict)
             return
 
         if args.connections:
@@ -573,13 +758,67 @@ class SqlMagic(Magics, Configurable):
         elif self.named_parameters == "enabled":
             parameters = user_ns
 
+        if args.timeout is not None and args.timeout < 0:
+            raise exceptions.UsageError("--timeout cannot be a negative integer")
+
+        if args.parallel is not None:
+            if args.parallel < 1:
+                raise exceptions.UsageError("--parallel must be a positive integer")
+
+            if args.async_ or args.export:
+                raise exceptions.UsageError(
+                    "--parallel cannot be used with --async or --export"
+                )
+
+        if args.async_:
+            if self.column_local_vars:
+                raise exceptions.UsageError(
+                    "--async cannot be used with SqlMagic.column_local_vars"
+                )
+
+            result = QueryFuture(
+                conn,
+                command.parsed_cell,
+                self,
+                parameters=parameters,
+                export_to=args.export,
+                use_cache=not args.no_cache,
+                timeout=args.timeout,
+            ).start()
+
+            if command.result_var:
+                self.shell.user_ns.update({command.result_var: result})
+                return result if command.return_result_var else None
+
+            return result
+
         try:
-            result = run_statements(conn, command.sql, self, parameters=parameters)
+            if args.parallel:
+                result = run_statements_parallel(
+                    conn,
+                    command.parsed_cell,
+                    self,
+                    args.parallel,
+                    parameters=parameters,
+                    use_cache=not args.no_cache,
+                    timeout=args.timeout,
+                )
+            else:
+                result = run_statements(
+                    conn,
+                    command.parsed_cell,
+                    self,
+                    parameters=parameters,
+                    export_to=args.export,
+                    use_cache=not args.no_cache,
+                    timeout=args.timeout,
+                )
 
             if (
                 result is not None
                 and not isinstance(result, str)
                 and self.column_local_vars
+                and not args.parallel
             ):
                 # Instead of returning values, set variables directly in the
                 # users namespace. Variable names given by column names
@@ -628,7 +867,7 @@ class SqlMagic(Magics, Configurable):
         self, raw, conn, user_ns, append=False, index=True, replace=False
     ):
         """Implements PERSIST, which writes a DataFrame to the RDBMS"""
-        if not DataFrame:
+        if pd is None:
             raise exceptions.MissingPackageError(
                 "You must install pandas to persist results: pip install pandas"
             )
@@ -664,7 +903,7 @@ class SqlMagic(Magics, Configurable):
 
         frame = user_ns[frame_name]
 
-        if not isinstance(frame, DataFrame) and not isinstance(frame, Series):
+        if not isinstance(frame, (pd.DataFrame, pd.Series)):
             raise exceptions.TypeError(
                 f"{frame_name!r} is not a Pandas DataFrame or Series"
             )
@@ -688,16 +927,15 @@ class SqlMagic(Magics, Configurable):
             schema=schema_name,
         )
 
+        # the cached results of queries that read the table are outdated
+        invalidate_cached(conn, self)
+
 
 def get_query_type(command: str):
     """
     Returns the query type of the original sql command
     """
-    parsed = sqlparse.parse(command)
-    query_type = parsed[0].get_type() if parsed else None
-    if query_type == "UNKNOWN":
-        return None
-    return query_type
+    return ParsedCell(command).query_type
 
 
 def set_configs(ip, file_path, alternate_path):
@@ -12,8 +12,9 @@ from sql.cmd.profile import profile
 from sql.cmd.explore import explore
 from sql.cmd.snippets import snippets
 from sql.cmd.connect import connect
+from sql.cmd.cache import cache
 from sql.connection import ConnectionManager
-from sql.util import check_duplicate_arguments
+from sql.util import check_duplicate_arguments, namespace_view
 
 try:
     from traitlets.config.configurable import Configurable
@@ -55,6 +56,7 @@ class SqlCmdMagic(Magics, Configurable):
             "explore",
             "snippets",
             "connect",
+            "cache",
         ]
         COMMANDS_CONNECTION_REQUIRED = [
             "tables",
@@ -126,10 +128,11 @@ class SqlCmdMagic(Magics, Configurable):
             "explore": explore,
             "snippets": snippets,
             "connect": connect,
+            "cache": cache,
         }
 
         cmd = router.get(cmd_name)
         if cmd_name == "connect":
             return cmd(others)
         else:
-            return cmd(others, self.shell.user_ns.copy())
+            return cmd(others, namespace_view(self.shell.user_ns))
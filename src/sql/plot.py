@@ -14,22 +14,16 @@ from sql.util import (
     enclose_table_with_double_quotations,
 )
 from sql.display import message
-
-try:
-    import matplotlib.pyplot as plt
-    from matplotlib.colors import Normalize
-except ModuleNotFoundError:
-    plt = None
-    Normalize = None
-
-try:
-    import numpy as np
-except ModuleNotFoundError:
-    np = None
+from sql.run.cache import execute_cached
+from sql._lazy import lazy_import
 
 import sql.connection
 import warnings
 
+plt = lazy_import("matplotlib.pyplot")
+mcolors = lazy_import("matplotlib.colors")
+np = lazy_import("numpy")
+
 
 def _whishi(conn, table, column, hival, with_=None):
     if not conn:
@@ -47,7 +41,7 @@ FROM (
 
     query = template.render(table=table, column=column, hival=hival)
 
-    values = conn.execute(query, with_).fetchone()
+    values = execute_cached(conn, query, with_).fetchone()
     keys = ["N", "wiskhi_max"]
     return {k: float(v) for k, v in zip(keys, values)}
 
@@ -68,7 +62,7 @@ FROM (
 
     query = template.render(table=table, column=column, loval=loval)
 
-    values = conn.execute(query, with_).fetchone()
+    values = execute_cached(conn, query, with_).fetchone()
     keys = ["N", "wisklo_min"]
     return {k: float(v) for k, v in zip(keys, values)}
 
@@ -85,7 +79,7 @@ FROM {{table}}
     )
     query = template.render(table=table, column=column, pct=pct)
 
-    values = conn.execute(query, with_).fetchone()[0]
+    values = execute_cached(conn, query, with_).fetchone()[0]
     return values
 
 
@@ -100,7 +94,7 @@ OR  "{{column}}" > {{whishi}}
     )
     query = template.render(table=table, column=column, whislo=whislo, whishi=whishi)
 
-    results = [float(n[0]) for n in conn.execute(query, with_).fetchall()]
+    results = [float(n[0]) for n in execute_cached(conn, query, with_).fetchall()]
     return results
 
 
@@ -264,7 +258,7 @@ FROM {{table}}
         table = table.replace('"', "`")
     template = Template(template_)
     query = template.render(table=table, column=column)
-    min_, max_ = conn.execute(query, with_).fetchone()
+    min_, max_ = execute_cached(conn, query, with_).fetchone()
     return min_, max_
 
 
@@ -437,7 +431,7 @@ def histogram(
             binwidth=binwidth,
         )
         cmap = plt.get_cmap(cmap or "viridis")
-        norm = Normalize(vmin=0, vmax=len(data))
+        norm = mcolors.Normalize(vmin=0, vmax=len(data))
 
         bottom = np.zeros(len(bin_))
         for i, values in enumerate(data):
@@ -678,7 +672,7 @@ def _histogram(
 
         query = template.render(table=table, column=column, filter_query=filter_query)
 
-    data = conn.execute(query, with_).fetchall()
+    data = execute_cached(conn, query, with_).fetchall()
 
     bin_, height = zip(*data)
 
@@ -756,7 +750,7 @@ def _histogram_stacked(
         cases=cases,
     )
 
-    data = conn.execute(query, with_).fetchall()
+    data = execute_cached(conn, query, with_).fetchall()
 
     return data
 
@@ -849,7 +843,7 @@ def _bar(table, column, with_=None, conn=None):
         template = Template(template_)
         query = template.render(table=table, column=column)
 
-    data = conn.execute(query, with_).fetchall()
+    data = execute_cached(conn, query, with_).fetchall()
 
     x, height = zip(*data)
 
@@ -926,7 +920,7 @@ def bar(
 
     if (not color) and cmap:
         cmap = plt.get_cmap(cmap)
-        norm = Normalize(vmin=0, vmax=len(x))
+        norm = mcolors.Normalize(vmin=0, vmax=len(x))
         color = [cmap(norm(i)) for i in range(len(x))]
 
     if orient == "h":
@@ -1030,7 +1024,7 @@ def _pie(table, column, with_=None, conn=None):
         template = Template(template_)
         query = template.render(table=table, column=column)
 
-    data = conn.execute(query, with_).fetchall()
+    data = execute_cached(conn, query, with_).fetchall()
 
     labels, size = zip(*data)
 
@@ -1101,7 +1095,7 @@ def pie(
 
     if (not color) and cmap:
         cmap = plt.get_cmap(cmap)
-        norm = Normalize(vmin=0, vmax=len(labels))
+        norm = mcolors.Normalize(vmin=0, vmax=len(labels))
         color = [cmap(norm(i)) for i in range(len(labels))]
 
     if show_num:
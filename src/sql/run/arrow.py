@@ -0,0 +1,230 @@
+"""
+Support for drivers that can return results as Apache Arrow record batches (e.g.,
+DuckDB and ADBC). When available, ResultSet reads record batches directly from the
+cursor and keeps them, so converting to pandas/polars doesn't require creating
+Python objects for each row
+"""
+
+import operator
+
+from sql.run.buffer import RowBuffer, ColumnarBuffer
+from sql._lazy import lazy_import
+
+pa = lazy_import("pyarrow")
+
+
+def get_native_cursor(sqlaproxy):
+    """
+    Returns the DB-API cursor behind the object returned by the connection's
+    ``raw_execute`` (SQLAlchemy results wrap the cursor)
+    """
+    if hasattr(sqlaproxy, "description"):
+        return sqlaproxy
+
+    return getattr(sqlaproxy, "cursor", None)
+
+
+def _open_reader(cursor, batch_size):
+    """Returns a pyarrow.RecordBatchReader for the cursor, or None if the cursor
+    doesn't support Arrow"""
+    if cursor is None:
+        return None
+
+    fetch_record_batch = getattr(cursor, "fetch_record_batch", None)
+
+    if callable(fetch_record_batch):
+        try:
+            # duckdb
+            return fetch_record_batch(batch_size)
+        except TypeError:
+            # adbc does not take arguments
+            return fetch_record_batch()
+
+    # some drivers can only return the whole result as a table
+    for method_name in ("fetch_arrow_table", "fetch_arrow_all"):
+        method = getattr(cursor, method_name, None)
+
+        if callable(method):
+            table = method()
+            return pa.RecordBatchReader.from_batches(table.schema, table.to_batches())
+
+    return None
+
+
+class ArrowStream:
+    """Reads Arrow record batches from a cursor in chunks of the requested size
+
+    Parameters
+    ----------
+    reader : pyarrow.RecordBatchReader
+        Reader returned by the cursor
+    """
+
+    def __init__(self, reader):
+        self._reader = reader
+        self._pending = None
+        self._exhausted = False
+
+    @classmethod
+    def from_cursor(cls, cursor, batch_size=2048):
+        """
+        Creates a stream from a DB-API cursor. Returns None if pyarrow isn't
+        installed or the cursor doesn't support Arrow
+        """
+        if pa is None:
+            return None
+
+        try:
+            reader = _open_reader(cursor, batch_size)
+        # the driver might expose the methods but fail for some statements
+        except Exception:
+            return None
+
+        if reader is None or not isinstance(reader, pa.RecordBatchReader):
+            return None
+
+        return cls(reader)
+
+    @property
+    def schema(self):
+        return self._reader.schema
+
+    @property
+    def exhausted(self):
+        return self._exhausted
+
+    def _next_batch(self):
+        try:
+            return self._reader.read_next_batch()
+        except StopIteration:
+            self._exhausted = True
+            return None
+
+    def read(self, size):
+        """Returns a list of record batches with at most ``size`` rows in total"""
+        batches = []
+        missing = size
+
+        while missing > 0 and not self._exhausted:
+            if self._pending is None:
+                self._pending = self._next_batch()
+
+                if self._pending is None:
+                    break
+
+            batch = self._pending
+
+            if batch.num_rows <= missing:
+                batches.append(batch)
+                missing -= batch.num_rows
+                self._pending = None
+            else:
+                batches.append(batch.slice(0, missing))
+                self._pending = batch.slice(missing)
+                missing = 0
+
+        return batches
+
+    def read_all(self):
+        """Returns a list with all the remaining record batches"""
+        batches = [] if self._pending is None else [self._pending]
+        self._pending = None
+
+        while not self._exhausted:
+            batch = self._next_batch()
+
+            if batch is not None:
+                batches.append(batch)
+
+        return batches
+
+
+class ArrowBuffer:
+    """Stores fetched rows as Arrow record batches
+
+    Parameters
+    ----------
+    schema : pyarrow.Schema
+        Schema of the result
+    """
+
+    def __init__(self, schema):
+        self._schema = schema
+        self._batches = []
+        self._length = 0
+
+    def extend(self, batches):
+        """Append record batches read from the cursor"""
+        for batch in batches:
+            if batch.num_rows:
+                self._batches.append(batch)
+                self._length += batch.num_rows
+
+    def clear(self):
+        self._batches = []
+        self._length = 0
+
+    def nbytes(self):
+        """Returns the memory used by the stored record batches"""
+        return sum(batch.nbytes for batch in self._batches)
+
+    def _all_batches(self):
+        """Returns all the stored record batches"""
+        return self._batches
+
+    def to_table(self):
+        """Returns a pyarrow.Table with all the stored rows"""
+        return pa.Table.from_batches(self._all_batches(), schema=self._schema)
+
+    def columns(self):
+        """Returns a list with the values of each column"""
+        return [column.to_pylist() for column in self.to_table().columns]
+
+    def column(self, idx):
+        """Returns a list with the values of the column in position ``idx``"""
+        return self.to_table().column(idx).to_pylist()
+
+    def _rows(self, batches):
+        for batch in batches:
+            yield from zip(*(column.to_pylist() for column in batch.columns))
+
+    def __len__(self):
+        return self._length
+
+    def __iter__(self):
+        return self._rows(self._all_batches())
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            start, stop, step = key.indices(self._length)
+
+            if step != 1:
+                return list(self)[key]
+
+            sliced = self.to_table().slice(start, max(stop - start, 0))
+            return list(self._rows(sliced.to_batches()))
+
+        # raises TypeError for non-integer keys, ResultSet relies on this to
+        # look up rows by the value of the leftmost column
+        idx = operator.index(key)
+
+        if idx < 0:
+            idx += self._length
+
+        if not 0 <= idx < self._length:
+            raise IndexError("list index out of range")
+
+        for batch in self._all_batches():
+            if idx < batch.num_rows:
+                return next(self._rows([batch.slice(idx, 1)]))
+
+            idx -= batch.num_rows
+
+    def __eq__(self, other):
+        if isinstance(other, (RowBuffer, ColumnarBuffer, ArrowBuffer)):
+            other = list(other)
+
+        return list(self) == other
+
+    def __repr__(self):
+        return f"{type(self).__name__}({list(self)!r})"
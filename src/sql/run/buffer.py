@@ -0,0 +1,159 @@
+"""
+Storage for the rows fetched by a ResultSet. ``RowBuffer`` keeps the row objects
+returned by the driver (default), while ``ColumnarBuffer`` transposes them into
+one list per column, so no per-row object is kept alive
+"""
+
+import operator
+import sys
+
+
+def estimate_row_nbytes(row):
+    """Estimates the memory used by the values in a row"""
+    return sum(sys.getsizeof(value) for value in row)
+
+
+class RowBuffer:
+    """Stores fetched rows as a list of the row objects returned by the driver
+
+    Parameters
+    ----------
+    n_columns : int
+        Number of columns in the result
+    """
+
+    def __init__(self, n_columns):
+        self._n_columns = n_columns
+        self._rows = []
+        self._nbytes = 0
+
+    def extend(self, rows):
+        """Append rows fetched from the cursor"""
+        if rows:
+            # estimate the size using the first row
+            row_nbytes = estimate_row_nbytes(rows[0]) + sys.getsizeof(rows[0])
+            self._nbytes += row_nbytes * len(rows)
+
+        self._rows.extend(rows)
+
+    def clear(self):
+        self._rows = []
+        self._nbytes = 0
+
+    def nbytes(self):
+        """Returns an estimate of the memory used by the stored rows"""
+        return self._nbytes
+
+    def columns(self):
+        """Returns a list with the values of each column"""
+        n_columns = len(self._rows[0]) if self._rows else self._n_columns
+
+        # one pass per column is faster than zip(*rows), which passes every row
+        # as an argument
+        return [
+            list(map(operator.itemgetter(idx), self._rows)) for idx in range(n_columns)
+        ]
+
+    def column(self, idx):
+        """Returns a list with the values of the column in position ``idx``"""
+        return [row[idx] for row in self._rows]
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __iter__(self):
+        return iter(self._rows)
+
+    def __getitem__(self, key):
+        return self._rows[key]
+
+    def __eq__(self, other):
+        if isinstance(other, (RowBuffer, ColumnarBuffer)):
+            other = list(other)
+
+        return self._rows == other
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self._rows!r})"
+
+
+class ColumnarBuffer:
+    """Stores fetched rows as one list per column. Rows are materialized as tuples
+    only when accessed by position or iterated
+
+    Parameters
+    ----------
+    n_columns : int
+        Number of columns in the result
+    """
+
+    def __init__(self, n_columns):
+        self._columns = [[] for _ in range(n_columns)]
+        self._length = 0
+        self._nbytes = 0
+
+    def extend(self, rows):
+        """Append rows fetched from the cursor"""
+        if not rows:
+            return
+
+        # the number of columns might be unknown until we get the first rows (e.g.,
+        # when the cursor has no description)
+        if not self._columns:
+            self._columns = [[] for _ in rows[0]]
+
+        for column, values in zip(self._columns, zip(*rows)):
+            column.extend(values)
+
+        self._length += len(rows)
+        # estimate the size using the first row, each value is referenced by a list
+        row_nbytes = estimate_row_nbytes(rows[0]) + 8 * len(self._columns)
+        self._nbytes += row_nbytes * len(rows)
+
+    def clear(self):
+        self._columns = [[] for _ in self._columns]
+        self._length = 0
+        self._nbytes = 0
+
+    def nbytes(self):
+        """Returns an estimate of the memory used by the stored rows"""
+        return self._nbytes
+
+    def columns(self):
+        """Returns a list with the values of each column"""
+        return self._columns
+
+    def column(self, idx):
+        """Returns a list with the values of the column in position ``idx``"""
+        return self._columns[idx]
+
+    def __len__(self):
+        return self._length
+
+    def __iter__(self):
+        if not self._columns:
+            return iter(())
+
+        return zip(*self._columns)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return list(zip(*(column[key] for column in self._columns)))
+
+        # raises TypeError for non-integer keys, ResultSet relies on this to
+        # look up rows by the value of the leftmost column
+        idx = operator.index(key)
+
+        if not -self._length <= idx < self._length:
+            raise IndexError("list index out of range")
+
+        return tuple(column[idx] for column in self._columns)
+
+    def __eq__(self, other):
+        if isinstance(other, (RowBuffer, ColumnarBuffer)):
+            other = list(other)
+
+        return list(self) == other
+
+    def __repr__(self):
+        return f"{type(self).__name__}({list(self)!r})"
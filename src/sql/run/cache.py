@@ -0,0 +1,550 @@
+"""
+Cache for query results. Results are keyed on the statement (without comments),
+the named parameters it uses and the connection alias, and stored by column.
+Statements that might modify the database bypass the cache and invalidate the
+entries for the connection.
+
+Results can also be persisted (``SqlMagic.query_cache_disk``) as Arrow IPC files,
+so they survive kernel restarts. On disk, entries are keyed on the connection URL
+(with the password hidden) instead of the alias
+"""
+
+import hashlib
+import os
+import tempfile
+import time
+from collections import OrderedDict
+from itertools import islice
+from pathlib import Path
+
+import sqlalchemy
+import sqlparse
+from sqlparse import tokens
+
+from sql import _current
+from sql.cell import ParsedStatement, strip_comments
+from sql.run.buffer import estimate_row_nbytes
+from sql.util import get_config_option
+from sql._lazy import lazy_import
+
+pa = lazy_import("pyarrow")
+
+# statements that don't modify the database but we don't cache
+_READ_ONLY_KEYWORDS = {"show", "describe", "desc", "explain", "summarize"}
+
+
+def _first_keyword(statement):
+    if isinstance(statement, ParsedStatement):
+        return statement.first_keyword
+
+    words = statement.split(None, 1)
+    return words[0].lower() if words else ""
+
+
+def is_cacheable(statement):
+    """
+    Returns True if the statement (a string or a ParsedStatement) only reads data
+    (e.g., SELECT)
+    """
+    if isinstance(statement, ParsedStatement):
+        parsed = statement.parsed
+    else:
+        parsed = sqlparse.parse(statement)
+
+        if not parsed:
+            return False
+
+        parsed = parsed[0]
+
+    statement_type = parsed.get_type()
+
+    # duckdb allows FROM without SELECT
+    if statement_type == "UNKNOWN":
+        return _first_keyword(statement) == "from"
+
+    if statement_type != "SELECT":
+        return False
+
+    # SELECT ... INTO creates a table
+    return not any(
+        token.ttype in tokens.Keyword and token.normalized == "INTO"
+        for token in parsed.flatten()
+    )
+
+
+def is_mutating(statement):
+    """Returns True if the statement might modify the database"""
+    return not is_cacheable(statement) and (
+        _first_keyword(statement) not in _READ_ONLY_KEYWORDS
+    )
+
+
+def _used_parameters(statement, parameters):
+    """Returns the named parameters (:name) that appear in the statement"""
+    if not parameters:
+        return ()
+
+    names = sqlalchemy.text(statement).compile().params
+    return tuple(
+        sorted((name, repr(parameters[name])) for name in names if name in parameters)
+    )
+
+
+def make_key(statement, parameters, alias, autolimit=0):
+    """
+    Returns the cache key for a statement, or None if we cannot tell which
+    parameters it uses
+    """
+    statement = strip_comments(statement)
+
+    try:
+        used_parameters = _used_parameters(statement, parameters)
+    except Exception:
+        return None
+
+    return (alias, statement, used_parameters, autolimit)
+
+
+class CachedResult:
+    """Rows of a query stored by column
+
+    Parameters
+    ----------
+    keys : list
+        Column names
+
+    columns : list
+        List with the values of each column
+    """
+
+    def __init__(self, keys, columns):
+        self.keys = list(keys)
+        self.columns = [list(values) for values in columns]
+        self.n_rows = len(self.columns[0]) if self.columns else 0
+        self.created_at = time.monotonic()
+
+        if self.n_rows:
+            first_row = [values[0] for values in self.columns]
+            self.nbytes = estimate_row_nbytes(first_row) * self.n_rows
+        else:
+            self.nbytes = 0
+
+    def cursor(self):
+        """Returns a DB-API cursor that returns the cached rows"""
+        return CachedCursor(self)
+
+
+class CachedCursor:
+    """A DB-API cursor that reads the rows of a CachedResult"""
+
+    rowcount = -1
+    arraysize = 1
+
+    def __init__(self, result):
+        self.description = [
+            (key, None, None, None, None, None, None) for key in result.keys
+        ]
+        self._rows = zip(*result.columns)
+
+    def fetchmany(self, size=None):
+        return list(islice(self._rows, size or self.arraysize))
+
+    def fetchall(self):
+        return list(self._rows)
+
+    def fetchone(self):
+        return next(self._rows, None)
+
+    def close(self):
+        pass
+
+
+class QueryCache:
+    """A least recently used cache of query results with an optional expiration
+    time for its entries"""
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._nbytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, ttl=0):
+        """Returns the result for the key or None if it's missing or expired"""
+        entry = self._entries.get(key)
+
+        if entry is not None and ttl and time.monotonic() - entry.created_at > ttl:
+            self._remove(key)
+            entry = None
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key, entry, max_bytes=0):
+        """
+        Stores an entry and removes the least recently used ones if the entries use
+        more than ``max_bytes`` (0 means no limit)
+        """
+        if max_bytes and entry.nbytes > max_bytes:
+            return False
+
+        if key in self._entries:
+            self._remove(key)
+
+        self._entries[key] = entry
+        self._nbytes += entry.nbytes
+
+        while max_bytes and self._nbytes > max_bytes:
+            self._remove(next(iter(self._entries)))
+
+        return True
+
+    def _remove(self, key):
+        self._nbytes -= self._entries.pop(key).nbytes
+
+    def invalidate(self, alias):
+        """Removes the entries for the connection with the given alias"""
+        for key in [key for key in self._entries if key[0] == alias]:
+            self._remove(key)
+
+    def clear(self):
+        self._entries = OrderedDict()
+        self._nbytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def nbytes(self):
+        return self._nbytes
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def fetch_for_cache(result_set, max_bytes=0):
+    """
+    Fetches all rows of the result set and returns them as a CachedResult, returns
+    None if the rows use more than ``max_bytes`` (0 means no limit)
+    """
+    if not result_set.keys:
+        return None
+
+    batch_size = result_set._fetch_batch_size or 1000
+
+    while not result_set._done_fetching():
+        if max_bytes and result_set._results.nbytes() > max_bytes:
+            return None
+
+        result_set.fetchmany(batch_size)
+
+    entry = CachedResult(result_set.keys, result_set._results.columns())
+
+    if max_bytes and entry.nbytes > max_bytes:
+        return None
+
+    return entry
+
+
+# shared by all connections
+query_cache = QueryCache()
+
+DEFAULT_DISK_CACHE_DIR = "~/.jupysql/cache"
+
+_CREATED_AT = b"jupysql.created_at"
+
+
+def _hash(value):
+    return hashlib.sha256(value.encode("utf-8")).hexdigest()
+
+
+def disk_cache_url(conn):
+    """
+    Returns the URL that identifies the database in the disk cache, or None if the
+    results cannot be persisted (e.g., in-memory databases or DB-API connections)
+    """
+    url = getattr(conn, "url", None)
+
+    if not url:
+        return None
+
+    try:
+        url = sqlalchemy.engine.make_url(url)
+    except Exception:
+        return None
+
+    database = url.database
+
+    if not database or database == ":memory:":
+        return None
+
+    # the same file might be opened with a relative path
+    if url.get_backend_name() in {"sqlite", "duckdb"}:
+        return f"{url.drivername}:///{os.path.abspath(database)}"
+
+    # sqlalchemy hides the password when converting the url to a string
+    return repr(url)
+
+
+class DiskCache:
+    """Query results stored as Arrow IPC files in a directory. The files are
+    memory-mapped when reading them and the least recently read ones are removed
+    when the directory grows over the size limit
+
+    Parameters
+    ----------
+    path : str or pathlib.Path
+        Directory to store the results, created if it doesn't exist
+    """
+
+    def __init__(self, path):
+        self.path = Path(path).expanduser()
+
+    def _prefix(self, url):
+        return _hash(url)[:16]
+
+    def _file(self, url, key):
+        # the alias (first element of the key) is replaced with the url
+        digest = _hash(repr((url,) + tuple(key[1:])))
+        return self.path / f"{self._prefix(url)}-{digest}.arrow"
+
+    def _files(self):
+        if not self.path.is_dir():
+            return []
+
+        return list(self.path.glob("*.arrow"))
+
+    def get(self, url, key, ttl=0):
+        """Returns the result for the key or None if it's missing or expired"""
+        path = self._file(url, key)
+
+        if not path.exists():
+            return None
+
+        try:
+            with pa.memory_map(str(path)) as source:
+                table = pa.ipc.open_file(source).read_all()
+
+            age = time.time() - float(table.schema.metadata[_CREATED_AT])
+        except (OSError, pa.ArrowInvalid, KeyError, TypeError, ValueError):
+            self._remove(path)
+            return None
+
+        if ttl and age > ttl:
+            self._remove(path)
+            return None
+
+        # keep track of the last time we used the file
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+        entry = CachedResult(
+            table.column_names, [column.to_pylist() for column in table.columns]
+        )
+        entry.created_at -= age
+        return entry
+
+    def put(self, url, key, entry, max_bytes=0):
+        """
+        Writes an entry and removes the least recently used files if the directory
+        uses more than ``max_bytes`` (0 means no limit). Returns False if the entry
+        cannot be converted to Arrow
+        """
+        try:
+            table = pa.Table.from_arrays(
+                [pa.array(values) for values in entry.columns], names=entry.keys
+            )
+        except (pa.ArrowException, TypeError, ValueError):
+            return False
+
+        table = table.replace_schema_metadata({_CREATED_AT: str(time.time())})
+
+        self.path.mkdir(parents=True, exist_ok=True)
+        path = self._file(url, key)
+
+        # write to a temporary file first so other processes never read a
+        # partially written file
+        fd, tmp = tempfile.mkstemp(dir=self.path, suffix=".tmp")
+        os.close(fd)
+
+        try:
+            with pa.OSFile(tmp, "wb") as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+
+            os.replace(tmp, path)
+        except OSError:
+            self._remove(Path(tmp))
+            return False
+
+        if max_bytes:
+            self._evict(max_bytes)
+
+        return True
+
+    def _evict(self, max_bytes):
+        files = []
+
+        for path in self._files():
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+
+            files.append((stat.st_mtime, stat.st_size, path))
+
+        files.sort()
+        total = sum(size for _, size, _ in files)
+
+        for _, size, path in files:
+            if total <= max_bytes:
+                break
+
+            self._remove(path)
+            total -= size
+
+    def _remove(self, path):
+        try:
+            path.unlink()
+        except OSError:
+            pass
+
+    def invalidate(self, url):
+        """Removes the entries for the database with the given url"""
+        for path in self.path.glob(f"{self._prefix(url)}-*.arrow"):
+            self._remove(path)
+
+    def clear(self):
+        """Removes all entries, returns the number of removed entries"""
+        files = self._files()
+
+        for path in files:
+            self._remove(path)
+
+        return len(files)
+
+    @property
+    def nbytes(self):
+        return sum(path.stat().st_size for path in self._files())
+
+    def __len__(self):
+        return len(self._files())
+
+
+def get_disk_cache(config):
+    """Returns the DiskCache if it's enabled in the configuration, None otherwise"""
+    if pa is None or not get_config_option(config, "query_cache_disk", bool, False):
+        return None
+
+    return DiskCache(
+        get_config_option(config, "query_cache_dir", str, DEFAULT_DISK_CACHE_DIR)
+    )
+
+
+def get_cached(conn, key, config):
+    """
+    Returns the cached result for the key, looking up the in-memory cache first
+    and then the disk cache (if enabled). Returns None if there is no result
+    """
+    ttl = get_config_option(config, "query_cache_ttl", int, 0)
+    entry = query_cache.get(key, ttl=ttl)
+
+    if entry is not None:
+        return entry
+
+    disk_cache = get_disk_cache(config)
+    url = disk_cache_url(conn)
+
+    if disk_cache is None or url is None:
+        return None
+
+    entry = disk_cache.get(url, key, ttl=ttl)
+
+    if entry is not None:
+        max_bytes = get_config_option(config, "query_cache_max_bytes", int, 0)
+        query_cache.put(key, entry, max_bytes=max_bytes)
+
+    return entry
+
+
+def put_cached(conn, key, entry, config):
+    """Stores the result in the in-memory cache and the disk cache (if enabled)"""
+    max_bytes = get_config_option(config, "query_cache_max_bytes", int, 0)
+    query_cache.put(key, entry, max_bytes=max_bytes)
+
+    disk_cache = get_disk_cache(config)
+    url = disk_cache_url(conn)
+
+    if disk_cache is not None and url is not None:
+        disk_cache.put(
+            url,
+            key,
+            entry,
+            max_bytes=get_config_option(config, "query_cache_disk_max_bytes", int, 0),
+        )
+
+
+def invalidate_cached(conn, config):
+    """Removes the cached results for the connection"""
+    query_cache.invalidate(conn.alias)
+
+    disk_cache = get_disk_cache(config)
+    url = disk_cache_url(conn)
+
+    if disk_cache is not None and url is not None:
+        disk_cache.invalidate(url)
+
+
+def _cursor_keys(cursor):
+    if hasattr(cursor, "keys"):
+        return list(cursor.keys())
+
+    return [column[0] for column in cursor.description]
+
+
+def execute_cached(conn, query, with_=None):
+    """
+    Same as ``conn.execute(query, with_)`` but, if ``SqlMagic.query_cache`` is
+    enabled, the rows are read from (and stored in) the query cache. Used by the
+    plotting functions
+    """
+    try:
+        config = _current._get_sql_magic()
+    except RuntimeError:
+        config = None
+
+    if (
+        config is None
+        or not get_config_option(config, "query_cache", bool, False)
+        or "spark" in str(conn.dialect)
+    ):
+        return conn.execute(query, with_)
+
+    query = conn._prepare_query(query, with_)
+    key = make_key(query, None, conn.alias) if is_cacheable(query) else None
+
+    # like conn.execute, wait for the queries running in a worker thread on this
+    # connection (e.g., %%sql --async)
+    if key is None:
+        with conn._running():
+            return conn.raw_execute(query)
+
+    entry = get_cached(conn, key, config)
+
+    if entry is None:
+        with conn._running():
+            cursor = conn.raw_execute(query)
+            keys = _cursor_keys(cursor)
+            rows = cursor.fetchall()
+
+        columns = [list(values) for values in zip(*rows)] or [[] for _ in keys]
+        entry = CachedResult(keys, columns)
+        put_cached(conn, key, entry, config)
+
+    return entry.cursor()
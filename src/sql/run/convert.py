@@ -0,0 +1,213 @@
+"""
+Conversion of ResultSet objects into data frames. Each converter handles a specific
+kind of result (e.g., Spark data frames, Arrow record batches, native DuckDB
+connections); the first one that can handle the result performs the conversion
+"""
+
+from sql.run.arrow import ArrowBuffer
+from sql.run.buffer import ColumnarBuffer
+
+
+class DataFrameConverter:
+    """Base class for converters, subclasses must implement ``can_convert``
+    and ``convert``"""
+
+    def can_convert(self, result_set):
+        """Returns True if this converter can handle the result set"""
+        raise NotImplementedError
+
+    def convert(self, result_set, converter_name, constructor, constructor_kwargs):
+        """
+        Returns a data frame built from the result set
+
+        Parameters
+        ----------
+        result_set : sql.run.resultset.ResultSet
+            The result set to convert
+
+        converter_name : str
+            "df" for pandas, "pl" for polars
+
+        constructor : callable
+            Data frame constructor (pandas.DataFrame or polars.DataFrame)
+
+        constructor_kwargs : dict
+            Keyword arguments to pass to the constructor
+        """
+        raise NotImplementedError
+
+
+class SparkConverter(DataFrameConverter):
+    """Converts results from Spark connections"""
+
+    def can_convert(self, result_set):
+        # use the attribute, accessing the property might re-open the cursor
+        return hasattr(result_set._sqlaproxy, "dataframe")
+
+    def convert(self, result_set, converter_name, constructor, constructor_kwargs):
+        return result_set.sqlaproxy.dataframe.toPandas()
+
+
+class ArrowConverter(DataFrameConverter):
+    """
+    Converts results that were read from the cursor as Arrow record batches. The
+    rows fetched for the preview are kept as record batches so we only need to
+    read the remaining ones
+    """
+
+    def can_convert(self, result_set):
+        return isinstance(result_set._results, ArrowBuffer)
+
+    def convert(self, result_set, converter_name, constructor, constructor_kwargs):
+        result_set.fetchall()
+        table = result_set._results.to_table()
+
+        if converter_name == "df":
+            return table.to_pandas()
+
+        import polars as pl
+
+        return pl.from_arrow(table)
+
+
+class NativeDuckDBConverter(DataFrameConverter):
+    """Converts results using the .df() and .pl() methods from native DuckDB
+    connections"""
+
+    def _native_connection(self, result_set):
+        if result_set._conn.is_dbapi_connection:
+            return result_set.sqlaproxy
+        else:
+            return result_set._conn._connection.connection
+
+    def can_convert(self, result_set):
+        # the native connection doesn't have the cached (or rebound) rows
+        if result_set._from_cache or result_set._rebound:
+            return False
+
+        native_connection = self._native_connection(result_set)
+        return hasattr(native_connection, "df") and hasattr(native_connection, "pl")
+
+    def convert(self, result_set, converter_name, constructor, constructor_kwargs):
+        # all rows are in memory, no need to use the cursor (accessing it might
+        # re-execute the statement if the result set is outdated)
+        if _statement_is_select(result_set._statement) and result_set._done_fetching():
+            return RowsConverter().convert(
+                result_set, converter_name, constructor, constructor_kwargs
+            )
+
+        # accessing the property re-opens the cursor if it's outdated
+        result_set.sqlaproxy
+        native_connection = self._native_connection(result_set)
+
+        # we only re-execute select statements, otherwise we might end up
+        # re-executing INSERT INTO or CREATE TABLE statements.
+        if not _statement_is_select(result_set._statement):
+            return getattr(native_connection, converter_name)()
+
+        # no rows have been fetched, so the native method returns all of them
+        if not len(result_set._results) and not result_set._done_fetching():
+            return getattr(native_connection, converter_name)()
+
+        # if we fetched some rows already, .df() will only return part of the
+        # results, so we stitch the fetched rows with the remaining ones
+        if not result_set._closed:
+            return RowsConverter().convert(
+                result_set, converter_name, constructor, constructor_kwargs
+            )
+
+        # the cursor is no longer usable, so we need to re-execute the statement
+        result_set._reexecutions += 1
+
+        # If command includes PIVOT, current transaction must be closed.
+        # Otherwise, re-executing the statement will return
+        # TransactionContext Error: cannot start a transaction within a transaction
+        if "pivot" in result_set._statement.lower():
+            # fetchall retrieves the previous results and completes the transaction
+            # nothing is done with the results from fetchall()
+            native_connection.fetchall()
+
+        native_connection.execute(result_set._statement)
+
+        return getattr(native_connection, converter_name)()
+
+
+class RowsConverter(DataFrameConverter):
+    """Converts any result by fetching the remaining rows from the cursor"""
+
+    def can_convert(self, result_set):
+        return True
+
+    def convert(self, result_set, converter_name, constructor, constructor_kwargs):
+        result_set.fetchall()
+
+        # if the rows are stored by column, build the frame from the columns so we
+        # don't create one object per row
+        if isinstance(result_set._results, ColumnarBuffer):
+            columns = result_set._results.columns()
+
+            if converter_name == "df":
+                frame = constructor(dict(enumerate(columns)), **constructor_kwargs)
+                frame.columns = result_set.keys
+            else:
+                constructor_kwargs["orient"] = "col"
+                frame = constructor(columns, **constructor_kwargs)
+
+            return frame
+
+        if converter_name == "df":
+            constructor_kwargs["columns"] = result_set.keys
+
+        frame = constructor(
+            (tuple(row) for row in result_set),
+            **constructor_kwargs,
+        )
+
+        return frame
+
+
+_converters = [
+    SparkConverter(),
+    ArrowConverter(),
+    NativeDuckDBConverter(),
+    RowsConverter(),
+]
+
+
+def register_converter(converter):
+    """
+    Registers a converter, it takes precedence over the ones already registered
+
+    Parameters
+    ----------
+    converter : DataFrameConverter
+        The converter to register
+    """
+    _converters.insert(0, converter)
+
+
+def convert_to_data_frame(
+    result_set, converter_name, constructor, constructor_kwargs=None
+):
+    """
+    Convert the result set to a data frame using the first registered converter
+    that can handle it
+    """
+    constructor_kwargs = constructor_kwargs or {}
+
+    for converter in _converters:
+        if converter.can_convert(result_set):
+            return converter.convert(
+                result_set, converter_name, constructor, constructor_kwargs
+            )
+
+
+def _statement_is_select(statement):
+    statement_ = statement.lower().strip()
+    # duckdb also allows FROM without SELECT
+    return (
+        statement_.startswith("select")
+        or statement_.startswith("from")
+        or statement_.startswith("with")
+        or statement_.startswith("pivot")
+    )
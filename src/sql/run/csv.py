@@ -1,7 +1,5 @@
 import os.path
-import codecs
 import csv
-from io import StringIO
 
 
 class CSVWriter:
@@ -11,26 +9,17 @@ class CSVWriter:
     """
 
     def __init__(self, f, dialect=csv.excel, encoding="utf-8", **kwds):
-        # Redirect output to a queue
-        self.queue = StringIO()
-        self.writer = csv.writer(self.queue, dialect=dialect, **kwds)
+        # "f" is a text stream opened with the given encoding, so we can write to
+        # it directly
+        self.writer = csv.writer(f, dialect=dialect, **kwds)
         self.stream = f
-        self.encoder = codecs.getincrementalencoder(encoding)()
+        self.encoding = encoding
 
     def writerow(self, row):
-        _row = row
-        self.writer.writerow(_row)
-        # Fetch UTF-8 output from the queue ...
-        data = self.queue.getvalue()
-        # write to the target stream
-        self.stream.write(data)
-        # empty queue
-        self.queue.truncate(0)
-        self.queue.seek(0)
+        self.writer.writerow(row)
 
     def writerows(self, rows):
-        for row in rows:
-            self.writerow(row)
+        self.writer.writerows(rows)
 
 
 class CSVResultDescriptor:
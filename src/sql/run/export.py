@@ -0,0 +1,224 @@
+"""
+Export results to disk. Rows are read from the cursor in batches and written as they
+arrive, so the whole result is never kept in memory
+"""
+
+import gzip
+import io
+import json
+from pathlib import Path
+
+from sql import exceptions
+from sql.run.csv import CSVWriter
+from sql._lazy import lazy_import
+
+try:
+    import zstandard
+except ModuleNotFoundError:
+    zstandard = None
+
+pa = lazy_import("pyarrow")
+pq = lazy_import("pyarrow.parquet")
+
+
+# size of the write buffer, writing to disk in large chunks is much faster than
+# writing each row
+BUFFER_SIZE = 1024 * 1024
+
+# number of rows to fetch from the cursor at once
+BATCH_SIZE = 10_000
+
+_COMPRESSION_BY_EXTENSION = {".gz": "gzip", ".zst": "zstd"}
+
+_FORMAT_BY_EXTENSION = {
+    ".csv": "csv",
+    ".parquet": "parquet",
+    ".ndjson": "ndjson",
+    ".jsonl": "ndjson",
+}
+
+
+def infer_compression(path, compression="infer"):
+    """
+    Returns the compression to use ("gzip", "zstd", or None). If ``compression``
+    is "infer", it's inferred from the file extension
+    """
+    if compression == "infer":
+        return _COMPRESSION_BY_EXTENSION.get(Path(path).suffix.lower())
+
+    if compression not in (None, "gzip", "zstd"):
+        raise exceptions.ValueError(
+            f"Invalid compression: {compression!r}. "
+            "Valid options are: 'infer', 'gzip', 'zstd', None"
+        )
+
+    return compression
+
+
+def infer_format(path):
+    """Returns the export format ("csv", "parquet", or "ndjson") from the path"""
+    suffixes = [suffix.lower() for suffix in Path(path).suffixes]
+
+    if suffixes and suffixes[-1] in _COMPRESSION_BY_EXTENSION:
+        suffixes = suffixes[:-1]
+
+    format_ = _FORMAT_BY_EXTENSION.get(suffixes[-1]) if suffixes else None
+
+    if format_ is None:
+        valid = ", ".join(_FORMAT_BY_EXTENSION)
+        raise exceptions.ValueError(
+            f"Cannot infer the export format from {str(path)!r}. "
+            f"The file extension must be one of: {valid} "
+            "(optionally followed by .gz or .zst)"
+        )
+
+    return format_
+
+
+def open_text(path, compression="infer", encoding="utf-8"):
+    """Opens a buffered text file for writing, compressing it if needed"""
+    compression = infer_compression(path, compression)
+
+    if compression is None:
+        return open(path, "w", newline="", encoding=encoding, buffering=BUFFER_SIZE)
+
+    if compression == "gzip":
+        binary = gzip.open(path, "wb")
+    else:
+        if zstandard is None:
+            raise exceptions.MissingPackageError(
+                "zstd compression requires zstandard: pip install zstandard"
+            )
+
+        binary = zstandard.open(path, "wb")
+
+    return io.TextIOWrapper(
+        io.BufferedWriter(binary, buffer_size=BUFFER_SIZE),
+        encoding=encoding,
+        newline="",
+    )
+
+
+def write_csv(
+    result_set, path, compression="infer", batch_size=BATCH_SIZE, **format_params
+):
+    """
+    Writes the result set to a CSV file, returns the number of rows written. Any
+    other parameters are passed to csv.writer
+    """
+    encoding = format_params.get("encoding", "utf-8")
+    n_rows = 0
+
+    with open_text(path, compression, encoding=encoding) as f:
+        writer = CSVWriter(f, **format_params)
+        writer.writerow(result_set.field_names)
+
+        for batch in result_set.iter_batches(batch_size):
+            writer.writerows(batch)
+            n_rows += len(batch)
+
+    return n_rows
+
+
+def write_ndjson(result_set, path, compression="infer", batch_size=BATCH_SIZE):
+    """
+    Writes the result set to a newline-delimited JSON file (one object per row),
+    returns the number of rows written. Values that aren't JSON serializable
+    (e.g., dates) are converted to strings
+    """
+    keys = result_set.field_names
+    n_rows = 0
+
+    with open_text(path, compression) as f:
+        for batch in result_set.iter_batches(batch_size):
+            f.write(
+                "".join(
+                    json.dumps(dict(zip(keys, row)), default=str) + "\n"
+                    for row in batch
+                )
+            )
+            n_rows += len(batch)
+
+    return n_rows
+
+
+def write_parquet(result_set, path, compression="snappy", batch_size=BATCH_SIZE):
+    """
+    Writes the result set to a Parquet file, returns the number of rows written.
+    ``compression`` is passed to pyarrow.parquet.ParquetWriter
+    """
+    if pq is None:
+        raise exceptions.MissingPackageError(
+            "Exporting to Parquet requires pyarrow: pip install pyarrow"
+        )
+
+    field_names = result_set.field_names
+    writer = None
+    n_rows = 0
+
+    try:
+        for batch in result_set.iter_arrow(batch_size):
+            table = pa.Table.from_batches([batch]).rename_columns(field_names)
+
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema, compression=compression)
+            elif table.schema != writer.schema:
+                table = _cast(table, writer.schema, n_rows)
+
+            writer.write_table(table)
+            n_rows += table.num_rows
+
+        # no rows, write a file with the columns
+        if writer is None:
+            table = pa.table({name: pa.array([]) for name in field_names})
+            pq.write_table(table, path, compression=compression)
+    finally:
+        if writer is not None:
+            writer.close()
+
+    return n_rows
+
+
+def _cast(table, schema, n_rows):
+    """
+    Casts a table to the schema of the Parquet file, raises an error if a column
+    has values of a different type than the rows already written (e.g., a column
+    that only had NULLs in the first rows)
+    """
+    try:
+        return table.cast(schema)
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError) as e:
+        changed = [
+            field.name
+            for field, expected in zip(table.schema, schema)
+            if field.type != expected.type
+        ]
+        raise exceptions.ValueError(
+            "Cannot export to Parquet: the type of column(s) "
+            f"{', '.join(map(repr, changed))} changed after {n_rows} rows "
+            f"({e}). Cast the column(s) in the query (e.g., CAST(x AS INTEGER))"
+        ) from e
+
+
+_WRITERS = {
+    "csv": write_csv,
+    "ndjson": write_ndjson,
+    "parquet": write_parquet,
+}
+
+
+def export(result_set, path, batch_size=BATCH_SIZE):
+    """
+    Writes the result set to ``path``, the format and compression are inferred
+    from the extension (e.g., .csv, .csv.gz, .parquet, .ndjson.zst). Returns the
+    number of rows written
+    """
+    format_ = infer_format(path)
+
+    if format_ == "parquet" and infer_compression(path) is not None:
+        raise exceptions.ValueError(
+            "Parquet files are compressed internally, remove the .gz or .zst "
+            f"extension from {str(path)!r}"
+        )
+
+    return _WRITERS[format_](result_set, path, batch_size=batch_size)
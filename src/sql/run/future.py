@@ -0,0 +1,245 @@
+"""
+Asynchronous execution of queries (%%sql --async). The statements run in a worker
+thread (using a separate connection if the database supports it) and the magic
+returns a QueryFuture right away, so the kernel isn't blocked while the query runs
+"""
+
+import threading
+import time
+
+from IPython.display import display
+
+from sql import exceptions
+from sql.display import Message
+from sql.error_handler import handle_exception
+from sql.cell import as_parsed_cell
+from sql.run.resultset import _result_sets
+from sql.run.run import run_statements
+
+# seconds between updates of the displayed status while the query runs
+STATUS_REFRESH_INTERVAL = 1
+
+
+class QueryFuture:
+    """Results of a query that runs in a worker thread
+
+    Parameters
+    ----------
+    conn : sql.connection.AbstractConnection
+        The connection to use (queries run on a connection returned by its
+        ``_worker_connection`` method)
+
+    sql : str or sql.cell.ParsedCell
+        SQL code to run
+
+    config
+        Configuration object
+
+    parameters : dict, default None
+        Parameters to use in the query (see ``run_statements``)
+
+    export_to : str, default None
+        If passed, the results are written to this path (see ``run_statements``)
+
+    use_cache : bool, default True
+        If False, don't use the query cache
+
+    timeout : int, default None
+        Cancel the statements that take longer than this many seconds (see
+        ``run_statements``)
+    """
+
+    def __init__(
+        self,
+        conn,
+        sql,
+        config,
+        parameters=None,
+        export_to=None,
+        use_cache=True,
+        timeout=None,
+    ):
+        self._conn = conn
+        self._cell = as_parsed_cell(sql)
+        self._config = config
+        self._parameters = parameters
+        self._export_to = export_to
+        self._use_cache = use_cache
+        self._timeout = timeout
+        self._result = None
+        self._exception = None
+        self._started_at = None
+        self._finished_at = None
+        self._handles = []
+        self._done = threading.Event()
+        # get the connection from the main thread, so errors are raised right away
+        self._worker = conn._worker_connection()
+        self._thread = threading.Thread(
+            target=self._run, name="jupysql-async", daemon=True
+        )
+
+    def start(self):
+        """Starts running the query, returns the QueryFuture"""
+        self._started_at = time.monotonic()
+        self._thread.start()
+        return self
+
+    def _run(self):
+        worker = self._worker
+
+        try:
+            with worker._async_lock:
+                result = run_statements(
+                    worker,
+                    self._cell,
+                    self._config,
+                    parameters=self._parameters,
+                    export_to=self._export_to,
+                    use_cache=self._use_cache,
+                    timeout=self._timeout,
+                )
+
+                for result_set in _result_sets(result):
+                    _fetch_results(result_set, self._config)
+                    # all rows are fetched, so the worker connection is no longer
+                    # needed
+                    result_set._rebind_fetched(self._conn)
+
+            self._result = result
+        except Exception as e:
+            self._exception = e
+        finally:
+            self._conn._release_worker_connection(worker)
+            self._finished_at = time.monotonic()
+            self._done.set()
+            self._update_display()
+
+    @property
+    def status(self):
+        """One of "pending", "running", "done" or "failed" """
+        if self._started_at is None:
+            return "pending"
+        elif not self._done.is_set():
+            return "running"
+        elif self._exception is not None:
+            return "failed"
+        else:
+            return "done"
+
+    @property
+    def elapsed(self):
+        """Seconds since the query started (until it finished)"""
+        if self._started_at is None:
+            return 0.0
+
+        finished_at = self._finished_at or time.monotonic()
+        return finished_at - self._started_at
+
+    def running(self):
+        """Returns True if the query is running"""
+        return self.status == "running"
+
+    def done(self):
+        """Returns True if the query finished (successfully or not)"""
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        """
+        Waits until the query finishes, or until timeout seconds passed. Returns
+        True if the query finished
+        """
+        return self._done.wait(timeout)
+
+    def exception(self, timeout=None):
+        """
+        Waits until the query finishes and returns the exception it raised (None if
+        it finished successfully)
+        """
+        self._wait_or_raise(timeout)
+        return self._exception
+
+    def result(self, timeout=None):
+        """
+        Waits until the query finishes and returns the results (the same value that
+        %sql returns, e.g., a ResultSet), raises the exception if the query failed
+        """
+        self._wait_or_raise(timeout)
+
+        if self._exception is not None:
+            handle_exception(self._exception, self._cell.sql, self._config.short_errors)
+
+        return self._result
+
+    def _wait_or_raise(self, timeout):
+        if self._started_at is None:
+            raise exceptions.RuntimeError(
+                "The query hasn't started, call .start() first"
+            )
+
+        if not self._done.wait(timeout):
+            raise TimeoutError(
+                f"The query didn't finish after {timeout} seconds, "
+                "call .result() again to keep waiting"
+            )
+
+    def _message(self):
+        status = self.status
+
+        if status == "running":
+            return Message(
+                f"Running query in the background ({self.elapsed:.0f}s), "
+                "call .result() to wait for the results"
+            )
+        elif status == "done":
+            return Message(
+                f"Query finished in {self.elapsed:.2f}s, "
+                "call .result() to get the results",
+                style="color: green",
+            )
+        elif status == "failed":
+            return Message(
+                f"Query failed after {self.elapsed:.2f}s: {self._exception}",
+                style="color: red",
+            )
+        else:
+            return Message("Query hasn't started")
+
+    def _ipython_display_(self):
+        handle = display(self._message(), display_id=True)
+
+        # display returns None outside IPython
+        if handle is None:
+            return
+
+        self._handles.append(handle)
+
+        if len(self._handles) == 1 and not self.done():
+            threading.Thread(
+                target=self._refresh_display, name="jupysql-async-status", daemon=True
+            ).start()
+
+    def _refresh_display(self):
+        while not self._done.wait(STATUS_REFRESH_INTERVAL):
+            self._update_display()
+
+    def _update_display(self):
+        message = self._message()
+
+        for handle in self._handles:
+            handle.update(message)
+
+    def __repr__(self):
+        return f"<{type(self).__name__} {self.status}: {self._cell.sql.strip()!r}>"
+
+
+def _fetch_results(result_set, config):
+    """Fetches the rows of a ResultSet (up to autolimit, if set)"""
+    if config.autolimit:
+        missing = config.autolimit - len(result_set._results)
+
+        if missing > 0:
+            result_set.fetchmany(missing)
+
+        result_set.mark_fetching_as_done()
+    else:
+        result_set.fetchall()
@@ -0,0 +1,86 @@
+"""
+Hash index to look up ResultSet rows by the value of a column
+"""
+
+from collections.abc import Mapping
+
+
+class ColumnIndex(Mapping):
+    """Maps the values of a column to the rows that contain them. The index is
+    built the first time it's used and only rows fetched since then are added to it
+
+    Parameters
+    ----------
+    result_set : sql.run.resultset.ResultSet
+        The result set to index, all its rows are fetched before using the index
+
+    position : int
+        Position of the indexed column
+    """
+
+    def __init__(self, result_set, position):
+        self._result_set = result_set
+        self._position = position
+        self._positions = {}
+        self._n_indexed = 0
+
+    def _refresh(self):
+        self._result_set.fetchall()
+        results = self._result_set._results
+
+        # the buffer was cleared, start over
+        if len(results) < self._n_indexed:
+            self._positions = {}
+            self._n_indexed = 0
+
+        if len(results) == self._n_indexed:
+            return
+
+        values = results.column(self._position)[self._n_indexed :]
+
+        for row_number, value in enumerate(values, start=self._n_indexed):
+            try:
+                self._positions.setdefault(value, []).append(row_number)
+            # unhashable values (e.g., lists) cannot be looked up
+            except TypeError:
+                pass
+
+        self._n_indexed = len(results)
+
+    def rows(self, value):
+        """Returns a list with all the rows where the column equals ``value``"""
+        self._refresh()
+        results = self._result_set._results
+
+        try:
+            row_numbers = self._positions.get(value, [])
+        except TypeError:
+            row_numbers = []
+
+        return [results[row_number] for row_number in row_numbers]
+
+    def __getitem__(self, value):
+        """Returns the only row where the column equals ``value``"""
+        self._refresh()
+
+        try:
+            row_numbers = self._positions[value]
+        except TypeError:
+            raise KeyError(value) from None
+
+        if len(row_numbers) > 1:
+            raise KeyError('%d results for "%s"' % (len(row_numbers), value))
+
+        return self._result_set._results[row_numbers[0]]
+
+    def __iter__(self):
+        self._refresh()
+        return iter(self._positions)
+
+    def __len__(self):
+        self._refresh()
+        return len(self._positions)
+
+    def __repr__(self):
+        column = self._result_set.keys[self._position]
+        return f"{type(self).__name__}({column!r})"
@@ -0,0 +1,281 @@
+"""
+Parallel execution of the statements in a cell (%%sql --parallel N). The tables each
+statement reads and writes are extracted with sqlglot to build a dependency graph,
+statements that don't depend on each other run concurrently, each one on a separate
+connection (see ``AbstractConnection._worker_connection``)
+"""
+
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from sql.cell import as_parsed_cell
+from sql.display import Table
+from sql.run.run import run_statements
+from sql.run.resultset import _statement_preview
+from sql._lazy import lazy_import
+
+sqlglot = lazy_import("sqlglot")
+
+# statements that modify the table in their "this" argument (or all the tables they
+# reference, e.g., DROP TABLE)
+_WRITE_KEYS = {
+    "alter",
+    "altertable",
+    "copy",
+    "create",
+    "delete",
+    "drop",
+    "insert",
+    "merge",
+    "truncatetable",
+    "update",
+}
+
+
+class StatementTimings(Table):
+    """Times of the statements run with %%sql --parallel
+
+    Attributes
+    ----------
+    timings : list of dict
+        One dictionary per statement (in the order they appear in the cell) with
+        the statement, the seconds it started after the first one ("started"), and
+        the seconds it took to run ("elapsed")
+
+    elapsed : float
+        Seconds it took to run all the statements
+    """
+
+    TITLE = "Statement timings:"
+
+    def __init__(self, statements, timings, elapsed):
+        self.timings = [
+            {"statement": statement, "started": started, "elapsed": elapsed_}
+            for statement, (started, elapsed_) in zip(statements, timings)
+        ]
+        self.elapsed = elapsed
+
+        rows = [
+            [
+                number,
+                _statement_preview(timing["statement"]),
+                f"{timing['started']:.3f}",
+                f"{timing['elapsed']:.3f}",
+            ]
+            for number, timing in enumerate(self.timings, start=1)
+        ]
+        super().__init__(["#", "statement", "started (s)", "elapsed (s)"], rows)
+
+
+def find_tables(statement, dialect=None):
+    """
+    Returns the names of the tables that a statement writes and reads (lowercase,
+    without the schema), or None if it's not possible to know them (e.g., the
+    statement can't be parsed, or it changes the session like SET or USE)
+
+    Parameters
+    ----------
+    statement : str
+        SQL statement
+
+    dialect : str, default None
+        sqlglot dialect to parse the statement
+    """
+    expression = _parse(statement, dialect)
+    return None if expression is None else _find_tables(expression)
+
+
+def _parse(statement, dialect):
+    try:
+        return sqlglot.parse_one(statement, read=dialect)
+    except Exception:
+        return None
+
+
+def _table_names(expression):
+    names = {table.name.lower() for table in expression.find_all(sqlglot.exp.Table)}
+    names.discard("")
+    return names
+
+
+def _find_tables(expression):
+    tables = _table_names(expression)
+
+    if expression.key in _WRITE_KEYS:
+        target = expression.this
+
+        # e.g., CREATE TABLE t (x INT) has a schema with the table
+        if target is not None and not isinstance(target, sqlglot.exp.Table):
+            target = target.find(sqlglot.exp.Table)
+
+        written = {target.name.lower()} if target is not None else set(tables)
+        return written, tables
+
+    exp = sqlglot.exp
+
+    if isinstance(expression, (exp.Select, exp.Union, exp.Intersect, exp.Except)):
+        # SELECT ... INTO creates a table
+        into = expression.args.get("into")
+        written = _table_names(into) if into is not None else set()
+        return written, tables
+
+    return None
+
+
+def _creates_view(expression):
+    return (
+        expression.key == "create"
+        and str(expression.args.get("kind")).upper() == "VIEW"
+    )
+
+
+def find_dependencies(statements, dialect=None):
+    """
+    Returns a list with the indexes of the statements each statement depends on. A
+    statement depends on a previous one if either of them writes a table the other
+    one reads or writes. Statements whose tables can't be known (see find_tables)
+    depend on all the previous ones, and all the following ones depend on them
+
+    Parameters
+    ----------
+    statements : list of str
+        SQL statements, in the order they appear in the cell
+
+    dialect : str, default None
+        sqlglot dialect to parse the statements
+    """
+    dependencies = []
+    tables = []
+    # tables read by the views created in the cell, since reading a view reads them
+    view_reads = {}
+
+    for statement in statements:
+        expression = _parse(statement, dialect)
+        found = None if expression is None else _find_tables(expression)
+
+        if found is not None:
+            written, read = found
+            read = read.union(*(view_reads.get(name, set()) for name in read))
+
+            if _creates_view(expression):
+                for name in written:
+                    view_reads[name] = read - written
+
+        depends_on = set()
+
+        for previous, previous_tables in enumerate(tables):
+            if found is None or previous_tables is None:
+                depends_on.add(previous)
+                continue
+
+            previous_written, previous_read = previous_tables
+
+            if previous_written & (written | read) or previous_read & written:
+                depends_on.add(previous)
+
+        dependencies.append(sorted(depends_on))
+        tables.append(None if found is None else (written, read))
+
+    return dependencies
+
+
+def run_statements_parallel(
+    conn,
+    sql,
+    config,
+    max_workers,
+    parameters=None,
+    use_cache=True,
+    timeout=None,
+):
+    """
+    Runs the statements in a cell, the ones that don't depend on each other (see
+    find_dependencies) run concurrently on up to max_workers connections. Returns
+    a StatementTimings object. If a statement fails, no more statements are started
+    and the exception is raised once the running ones finish
+
+    Parameters
+    ----------
+    conn : sql.connection.AbstractConnection
+        The connection to use
+
+    sql : str or sql.cell.ParsedCell
+        SQL code to run
+
+    config
+        Configuration object
+
+    max_workers : int
+        Maximum number of statements to run at the same time
+
+    parameters, use_cache, timeout
+        See ``run_statements``
+    """
+    statements = [parsed.sql for parsed in as_parsed_cell(sql).statements]
+    dependencies = find_dependencies(statements, conn.capabilities.sqlglot_dialect)
+    dependents = [[] for _ in statements]
+
+    for index, depends_on in enumerate(dependencies):
+        for previous in depends_on:
+            dependents[previous].append(index)
+
+    pending = {index: set(depends_on) for index, depends_on in enumerate(dependencies)}
+    timings = [None] * len(statements)
+    started_at = time.monotonic()
+
+    def run(index):
+        worker = conn._worker_connection()
+
+        try:
+            # a worker might be this same connection (e.g., in-memory databases), so
+            # statements run one at a time on it
+            with worker._async_lock:
+                start = time.monotonic()
+                run_statements(
+                    worker,
+                    statements[index],
+                    config,
+                    parameters=parameters,
+                    use_cache=use_cache,
+                    timeout=timeout,
+                )
+                return start - started_at, time.monotonic() - start
+        finally:
+            conn._release_worker_connection(worker)
+
+    error = None
+
+    with ThreadPoolExecutor(
+        max_workers=max_workers, thread_name_prefix="jupysql-parallel"
+    ) as executor:
+        running = {}
+
+        def submit_ready():
+            for index in [index for index, waiting in pending.items() if not waiting]:
+                del pending[index]
+                running[executor.submit(run, index)] = index
+
+        submit_ready()
+
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                index = running.pop(future)
+
+                try:
+                    timings[index] = future.result()
+                except Exception as e:
+                    error = error or e
+                    continue
+
+                for dependent in dependents[index]:
+                    pending[dependent].discard(index)
+
+            if error is None:
+                submit_ready()
+
+    if error is not None:
+        raise error
+
+    return StatementTimings(statements, timings, time.monotonic() - started_at)
@@ -0,0 +1,72 @@
+"""
+Background fetching of results. After a ResultSet fetches the rows to display, a
+worker thread keeps fetching the remaining rows so converting the results (e.g.,
+to a data frame) doesn't have to wait for the database
+"""
+
+import threading
+
+
+class BackgroundPrefetch:
+    """Fetches the remaining rows of a ResultSet in a worker thread
+
+    Parameters
+    ----------
+    result_set : sql.run.resultset.ResultSet
+        The result set to fetch rows for
+
+    batch_size : int
+        Number of rows to fetch at once, the worker checks if it should stop
+        after every batch
+
+    max_bytes : int
+        Stop fetching once the fetched rows use this many bytes (approximately),
+        0 means no limit
+    """
+
+    def __init__(self, result_set, batch_size, max_bytes):
+        self._result_set = result_set
+        self._batch_size = batch_size
+        self._max_bytes = max_bytes
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="jupysql-prefetch", daemon=True
+        )
+
+    def start(self):
+        self._thread.start()
+
+    def _reached_memory_limit(self):
+        return bool(self._max_bytes) and (
+            self._result_set._results.nbytes() >= self._max_bytes
+        )
+
+    def _run(self):
+        result_set = self._result_set
+
+        while not (
+            self._stop.is_set()
+            or result_set._done_fetching()
+            or self._reached_memory_limit()
+        ):
+            try:
+                result_set.fetchmany(self._batch_size)
+            # stop prefetching, the error is raised when the rows are fetched from
+            # the main thread
+            except Exception:
+                break
+
+    @property
+    def running(self):
+        return self._thread.is_alive()
+
+    def stop(self):
+        """Stops the worker after it finishes fetching the current batch"""
+        # the worker might trigger this (e.g., if it needs to re-execute the query)
+        if threading.current_thread() is self._thread:
+            return
+
+        self._stop.set()
+
+        if self._thread.is_alive():
+            self._thread.join()
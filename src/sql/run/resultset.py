@@ -1,8 +1,7 @@
-import re
 import operator
 from functools import reduce
 from io import StringIO
-from html import unescape
+from html import escape, unescape
 from collections.abc import Iterable
 
 import prettytable
@@ -10,10 +9,29 @@ import warnings
 
 from sql.column_guesser import ColumnGuesserMixin
 from sql.run.csv import CSVWriter, CSVResultDescriptor
-from sql.run.table import CustomPrettyTable
+from sql.run import export
+from sql.run.table import CustomPrettyTable, render_html_table
+from sql.run.buffer import RowBuffer, ColumnarBuffer
+from sql.run.arrow import ArrowStream, ArrowBuffer, get_native_cursor
+from sql.run.convert import convert_to_data_frame, _statement_is_select
+from sql.run.prefetch import BackgroundPrefetch
+from sql.run.index import ColumnIndex
+from sql.run.spill import SpillBuffer, ArrowSpillBuffer
+from sql.run.cache import CachedCursor
 from sql._current import _config_feedback_all
+from sql.util import get_config_option
 
-from sql.exceptions import RuntimeError
+from sql.exceptions import RuntimeError, ValueError, MissingPackageError
+from sql._lazy import lazy_import
+
+pa = lazy_import("pyarrow")
+
+# maximum number of characters to display when showing a statement
+_STATEMENT_PREVIEW_LENGTH = 60
+
+# maximum number of rows to read to find the types of the columns whose first
+# values are NULL when converting the rows to Arrow
+_ARROW_SCHEMA_SAMPLE_ROWS = 100_000
 
 
 class ResultSet(ColumnGuesserMixin):
@@ -22,25 +40,47 @@ class ResultSet(ColumnGuesserMixin):
     preview based on the current configuration)
     """
 
-    def __init__(self, sqlaproxy, config, statement=None, conn=None):
+    def __init__(
+        self, sqlaproxy, config, statement=None, conn=None, fetch_preview=True
+    ):
         self._closed = False
+        # True if the cursor's connection went back to the pool before fetching all
+        # the rows (see _detach_connection)
+        self._cursor_released = False
+        # True if all the rows were fetched using another connection (see
+        # _rebind_fetched), the cursor is no longer used
+        self._rebound = False
+        self._reexecutions = 0
+        self._streamed = False
+        self._round_trips = 0
+        self._prefetch = None
+        self._indexes = {}
         self._config = config
         self._statement = statement
         self._sqlaproxy = sqlaproxy
+        self._from_cache = isinstance(sqlaproxy, CachedCursor)
         self._conn = conn
-        self._dialect = conn._get_sqlglot_dialect()
+        self._dialect = conn.capabilities.sqlglot_dialect
         self._keys = None
         self._field_names = None
-        self._results = []
         # https://peps.python.org/pep-0249/#description
         self._is_dbapi_results = hasattr(sqlaproxy, "description")
 
         # note that calling this will fetch the keys
-        self._pretty_table = self._init_table()
+        self.field_names
+        # rendered table (html and text), formatted when displaying the results
+        self._render_cache = {}
+        self._set_cursor_arraysize()
+        self._arrow_stream = self._init_arrow_stream()
+        self._results = self._init_buffer()
 
         self._mark_fetching_as_done = False
 
-        if self._config.autolimit == 1:
+        if not fetch_preview and self.keys:
+            # the results will be converted right away (e.g., into a data frame),
+            # not fetching rows allows the converter to read the whole result
+            pass
+        elif self._config.autolimit == 1:
             # if autolimit is 1, we only want to fetch one row
             self.fetchmany(size=1)
             self._done_fetching()
@@ -48,16 +88,50 @@ class ResultSet(ColumnGuesserMixin):
             # in all other cases, 2 allows us to know if there are more rows
             # for example when creating a table, the results contains one row, in
             # such case, fetching 2 rows will tell us that there are no more rows
-            # and can set the _mark_fetching_as_done flag to True
-            self.fetchmany(size=2)
+            # and can set the _mark_fetching_as_done flag to True. Users can
+            # fetch more rows to save round trips when displaying the results
+            self.fetchmany(size=self._prefetch_rows or 2)
 
         self._finished_init = True
 
         if conn:
             conn._result_sets.append(self)
 
+        self._start_prefetch()
+
+    @property
+    def _fetch_batch_size(self):
+        return get_config_option(self._config, "fetch_batch_size", int, 0)
+
+    @property
+    def _prefetch_rows(self):
+        return get_config_option(self._config, "prefetch_rows", int, 0)
+
+    @property
+    def round_trips(self):
+        """
+        Number of times rows were requested from the cursor (or from the Arrow
+        stream)
+        """
+        return self._round_trips
+
+    @property
+    def reexecutions(self):
+        """
+        Number of times the statement had to be executed again to retrieve the
+        results (e.g., because the cursor was outdated or closed)
+        """
+        return self._reexecutions
+
     @property
     def sqlaproxy(self):
+        # the cursor can only be used by one thread at a time
+        self._stop_prefetch()
+
+        # cached (and rebound) results don't depend on the connection's state
+        if self._from_cache or self._rebound:
+            return self._sqlaproxy
+
         conn = self._conn
 
         # mssql with pyodbc does not support multiple open result sets, so we need
@@ -65,8 +139,14 @@ class ResultSet(ColumnGuesserMixin):
         # so we need to check for that and re-open the results if needed
         if conn.dialect == "mssql" and conn.driver == "pyodbc" and self._closed:
             self._conn._result_sets.close_all()
-            self._sqlaproxy = self._conn.raw_execute(self._statement)
-            self._sqlaproxy.fetchmany(size=len(self._results))
+            self._reopen_cursor()
+            self._conn._result_sets.append(self)
+
+        # with connection pooling, the cursor is closed if its connection went
+        # back to the pool before fetching all the rows
+        if self._cursor_released:
+            self._cursor_released = False
+            self._reopen_cursor()
             self._conn._result_sets.append(self)
 
         # there is a problem when using duckdb + sqlalchemy: duckdb-engine doesn't
@@ -86,27 +166,78 @@ class ResultSet(ColumnGuesserMixin):
             and is_duckdb_sqlalchemy
             and not is_last_result
         ):
-            self._sqlaproxy = self._conn.raw_execute(self._statement)
-            self._sqlaproxy.fetchmany(size=len(self._results))
+            self._reopen_cursor()
 
             # ensure we make his result set the last one
             self._conn._result_sets.append(self)
 
         return self._sqlaproxy
 
+    def _reopen_cursor(self):
+        """Re-executes the statement and skips the rows we already fetched"""
+        self._sqlaproxy = self._conn.raw_execute(self._statement)
+        self._reexecutions += 1
+        self._set_cursor_arraysize()
+
+        if self._arrow_stream is not None:
+            self._arrow_stream = ArrowStream.from_cursor(
+                get_native_cursor(self._sqlaproxy),
+                batch_size=self._fetch_batch_size or 2048,
+            )
+            self._arrow_stream.read(len(self._results))
+        else:
+            self._sqlaproxy.fetchmany(size=len(self._results))
+
     def _extend_results(self, elements):
         """Store the DB fetched results into the internal list of results"""
-        to_add = self._config.displaylimit - len(self._results)
         self._results.extend(elements)
-        self._pretty_table.add_rows(
-            elements if self._config.displaylimit == 0 else elements[:to_add]
-        )
+
+    def _extend_results_from_batches(self, batches):
+        """Store the Arrow record batches read from the cursor"""
+        self._results.extend(batches)
 
     def mark_fetching_as_done(self):
         self._mark_fetching_as_done = True
         # NOTE: don't close the connection here (self.sqlaproxy.close()),
         # because we need to keep it open for the next query
 
+        # when streaming, the rows are still being read from the cursor
+        if not self._streamed:
+            self._release_connection()
+
+    def _release_connection(self):
+        """
+        Lets the connection know the results no longer need it, with connection
+        pooling, this returns it to the pool
+        """
+        if self._conn is not None:
+            self._conn._release_results(self)
+
+    def _detach_connection(self):
+        """
+        Returns the pooled connection before fetching all the rows (e.g., when the
+        pool is full). SELECT statements run again if more rows are requested,
+        the rows of other statements are fetched right away since running them
+        again might modify the database
+        """
+        self._stop_prefetch()
+
+        if self._statement is None or not _statement_is_select(self._statement):
+            self.fetchall()
+        else:
+            self._cursor_released = True
+
+        self._release_connection()
+
+    def _rebind_fetched(self, conn):
+        """
+        Binds results whose rows were all fetched using another connection (e.g.,
+        a worker thread with %%sql --async) to conn. The statement never runs
+        again on conn, since the rows are already in memory
+        """
+        self._conn = conn
+        self._rebound = True
+
     def _done_fetching(self):
         return self._mark_fetching_as_done
 
@@ -145,8 +276,48 @@ class ResultSet(ColumnGuesserMixin):
 
     def _repr_html_(self):
         self.fetch_for_repr_if_needed()
-        result = self._pretty_table.get_html_string()
-        return self._add_footer(result, html=True)
+        return self._render(html=True)
+
+    def _render(self, *, html):
+        """
+        Formats the rows to display (up to displaylimit) as a table. The output is
+        cached until more rows are fetched or the configuration changes
+        """
+        # rows fetched in the background after the displayed ones don't change the
+        # output
+        n_rows = len(self._results)
+        key = (
+            (
+                min(n_rows, self._config.displaylimit)
+                if self._config.displaylimit
+                else n_rows
+            ),
+            self._done_fetching(),
+            self._config.displaylimit,
+            self._config.style,
+            _config_feedback_all(),
+        )
+        cached = self._render_cache.get(html)
+
+        if cached is not None and cached[0] == key:
+            return cached[1]
+
+        if self._config.displaylimit == 0:
+            rows = self._results
+        else:
+            rows = self._results[: self._config.displaylimit]
+
+        if html:
+            result = render_html_table(self.field_names, rows)
+        else:
+            pretty = self._init_table()
+            pretty.add_rows(rows)
+            # to create clickable links
+            result = unescape(str(pretty))
+
+        result = self._add_footer(result, html=html)
+        self._render_cache[html] = (key, result)
+        return result
 
     def _add_footer(self, result, *, html):
         if _config_feedback_all():
@@ -168,11 +339,6 @@ class ResultSet(ColumnGuesserMixin):
 
             result = f"{result}{data_frame_footer}"
 
-        # to create clickable links
-        result = unescape(result)
-        _cell_with_spaces_pattern = re.compile(r"(<td>)( {2,})")
-        result = _cell_with_spaces_pattern.sub(_nonbreaking_spaces, result)
-
         if self._config.displaylimit != 0 and not self._done_fetching():
             displaylimit_footer = (
                 (
@@ -197,13 +363,11 @@ class ResultSet(ColumnGuesserMixin):
     def __iter__(self):
         self.fetchall()
 
-        for result in self._results:
-            yield result
+        yield from self._results
 
     def __str__(self):
         self.fetch_for_repr_if_needed()
-        result = str(self._pretty_table)
-        return self._add_footer(result, html=False)
+        return self._render(html=False)
 
     def __repr__(self) -> str:
         return str(self)
@@ -219,12 +383,45 @@ class ResultSet(ColumnGuesserMixin):
         try:
             return self._results[key]
         except TypeError:
-            result = [row for row in self if row[0] == key]
-            if not result:
-                raise KeyError(key)
-            if len(result) > 1:
-                raise KeyError('%d results for "%s"' % (len(result), key))
-            return result[0]
+            return self._index(0)[key]
+
+    def _column_values(self):
+        # the buffers can return the columns without iterating over every row
+        self.fetchall()
+        return self._results.columns()
+
+    def _index(self, position):
+        if position not in self._indexes:
+            self._indexes[position] = ColumnIndex(self, position)
+
+        return self._indexes[position]
+
+    def index_by(self, column):
+        """
+        Returns a mapping from the values of ``column`` to the rows that contain
+        them. The index is built once (fetching all rows) and reused in later
+        lookups
+
+        Parameters
+        ----------
+        column : str
+            Column name
+
+        Examples
+        --------
+        >>> by_name = result_set.index_by("name")
+        >>> by_name["some-name"]
+        >>> by_name.rows("some-name")
+        """
+        keys = list(self.keys)
+
+        if column not in keys:
+            raise ValueError(
+                f"Column {column!r} does not exist, "
+                f"available columns: {', '.join(map(str, keys))}"
+            )
+
+        return self._index(keys.index(column))
 
     def __getattr__(self, attr):
         err_msg = (
@@ -238,7 +435,14 @@ class ResultSet(ColumnGuesserMixin):
         """Returns a single dict built from the result set
 
         Keys are column names; values are a tuple"""
-        return dict(zip(self.keys, zip(*self)))
+        self.fetchall()
+
+        if not len(self._results):
+            return {}
+
+        return dict(
+            zip(self.keys, (tuple(values) for values in self._results.columns()))
+        )
 
     def dicts(self):
         "Iterator yielding a dict for each row"
@@ -249,14 +453,159 @@ class ResultSet(ColumnGuesserMixin):
         """Returns a Pandas DataFrame instance built from the result set."""
         import pandas as pd
 
-        return _convert_to_data_frame(self, "df", pd.DataFrame)
+        return convert_to_data_frame(self, "df", pd.DataFrame)
 
     def PolarsDataFrame(self, **polars_dataframe_kwargs):
         """Returns a Polars DataFrame instance built from the result set."""
         import polars as pl
 
         polars_dataframe_kwargs["schema"] = self.keys
-        return _convert_to_data_frame(self, "pl", pl.DataFrame, polars_dataframe_kwargs)
+        return convert_to_data_frame(self, "pl", pl.DataFrame, polars_dataframe_kwargs)
+
+    def iter_batches(self, size=10_000):
+        """
+        Yields lists with at most ``size`` rows. The rows are read from the cursor
+        as needed and they aren't stored in the result set, so this can process
+        results that don't fit in memory. Once the cursor is consumed, the rows are
+        no longer available from the result set
+
+        Parameters
+        ----------
+        size : int, default=10_000
+            Maximum number of rows in each batch
+        """
+        yield from self._iter_arrow_or_rows(size, arrow=False)
+
+    def iter_dataframes(self, size=10_000, library="pandas"):
+        """
+        Yields data frames with at most ``size`` rows, see ``iter_batches``
+
+        Parameters
+        ----------
+        size : int, default=10_000
+            Maximum number of rows in each data frame
+
+        library : str, default="pandas"
+            "pandas" or "polars"
+        """
+        if library == "pandas":
+            import pandas as pd
+
+            def to_frame(rows):
+                return pd.DataFrame.from_records(rows, columns=self.keys)
+
+        elif library == "polars":
+            import polars as pl
+
+            kwargs = get_config_option(
+                self._config, "polars_dataframe_kwargs", dict, {}
+            )
+
+            def to_frame(rows):
+                return pl.DataFrame(
+                    [tuple(row) for row in rows],
+                    schema=list(self.keys),
+                    orient="row",
+                    **kwargs,
+                )
+
+        else:
+            raise ValueError(
+                f"Invalid library: {library!r}. Valid options are: 'pandas', 'polars'"
+            )
+
+        for batch in self.iter_batches(size):
+            yield to_frame(batch)
+
+    def iter_arrow(self, size=10_000):
+        """
+        Yields ``pyarrow.RecordBatch`` objects with at most ``size`` rows, see
+        ``iter_batches``. If the driver supports Arrow, the batches are read
+        directly from the cursor
+
+        Parameters
+        ----------
+        size : int, default=10_000
+            Maximum number of rows in each record batch
+        """
+        if pa is None:
+            raise MissingPackageError(
+                "iter_arrow requires pyarrow: pip install pyarrow"
+            )
+
+        yield from self._iter_arrow_or_rows(size, arrow=True)
+
+    def _iter_arrow_or_rows(self, size, arrow):
+        if not isinstance(size, int) or size < 1:
+            raise ValueError(f"size must be a positive integer, got: {size!r}")
+
+        if self._streamed:
+            raise RuntimeError(
+                "The results have already been consumed by iter_batches, "
+                "iter_dataframes or iter_arrow. Run the query again to fetch them"
+            )
+
+        # spark doesn't support cursor, the rows are already in memory
+        if hasattr(self._sqlaproxy, "dataframe"):
+            self.fetchall()
+
+        if arrow:
+            # all batches have the same schema: the one from the Arrow stream (if
+            # any), or the one inferred from the first non-null values
+            types = (
+                None
+                if self._arrow_stream is None
+                else self._arrow_stream.schema.types
+            )
+            builder = _RecordBatchBuilder(self.keys, types)
+            yield from builder.to_record_batches(self._iter_batches(size, arrow))
+        else:
+            yield from self._iter_batches(size, arrow)
+
+    def _iter_batches(self, size, arrow):
+        """
+        Yields lists of rows, if arrow is True, the rows read from the Arrow
+        stream are yielded as pyarrow.RecordBatch objects
+        """
+        # yield the rows we already fetched (e.g., for the preview)
+        for start in range(0, len(self._results), size):
+            yield self._results[start : start + size]
+
+        if self._done_fetching() or not self.keys:
+            return
+
+        # from this point, we no longer keep the rows
+        self._streamed = True
+        self.mark_fetching_as_done()
+
+        if self._arrow_stream is not None:
+            # accessing the property re-opens the cursor if it's outdated
+            self.sqlaproxy
+            schema = self._arrow_stream.schema
+
+            while True:
+                batches = self._arrow_stream.read(size)
+
+                if not batches:
+                    break
+
+                if arrow:
+                    table = pa.Table.from_batches(batches, schema=schema)
+                    yield table.combine_chunks().to_batches()[0]
+                else:
+                    yield list(self._results._rows(batches))
+        else:
+            cursor = self.sqlaproxy
+
+            while True:
+                rows = cursor.fetchmany(size=size)
+
+                if not rows:
+                    break
+
+                yield list(rows)
+
+        self._release_connection()
 
     def pie(self, key_word_sep=" ", title=None, **kwargs):
         """Generates a pylab pie chart from the result set.
@@ -397,17 +746,72 @@ class ResultSet(ColumnGuesserMixin):
 
         writer = CSVWriter(outfile, **format_params)
         writer.writerow(self.field_names)
-        for row in self:
-            writer.writerow(row)
+        writer.writerows(self)
         if filename:
             outfile.close()
             return CSVResultDescriptor(filename)
         else:
             return outfile.getvalue()
 
+    def to_csv(self, path, compression="infer", batch_size=10_000, **format_params):
+        """
+        Writes the results to a CSV file. Unlike ``csv()``, rows are read from the
+        cursor in batches and written as they arrive, so they're not kept in memory
+        (see ``iter_batches``). Any other parameters are passed to csv.writer.
+        Returns the number of rows written
+
+        Parameters
+        ----------
+        path : str or pathlib.Path
+            Output file
+
+        compression : str, default="infer"
+            "gzip", "zstd" (requires ``zstandard``), or None. If "infer", it's
+            inferred from the extension (.gz or .zst)
+
+        batch_size : int, default=10_000
+            Number of rows to fetch from the cursor at once
+        """
+        return export.write_csv(
+            self, path, compression=compression, batch_size=batch_size, **format_params
+        )
+
+    def to_ndjson(self, path, compression="infer", batch_size=10_000):
+        """
+        Writes the results to a newline-delimited JSON file (one object per row),
+        see ``to_csv``. Returns the number of rows written
+        """
+        return export.write_ndjson(
+            self, path, compression=compression, batch_size=batch_size
+        )
+
+    def to_parquet(self, path, compression="snappy", batch_size=10_000):
+        """
+        Writes the results to a Parquet file (requires ``pyarrow``), see
+        ``to_csv``. ``compression`` is passed to pyarrow.parquet.ParquetWriter.
+        Returns the number of rows written
+        """
+        return export.write_parquet(
+            self, path, compression=compression, batch_size=batch_size
+        )
+
     def fetchmany(self, size):
         """Fetch n results and add it to the results"""
-        if not self._done_fetching():
+        self._stop_prefetch()
+
+        if self._done_fetching():
+            return
+
+        if self._arrow_stream is not None:
+            # accessing the property re-opens the cursor if it's outdated
+            self.sqlaproxy
+            self._round_trips += 1
+            returned = self._arrow_stream.read(size)
+            self._extend_results_from_batches(returned)
+            n_returned = sum(batch.num_rows for batch in returned)
+        else:
+            self._round_trips += 1
+
             try:
                 returned = self.sqlaproxy.fetchmany(size=size)
             # sqlite with sqlalchemy raises sqlalchemy.exc.ResourceClosedError,
@@ -428,36 +832,82 @@ class ResultSet(ColumnGuesserMixin):
                 return
             # spark doesn't support cursor
             if hasattr(self._sqlaproxy, "dataframe"):
-                self._results = []
-                self._pretty_table.clear()
+                self._results.clear()
             self._extend_results(returned)
+            n_returned = len(returned)
 
-            if len(returned) < size:
-                self.mark_fetching_as_done()
+        if n_returned < size:
+            self.mark_fetching_as_done()
 
-            if (
-                self._config.autolimit is not None
-                and self._config.autolimit != 0
-                and len(self._results) >= self._config.autolimit
-            ):
-                self.mark_fetching_as_done()
+        if (
+            self._config.autolimit is not None
+            and self._config.autolimit != 0
+            and len(self._results) >= self._config.autolimit
+        ):
+            self.mark_fetching_as_done()
 
     def fetch_for_repr_if_needed(self):
+        # the remaining rows were consumed by iter_batches, we can only display
+        # the ones we already have
+        if self._streamed:
+            return
+
         if self._config.displaylimit == 0:
             self.fetchall()
 
         missing = self._config.displaylimit - len(self._results)
 
         if missing > 0:
-            self.fetchmany(missing)
+            size = missing
+
+            # fetch at least fetch_batch_size rows (but no more than autolimit) so
+            # we need fewer round trips if the user requests more rows later
+            if self._fetch_batch_size > missing:
+                size = self._fetch_batch_size
+
+                if self._config.autolimit:
+                    size = min(
+                        size, max(self._config.autolimit - len(self._results), missing)
+                    )
+
+            self.fetchmany(size)
+
+        self._start_prefetch()
 
     def fetchall(self):
-        if not self._done_fetching():
+        if self._streamed:
+            raise RuntimeError(
+                "The results have already been consumed by iter_batches, "
+                "iter_dataframes or iter_arrow. Run the query again to fetch them"
+            )
+
+        self._stop_prefetch()
+
+        if self._done_fetching():
+            return
+
+        batch_size = self._fetch_batch_size
+
+        if self._arrow_stream is not None:
+            self.sqlaproxy
+            self._round_trips += 1
+            self._extend_results_from_batches(self._arrow_stream.read_all())
+        # spark doesn't support cursor, every call returns all the rows
+        elif batch_size and not hasattr(self._sqlaproxy, "dataframe"):
+            while True:
+                self._round_trips += 1
+                returned = self.sqlaproxy.fetchmany(size=batch_size)
+                self._extend_results(returned)
+
+                if len(returned) < batch_size:
+                    break
+        else:
             if hasattr(self._sqlaproxy, "dataframe"):
-                self._results = []
-                self._pretty_table.clear()
+                self._results.clear()
+            self._round_trips += 1
             self._extend_results(self.sqlaproxy.fetchall())
-            self.mark_fetching_as_done()
+
+        self.mark_fetching_as_done()
 
     def _init_table(self):
         pretty = CustomPrettyTable(self.field_names)
@@ -468,92 +918,267 @@ class ResultSet(ColumnGuesserMixin):
 
         return pretty
 
+    def _set_cursor_arraysize(self):
+        """
+        Sets the cursor's arraysize (the default number of rows requested per
+        round trip by some drivers) to fetch_batch_size
+        """
+        if not self._fetch_batch_size:
+            return
+
+        cursor = get_native_cursor(self._sqlaproxy)
+
+        # some drivers don't allow setting it
+        try:
+            cursor.arraysize = self._fetch_batch_size
+        except Exception:
+            pass
+
+    def _init_arrow_stream(self):
+        """
+        Returns an ArrowStream to read the rows as Arrow record batches if storing
+        results by column and the driver supports it, otherwise returns None
+        """
+        if (
+            not get_config_option(self._config, "columnar_results", bool, False)
+            or not self.keys
+            or hasattr(self._sqlaproxy, "dataframe")
+        ):
+            return None
+
+        return ArrowStream.from_cursor(
+            get_native_cursor(self._sqlaproxy),
+            batch_size=self._fetch_batch_size or 2048,
+        )
+
+    def _init_buffer(self):
+        """Creates the object that stores the fetched rows"""
+        # rows fetched after reaching the limit are written to disk
+        max_bytes = get_config_option(self._config, "result_memory_limit", int, 0)
+
+        if self._arrow_stream is not None:
+            schema = self._arrow_stream.schema
+
+            if max_bytes:
+                return ArrowSpillBuffer(schema, max_bytes)
+
+            return ArrowBuffer(schema)
+
+        if get_config_option(self._config, "columnar_results", bool, False):
+            buffer = ColumnarBuffer(len(self.keys))
+        else:
+            buffer = RowBuffer(len(self.keys))
+
+        return SpillBuffer(buffer, max_bytes) if max_bytes else buffer
+
     def close(self):
+        self._stop_prefetch()
         self._sqlaproxy.close()
         self._closed = True
+        self._release_connection()
 
+    def _start_prefetch(self):
+        """
+        Starts fetching the remaining rows in a background thread if enabled. It's
+        only resumed for the last result set of the connection, since running
+        another query stops it
+        """
+        if (
+            not get_config_option(self._config, "background_fetch", bool, False)
+            or self._done_fetching()
+            or self._streamed
+            or self._closed
+            or (self._prefetch is not None and self._prefetch.running)
+            # spark doesn't support cursor
+            or hasattr(self._sqlaproxy, "dataframe")
+            or (self._conn and not self._conn._result_sets.is_last(self))
+        ):
+            return
 
-def unduplicate_field_names(field_names):
-    """Append a number to duplicate field names to make them unique."""
-    res = []
-    for k in field_names:
-        if k in res:
-            i = 1
-            while k + "_" + str(i) in res:
-                i += 1
-            k += "_" + str(i)
-        res.append(k)
-    return res
+        self._prefetch = BackgroundPrefetch(
+            self,
+            batch_size=self._fetch_batch_size or 10_000,
+            max_bytes=get_config_option(
+                self._config, "background_fetch_max_bytes", int, 0
+            ),
+        )
+        self._prefetch.start()
 
+    def _stop_prefetch(self):
+        """Waits for the background thread to finish fetching the current batch and
+        stops it"""
+        if self._prefetch is not None:
+            self._prefetch.stop()
 
-def _convert_to_data_frame(
-    result_set, converter_name, constructor, constructor_kwargs=None
-):
+
+class MultiResultSet:
     """
-    Convert the result set to a pandas DataFrame, using native DuckDB methods if
-    possible
+    Results of a cell with several queries (e.g., SELECT statements), with one
+    ResultSet per query (or a data frame if autopandas or autopolars are enabled),
+    in the order they appear in the cell. Rows are fetched lazily, like in a
+    ResultSet
+
+    Attributes
+    ----------
+    timings : list of dict
+        One dictionary per query with the statement, the seconds it took to run it
+        and fetch the rows to display ("elapsed"), and the number of rows reported
+        by the driver ("rowcount", None if the driver doesn't report it)
+
+    Examples
+    --------
+    >>> results = %sql SELECT * FROM a; SELECT * FROM b
+    >>> results[1].DataFrame()
     """
-    constructor_kwargs = constructor_kwargs or {}
 
-    # maybe create accessors in the connection objects?
-    if result_set._conn.is_dbapi_connection:
-        native_connection = result_set.sqlaproxy
-    elif hasattr(result_set.sqlaproxy, "dataframe"):
-        return result_set.sqlaproxy.dataframe.toPandas()
-    else:
-        native_connection = result_set._conn._connection.connection
-
-    has_converter_method = hasattr(native_connection, converter_name)
-
-    # native duckdb connection
-    if has_converter_method:
-        # we need to re-execute the statement because if we fetched some rows
-        # already, .df() will return None. But only if it's a select statement
-        # otherwise we might end up re-execute INSERT INTO or CREATE TABLE
-        # statements.
-        is_select = _statement_is_select(result_set._statement)
-
-        if is_select:
-            # If command includes PIVOT, current transaction must be closed.
-            # Otherwise, re-executing the statement will return
-            # TransactionContext Error: cannot start a transaction within a transaction
-            if "pivot" in result_set._statement.lower():
-                # fetchall retrieves the previous results and completes the transaction
-                # nothing is done with the results from fetchall()
-                native_connection.fetchall()
-
-            native_connection.execute(result_set._statement)
-
-        return getattr(native_connection, converter_name)()
-    else:
-        if converter_name == "df":
-            constructor_kwargs["columns"] = result_set.keys
+    def __init__(self):
+        self._results = []
+        self.timings = []
 
-        frame = constructor(
-            (tuple(row) for row in result_set),
-            **constructor_kwargs,
+    def _append(self, statement, result, elapsed, rowcount):
+        self._results.append(result)
+        self.timings.append(
+            {"statement": statement, "elapsed": elapsed, "rowcount": rowcount}
         )
 
-        return frame
+    @property
+    def statements(self):
+        """The queries, in the order they appear in the cell"""
+        return [timing["statement"] for timing in self.timings]
+
+    def __len__(self):
+        return len(self._results)
 
+    def __getitem__(self, key):
+        return self._results[key]
 
-def _nonbreaking_spaces(match_obj):
+    def __iter__(self):
+        return iter(self._results)
+
+    def _headers(self):
+        return [
+            f"{_statement_preview(timing['statement'])} ({timing['elapsed']:.3f}s)"
+            for timing in self.timings
+        ]
+
+    def _repr_html_(self):
+        parts = []
+
+        for header, result in zip(self._headers(), self._results):
+            parts.append(f"<p><code>{escape(header)}</code></p>")
+
+            if hasattr(result, "_repr_html_"):
+                parts.append(result._repr_html_())
+            else:
+                parts.append(f"<pre>{escape(repr(result))}</pre>")
+
+        return "\n".join(parts)
+
+    def __repr__(self):
+        return "\n\n".join(
+            f"{header}\n{result}"
+            for header, result in zip(self._headers(), self._results)
+        )
+
+
+class _RecordBatchBuilder:
     """
-    Make spaces visible in HTML by replacing all `` `` with ``&nbsp;``
+    Converts lists of rows to pyarrow.RecordBatch objects with the same schema.
+    The type of each column is inferred from its first non-null values, the
+    batches are held back until all types are known (or until
+    _ARROW_SCHEMA_SAMPLE_ROWS rows are read), so columns whose first values are
+    NULL don't end up with a different type in each batch
+    """
+
+    def __init__(self, names, types=None):
+        self._names = list(names)
+        self._types = list(types) if types is not None else [None] * len(names)
+
+    @property
+    def settled(self):
+        return all(type_ is not None for type_ in self._types)
+
+    def to_record_batch(self, rows):
+        arrays = []
+
+        for index, values in enumerate(zip(*rows)):
+            array = pa.array(list(values), type=self._types[index])
 
-    Call with a ``re`` match object.  Retain group 1, replace group 2
-    with nonbreaking spaces.
+            if self._types[index] is None and not pa.types.is_null(array.type):
+                self._types[index] = array.type
+
+            arrays.append(array)
+
+        return pa.RecordBatch.from_arrays(arrays, names=self._names)
+
+    def to_record_batches(self, batches):
+        """
+        Yields a pyarrow.RecordBatch for each list of rows in batches
+        (pyarrow.RecordBatch objects are yielded as they are)
+        """
+        pending, n_pending = [], 0
+        sampling = not self.settled
+
+        for batch in batches:
+            if isinstance(batch, pa.RecordBatch):
+                yield batch
+                continue
+
+            if not sampling:
+                yield self.to_record_batch(batch)
+                continue
+
+            pending.append(batch)
+            n_pending += len(batch)
+            self._infer(batch)
+
+            if self.settled or n_pending >= _ARROW_SCHEMA_SAMPLE_ROWS:
+                sampling = False
+                yield from (self.to_record_batch(rows) for rows in pending)
+                pending = []
+
+        yield from (self.to_record_batch(rows) for rows in pending)
+
+    def _infer(self, rows):
+        for index, values in enumerate(zip(*rows)):
+            if self._types[index] is None:
+                type_ = pa.array(list(values)).type
+
+                if not pa.types.is_null(type_):
+                    self._types[index] = type_
+
+
+def _result_sets(result):
+    """
+    Returns the ResultSet objects in a value returned by run_statements (e.g., a
+    MultiResultSet)
     """
-    spaces = "&nbsp;" * len(match_obj.group(2))
-    return "%s%s" % (match_obj.group(1), spaces)
-
-
-def _statement_is_select(statement):
-    statement_ = statement.lower().strip()
-    # duckdb also allows FROM without SELECT
-    return (
-        statement_.startswith("select")
-        or statement_.startswith("from")
-        or statement_.startswith("with")
-        or statement_.startswith("pivot")
-    )
+    if isinstance(result, ResultSet):
+        return [result]
+    elif isinstance(result, MultiResultSet):
+        return [item for item in result if isinstance(item, ResultSet)]
+    else:
+        return []
+
+
+def _statement_preview(statement):
+    """Returns the statement in a single line, truncated if it's too long"""
+    statement = " ".join(statement.split()).rstrip(";")
+
+    if len(statement) > _STATEMENT_PREVIEW_LENGTH:
+        return statement[: _STATEMENT_PREVIEW_LENGTH - 3] + "..."
+
+    return statement
+
+
+def unduplicate_field_names(field_names):
+    """Append a number to duplicate field names to make them unique."""
+    res = []
+    for k in field_names:
+        if k in res:
+            i = 1
+            while k + "_" + str(i) in res:
+                i += 1
+            k += "_" + str(i)
+        res.append(k)
+    return res
@@ -1,13 +1,29 @@
-import sqlparse
+import time
 
 from sql import exceptions, display
-from sql.run.resultset import ResultSet
+from sql.cell import as_parsed_cell
+from sql.run.resultset import ResultSet, MultiResultSet
+from sql.run.export import export
 from sql.run.pgspecial import handle_postgres_special
+from sql.run.cache import (
+    query_cache,
+    is_cacheable,
+    is_mutating,
+    make_key,
+    fetch_for_cache,
+    get_disk_cache,
+    get_cached,
+    put_cached,
+    invalidate_cached,
+)
+from sql.util import get_config_option
 
 
 # TODO: conn also has access to config, we should clean this up to provide a clean
 # way to access the config
-def run_statements(conn, sql, config, parameters=None):
+def run_statements(
+    conn, sql, config, parameters=None, export_to=None, use_cache=True, timeout=None
+):
     """
     Run a SQL query (supports running multiple SQL statements) with the given
     connection. This is the function that's called when executing SQL magic.
@@ -17,30 +33,87 @@ def run_statements(conn, sql, config, parameters=None):
     conn : sql.connection.AbstractConnection
         The connection to use
 
-    sql : str
+    sql : str or sql.cell.ParsedCell
         SQL query to execution
 
     config
         Configuration object
 
+    export_to : str, optional
+        If passed, the results of the last statement are written to this path
+        (the format is inferred from the extension) instead of being returned
+
+    use_cache : bool, default True
+        If False, don't use the query cache (enabled with
+        ``SqlMagic.query_cache``) to run the statements
+
+    timeout : int, optional
+        Cancel the statements that take longer than this many seconds to run (0
+        means no timeout). Defaults to ``SqlMagic.query_timeout``
+
     Examples
     --------
 
     .. literalinclude:: ../../examples/run_statements.py
 
     """
-    if not sql.strip():
+    cell = as_parsed_cell(sql)
+
+    if not cell.sql.strip():
         return "Connected: %s" % conn.name
 
-    for statement in sqlparse.split(sql):
-        # strip all comments from sql
-        statement = sqlparse.format(statement, strip_comments=True)
-        # trailing comment after semicolon can be confused as its own statement,
-        # so we ignore it here.
-        if not statement:
-            continue
+    # queries running in a worker thread (e.g., %%sql --async) might share this
+    # connection, so this waits until they finish
+    with conn._running():
+        # with connection pooling (SqlMagic.connection_pooling), the statements
+        # run on a connection checked out from the engine's pool
+        pooled = conn._pooled_connection()
+        result = None
+
+        try:
+            result = _run_statements(
+                pooled, cell, config, parameters, export_to, use_cache, timeout
+            )
+        finally:
+            conn._release_pooled_connection(pooled, result)
+
+    return result
+
+
+def _run_statements(conn, cell, config, parameters, export_to, use_cache, timeout):
+    cache_enabled = (
+        use_cache
+        and not export_to
+        and get_config_option(config, "query_cache", bool, False)
+        and not is_spark(conn.dialect)
+    )
+    # there might be results on disk from a previous session
+    disk_cache_enabled = get_disk_cache(config) is not None
+    cache_key, cached = None, None
+
+    if timeout is None:
+        timeout = get_config_option(config, "query_timeout", int, 0)
+
+    # if the cell has several statements that return rows (e.g., SELECT or SHOW),
+    # the results of each one are returned
+    collect_results = (
+        len(cell.statements) > 1
+        and not export_to
+        and not is_spark(conn.dialect)
+        and not get_config_option(config, "column_local_vars", bool, False)
+    )
+    results = []
 
-        first_word = sql.strip().split()[0].lower()
+    # statements are split and comments are stripped when parsing the cell,
+    # statements with only comments (e.g., a trailing comment after a semicolon)
+    # are skipped
+    for parsed in cell.statements:
+        statement = parsed.sql
+        cache_key, cached = None, None
+        started = time.monotonic()
+        value = None
+
+        first_word = cell.sql.strip().split()[0].lower()
 
         if first_word == "begin":
             raise exceptions.RuntimeError("JupySQL does not support transactions")
@@ -51,7 +124,32 @@ def run_statements(conn, sql, config, parameters=None):
 
         # regular query
         else:
-            result = conn.raw_execute(statement, parameters=parameters)
+            if cache_enabled or disk_cache_enabled or len(query_cache):
+                cacheable = is_cacheable(parsed)
+
+                # the statement might change the results of the cached queries
+                if not cacheable and is_mutating(parsed):
+                    invalidate_cached(conn, config)
+
+                if cache_enabled and cacheable:
+                    cache_key = make_key(
+                        parsed, parameters, conn.alias, config.autolimit
+                    )
+
+                if cache_key is not None:
+                    cached = get_cached(conn, cache_key, config)
+
+            if cached is not None:
+                result = cached.cursor()
+
+                if config.feedback >= 2:
+                    display.message("Using cached results")
+            else:
+                with conn.cancellable(timeout=timeout):
+                    result = conn.raw_execute(
+                        statement, parameters=parameters, parsed=parsed
+                    )
+
             if is_spark(conn.dialect) and config.lazy_execution:
                 return result.dataframe
 
@@ -62,10 +160,90 @@ def run_statements(conn, sql, config, parameters=None):
             ):
                 display.message_success(f"{result.rowcount} rows affected.")
 
-    result_set = ResultSet(result, config, statement, conn)
+        if collect_results and _returns_rows(result, parsed):
+            rowcount = getattr(result, "rowcount", -1)
+            # the next statement might run on the same cursor, so we create the
+            # ResultSet (which fetches the rows to display) right away
+            result_set = _to_result_set(
+                conn, result, statement, config, cache_key, cached
+            )
+            value = select_df_type(result_set, config)
+            results.append(
+                (
+                    statement,
+                    value,
+                    time.monotonic() - started,
+                    rowcount if rowcount >= 0 else None,
+                )
+            )
+
+    if len(results) > 1:
+        multi_result = MultiResultSet()
+
+        for statement, value, elapsed, rowcount in results:
+            multi_result._append(statement, value, elapsed=elapsed, rowcount=rowcount)
+
+        return multi_result
+
+    # the results of the last statement were created above
+    if value is not None:
+        return value
+
+    if export_to:
+        result_set = ResultSet(result, config, statement, conn, fetch_preview=False)
+        n_rows = export(result_set, export_to)
+        display.message_success(f"Exported {n_rows} rows to {export_to}")
+        return None
+
+    result_set = _to_result_set(conn, result, statement, config, cache_key, cached)
     return select_df_type(result_set, config)
 
 
+def _returns_rows(result, parsed):
+    """
+    Checks if the cursor returned by running a statement has rows (e.g., SELECT,
+    SHOW, PRAGMA or INSERT ... RETURNING)
+    """
+    # SQLAlchemy results wrap the DBAPI cursor
+    if hasattr(result, "returns_rows"):
+        if not result.returns_rows:
+            return False
+
+        description = result.cursor.description
+    else:
+        description = getattr(result, "description", None)
+
+    if not description:
+        return False
+
+    # DuckDB returns a single column with the number of rows affected (Count) or
+    # whether it succeeded (Success) for statements that don't return rows
+    status = len(description) == 1 and description[0][0] in {"Count", "Success"}
+    return is_cacheable(parsed) or not status
+
+
+def _to_result_set(conn, result, statement, config, cache_key, cached):
+    """
+    Creates a ResultSet with the results of a statement and caches them if
+    cache_key is passed (and they're not already cached)
+    """
+    # if we're converting to a data frame, there is no need to fetch the rows for
+    # the preview, this allows the converters to read all rows at once
+    fetch_preview = not (config.autopandas or config.autopolars) or bool(
+        config.autolimit
+    )
+    result_set = ResultSet(result, config, statement, conn, fetch_preview=fetch_preview)
+
+    if cache_key is not None and cached is None:
+        max_bytes = get_config_option(config, "query_cache_max_bytes", int, 0)
+        entry = fetch_for_cache(result_set, max_bytes=max_bytes)
+
+        if entry is not None:
+            put_cached(conn, cache_key, entry, config)
+
+    return result_set
+
+
 def is_postgres_or_redshift(dialect):
     """Checks if dialect is postgres or redshift"""
     return "postgres" in str(dialect) or "redshift" in str(dialect)
@@ -0,0 +1,272 @@
+"""
+Buffers that write fetched rows to a temporary file once the rows kept in memory
+reach a limit (``SqlMagic.result_memory_limit``). The file is memory-mapped when
+reading the rows back, so the operating system can page them out
+"""
+
+import bisect
+import mmap
+import operator
+import pickle
+import tempfile
+from itertools import islice
+
+from sql.run.arrow import ArrowBuffer
+from sql._lazy import lazy_import
+
+pa = lazy_import("pyarrow")
+
+
+class _SpillFile:
+    """An anonymous temporary file that's deleted once closed"""
+
+    def __init__(self):
+        self._file = tempfile.TemporaryFile(prefix="jupysql-")
+        self._mapped = None
+        self._mapped_size = 0
+
+    def writer(self):
+        return self._file
+
+    def map(self):
+        """Returns a read-only memory map with the contents written so far"""
+        self._file.flush()
+        size = self._file.tell()
+
+        # the file grew since we mapped it
+        if self._mapped is None or self._mapped_size != size:
+            self._unmap()
+            self._mapped = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._mapped_size = size
+
+        return self._mapped
+
+    def _unmap(self):
+        if self._mapped is not None:
+            try:
+                self._mapped.close()
+            except BufferError:
+                # something still points to the memory (e.g., Arrow batches read
+                # without copying), it's unmapped once they're garbage collected
+                pass
+
+        self._mapped = None
+        self._mapped_size = 0
+
+    def close(self):
+        self._unmap()
+        self._file.close()
+
+
+class SpillBuffer:
+    """
+    Wraps a RowBuffer or ColumnarBuffer. Once the buffer uses ``max_bytes`` bytes,
+    new rows are pickled (in the chunks returned by the cursor) to a temporary file
+
+    Parameters
+    ----------
+    buffer : RowBuffer or ColumnarBuffer
+        Buffer that stores the rows in memory
+
+    max_bytes : int
+        Approximate memory limit for the rows kept in ``buffer``
+    """
+
+    def __init__(self, buffer, max_bytes):
+        self._memory = buffer
+        self._max_bytes = max_bytes
+        self._file = None
+        # (offset, length) of each pickled chunk and the number of rows before it
+        self._chunks = []
+        self._starts = []
+        self._n_spilled = 0
+        self._cached = (None, None)
+
+    @property
+    def spilled(self):
+        """Returns True if some rows were written to disk"""
+        return bool(self._n_spilled)
+
+    def extend(self, rows):
+        """Append rows fetched from the cursor"""
+        if not rows:
+            return
+
+        if self._file is None and self._memory.nbytes() < self._max_bytes:
+            self._memory.extend(rows)
+            return
+
+        if self._file is None:
+            self._file = _SpillFile()
+
+        writer = self._file.writer()
+        offset = writer.tell()
+        pickle.dump([tuple(row) for row in rows], writer, pickle.HIGHEST_PROTOCOL)
+
+        self._chunks.append((offset, writer.tell() - offset))
+        self._starts.append(self._n_spilled)
+        self._n_spilled += len(rows)
+
+    def _load_chunk(self, idx):
+        # keep the last chunk we read so looking up rows one by one doesn't
+        # unpickle the same chunk every time
+        if self._cached[0] != idx:
+            offset, length = self._chunks[idx]
+            rows = pickle.loads(self._file.map()[offset : offset + length])
+            self._cached = (idx, rows)
+
+        return self._cached[1]
+
+    def _spilled_rows(self):
+        for idx in range(len(self._chunks)):
+            yield from self._load_chunk(idx)
+
+    def clear(self):
+        self._memory.clear()
+
+        if self._file is not None:
+            self._file.close()
+
+        self._file = None
+        self._chunks = []
+        self._starts = []
+        self._n_spilled = 0
+        self._cached = (None, None)
+
+    def nbytes(self):
+        """Returns an estimate of the memory used by the rows kept in memory"""
+        return self._memory.nbytes()
+
+    def columns(self):
+        """Returns a list with the values of each column"""
+        if not self.spilled:
+            return self._memory.columns()
+
+        return [list(values) for values in zip(*self)]
+
+    def column(self, idx):
+        """Returns a list with the values of the column in position ``idx``"""
+        if not self.spilled:
+            return self._memory.column(idx)
+
+        return [row[idx] for row in self]
+
+    def __len__(self):
+        return len(self._memory) + self._n_spilled
+
+    def __iter__(self):
+        yield from self._memory
+        yield from self._spilled_rows()
+
+    def __getitem__(self, key):
+        n_memory = len(self._memory)
+
+        if isinstance(key, slice):
+            indices = range(*key.indices(len(self)))
+
+            if not indices:
+                return []
+
+            first, last = sorted((indices[0], indices[-1]))
+
+            if last < n_memory:
+                # a negative step might end before the first row (stop=-1)
+                stop = indices.stop if indices.stop >= 0 else None
+                return self._memory[indices.start : stop : indices.step]
+
+            # read the rows between the first and last index once, then step
+            # through them (in reverse for a negative step)
+            rows = list(islice(self, first, last + 1))
+            return rows[:: indices.step]
+
+        # raises TypeError for non-integer keys, ResultSet relies on this to
+        # look up rows by the value of the leftmost column
+        idx = operator.index(key)
+
+        if idx < 0:
+            idx += len(self)
+
+        if not 0 <= idx < len(self):
+            raise IndexError("list index out of range")
+
+        if idx < n_memory:
+            return self._memory[idx]
+
+        idx -= n_memory
+        chunk = bisect.bisect_right(self._starts, idx) - 1
+        return self._load_chunk(chunk)[idx - self._starts[chunk]]
+
+    def __eq__(self, other):
+        if isinstance(other, SpillBuffer):
+            other = list(other)
+
+        return list(self) == other
+
+    def __repr__(self):
+        return f"{type(self).__name__}({list(self)!r})"
+
+
+class ArrowSpillBuffer(ArrowBuffer):
+    """
+    ArrowBuffer that writes record batches to a temporary file (Arrow IPC stream
+    format) once the batches in memory use ``max_bytes`` bytes. The batches are
+    read back (without copying them) from a memory map of the file
+
+    Parameters
+    ----------
+    schema : pyarrow.Schema
+        Schema of the result
+
+    max_bytes : int
+        Approximate memory limit for the batches kept in memory
+    """
+
+    def __init__(self, schema, max_bytes):
+        super().__init__(schema)
+        self._max_bytes = max_bytes
+        self._file = None
+        self._writer = None
+        self._spilled_batches = []
+        self._n_spilled_batches = 0
+
+    @property
+    def spilled(self):
+        """Returns True if some rows were written to disk"""
+        return bool(self._n_spilled_batches)
+
+    def extend(self, batches):
+        """Append record batches read from the cursor"""
+        if self._file is None and self.nbytes() < self._max_bytes:
+            super().extend(batches)
+            return
+
+        if self._file is None:
+            self._file = _SpillFile()
+            self._writer = pa.ipc.new_stream(self._file.writer(), self._schema)
+
+        for batch in batches:
+            if batch.num_rows:
+                self._writer.write_batch(batch)
+                self._n_spilled_batches += 1
+                self._length += batch.num_rows
+
+    def _all_batches(self):
+        if len(self._spilled_batches) != self._n_spilled_batches:
+            # release the batches that point to the previous memory map
+            self._spilled_batches = []
+            reader = pa.ipc.open_stream(pa.py_buffer(self._file.map()))
+            self._spilled_batches = list(reader)
+
+        return self._batches + self._spilled_batches
+
+    def clear(self):
+        super().clear()
+
+        if self._file is not None:
+            self._writer.close()
+            self._file.close()
+
+        self._file = None
+        self._writer = None
+        self._spilled_batches = []
+        self._n_spilled_batches = 0
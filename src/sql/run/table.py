@@ -1,3 +1,6 @@
+from decimal import Decimal
+from html import escape
+
 import prettytable
 
 
@@ -11,3 +14,47 @@ class CustomPrettyTable(prettytable.PrettyTable):
                 else:
                     formatted_row.append(cell)
             self.add_row(formatted_row)
+
+
+# values of these types never contain characters that need escaping
+_NO_ESCAPE = {int, float, bool, type(None), Decimal}
+
+
+def _format_cell(value):
+    if type(value) in _NO_ESCAPE:
+        return str(value)
+
+    text = escape(str(value).expandtabs(), quote=False).replace("\n", "<br>")
+
+    if isinstance(value, str) and value.startswith("http"):
+        return f"<a href={text}>{text}</a>"
+
+    # make leading spaces visible
+    stripped = text.lstrip(" ")
+    n_spaces = len(text) - len(stripped)
+
+    if n_spaces > 1:
+        return "&nbsp;" * n_spaces + stripped
+
+    return text
+
+
+def render_html_table(field_names, rows):
+    """
+    Renders rows as an HTML table with the same layout as
+    ``PrettyTable.get_html_string()``. Each cell is escaped once, cells that
+    start with "http" are rendered as links and leading spaces are made visible
+    """
+    lines = ["<table>", "    <thead>", "        <tr>"]
+    lines.extend(
+        f"            <th>{escape(name, quote=False)}</th>" for name in field_names
+    )
+    lines.extend(["        </tr>", "    </thead>", "    <tbody>"])
+
+    for row in rows:
+        lines.append("        <tr>")
+        lines.extend(f"            <td>{_format_cell(value)}</td>" for value in row)
+        lines.append("        </tr>")
+
+    lines.extend(["    </tbody>", "</table>"])
+    return "\n".join(lines)
@@ -4,6 +4,7 @@ from sqlalchemy.exc import ProgrammingError
 import sql.connection
 from sql.util import flatten
 from sql import exceptions
+from sql.run.cache import execute_cached
 
 
 def _summary_stats(conn, table, column, with_=None):
@@ -30,7 +31,7 @@ FROM {{table}}
     )
     query = template_percentile.render(table=table, column=column)
 
-    percentiles = list(conn.execute(query, with_).fetchone())
+    percentiles = list(execute_cached(conn, query, with_).fetchone())
 
     template = Template(
         """
@@ -42,7 +43,7 @@ FROM {{table}}
     )
     query = template.render(table=table, column=column)
 
-    other = list(conn.execute(query, with_).fetchone())
+    other = list(execute_cached(conn, query, with_).fetchone())
 
     keys = ["q1", "med", "q3", "mean", "N"]
     return {k: float(v) for k, v in zip(keys, percentiles + other)}
@@ -63,7 +64,7 @@ FROM {{table}}
     )
     query = template_percentile.render(table=table, column=column)
 
-    percentiles = list(conn.execute(query, with_).fetchone())
+    percentiles = list(execute_cached(conn, query, with_).fetchone())
 
     template = Template(
         """
@@ -75,7 +76,7 @@ FROM {{table}}
     )
     query = template.render(table=table, column=column)
 
-    other = list(conn.execute(query, with_).fetchone())
+    other = list(execute_cached(conn, query, with_).fetchone())
 
     keys = ["q1", "med", "q3", "mean", "N"]
 
@@ -88,7 +89,7 @@ def _summary_stats_parallel(conn, table, column, with_=None):
     if not conn:
         conn = sql.connection.ConnectionManager.current
 
-    driver = conn._get_database_information()["driver"]
+    driver = conn.capabilities.driver
 
     template = Template(
         """
@@ -104,7 +105,7 @@ def _summary_stats_parallel(conn, table, column, with_=None):
     query = template.render(table=table, column=column)
 
     try:
-        values = conn.execute(query, with_).fetchone()
+        values = execute_cached(conn, query, with_).fetchone()
     except ProgrammingError as e:
         print(e)
         raise exceptions.RuntimeError(
@@ -6,7 +6,7 @@ import sql.connection
 import difflib
 
 from sql import exceptions
-from sql import util
+from sql.cell import as_parsed_cell
 
 
 class SQLStore(MutableMapping):
@@ -68,12 +68,18 @@ class SQLStore(MutableMapping):
         return SQLQuery(self, query, with_)
 
     def infer_dependencies(self, query, key):
+        """
+        Returns the stored snippets used in the query (a string or a
+        sql.cell.ParsedCell), excluding ``key``
+        """
         dependencies = []
         saved_keys = [
             saved_key for saved_key in list(self._data.keys()) if saved_key != key
         ]
-        if saved_keys and query:
-            tables = util.extract_tables_from_query(query)
+        cell = as_parsed_cell(query)
+
+        if saved_keys and cell.sql:
+            tables = cell.tables
             for table in tables:
                 if table in saved_keys:
                     dependencies.append(table)
@@ -3,10 +3,9 @@ import difflib
 from sql import exceptions, display
 import json
 from pathlib import Path
-from sqlglot import parse_one, exp
-from sqlglot.errors import ParseError
 from sqlalchemy.exc import SQLAlchemyError
 from ploomber_core.dependencies import requires
+from sql._lazy import lazy_import
 
 try:
     from pyspark.sql.utils import AnalysisException
@@ -14,11 +13,14 @@ except ModuleNotFoundError:
     AnalysisException = None
 
 import ast
+from collections import ChainMap
+from functools import lru_cache
 from os.path import isfile
 import re
 
 from jinja2 import Template
 
+sqlglot = lazy_import("sqlglot")
 
 try:
     import toml
@@ -330,10 +332,7 @@ def get_line_content_from_toml(file_path, line_number):
 
 def to_upper_if_snowflake_conn(conn, upper):
     return (
-        upper.upper()
-        if callable(conn._get_sqlglot_dialect)
-        and conn._get_sqlglot_dialect() == "snowflake"
-        else upper
+        upper.upper() if conn.capabilities.sqlglot_dialect == "snowflake" else upper
     )
 
 
@@ -470,6 +469,30 @@ def get_default_configs(sql):
     return default_configs
 
 
+def get_config_option(config, name, type_, default):
+    """
+    Returns the value of an optional setting in ``config``. Falls back to
+    ``default`` if the object doesn't define it or if it has an unexpected type
+    (e.g., when functions receive a partial config object)
+
+    Parameters
+    ----------
+    config : object
+        Object with configuration options as attributes (e.g., SqlMagic)
+
+    name : str
+        Option name
+
+    type_ : type or tuple of types
+        Expected type(s) of the value
+
+    default : any
+        Value to return if the option is missing or invalid
+    """
+    value = getattr(config, name, default)
+    return value if isinstance(value, type_) else default
+
+
 def _are_numeric_values(*values):
     return all([isinstance(value, (int, float)) for value in values])
 
@@ -538,11 +561,11 @@ def extract_tables_from_query(query):
     try:
         tables = [
             table.name
-            for table in parse_one(query).find_all(exp.Table)
+            for table in sqlglot.parse_one(query).find_all(sqlglot.exp.Table)
             if hasattr(table, "name")
         ]
         return tables
-    except ParseError:
+    except sqlglot.errors.ParseError:
         # TODO : Instead of returning [] return the
         # exact parse error
         return []
@@ -605,6 +628,53 @@ def is_rendering_required(line):
     return "{{" in line and "}}" in line
 
 
+# strings without these are rendered as-is by jinja (except for newlines)
+_TEMPLATE_MARKERS = ("{{", "{%", "{#")
+
+_NEWLINE = re.compile(r"\r\n|\r|\n")
+
+
+def namespace_view(*namespaces):
+    """
+    Returns a read-through view of the namespaces (the first ones take precedence)
+    without copying them. Assignments go to a new dictionary, so the namespaces
+    aren't modified
+
+    Parameters
+    ----------
+    *namespaces : dict
+        Namespaces to look up variables (e.g., local and IPython namespaces)
+    """
+    return ChainMap({}, *namespaces)
+
+
+@lru_cache(maxsize=256)
+def _compile_template(source):
+    return Template(source)
+
+
+def render_template(source, namespace):
+    """
+    Renders a jinja template with the variables in the namespace. Compiled
+    templates are cached by source, and strings without template markers are not
+    rendered (we only normalize newlines and remove the trailing one, as jinja
+    does)
+
+    Parameters
+    ----------
+    source : str
+        Template
+
+    namespace : mapping
+        Variables to use when rendering the template
+    """
+    if not any(marker in source for marker in _TEMPLATE_MARKERS):
+        source = _NEWLINE.sub("\n", source)
+        return source[:-1] if source.endswith("\n") else source
+
+    return _compile_template(source).render(namespace)
+
+
 def render_string_using_namespace(value, user_ns):
     """
     Function to substitute command line arguments
@@ -621,7 +691,7 @@ def render_string_using_namespace(value, user_ns):
     """
 
     if isinstance(value, str) and value.startswith("{{") and value.endswith("}}"):
-        return Template(value).render(user_ns)
+        return render_template(value, user_ns)
     return value
 
 
@@ -1,13 +1,16 @@
 import os
 import urllib.request
 from pathlib import Path
+from unittest.mock import Mock
 
 import pytest
+from sqlalchemy import create_engine
 
 from sql.magic import SqlMagic, RenderMagic
 from sql.magic_plot import SqlPlotMagic
 from sql.magic_cmd import SqlCmdMagic
-from sql.connection import ConnectionManager
+from sql.connection import ConnectionManager, SQLAlchemyConnection
+from sql.run.resultset import ResultSet
 from sql._testing import TestingShell
 from sql import connection
 from sql.store import store
@@ -98,6 +101,30 @@ def runsql(ip_session, statements):
     return result  # returns only last result
 
 
+@pytest.fixture
+def numbers_conn():
+    conn = SQLAlchemyConnection(create_engine("duckdb://"))
+    conn.execute("CREATE TABLE numbers AS SELECT range AS x FROM range(10)")
+    yield conn
+    conn.close()
+
+
+@pytest.fixture
+def result_set_config():
+    config = Mock()
+    config.displaylimit = 3
+    config.autolimit = 0
+    config.columnar_results = False
+    config.polars_dataframe_kwargs = {}
+    return config
+
+
+def make_result_set(conn, config, statement="SELECT * FROM numbers"):
+    return ResultSet(
+        conn.raw_execute(statement), config, statement=statement, conn=conn
+    )
+
+
 @pytest.fixture
 def clean_conns():
     ConnectionManager.current = None
@@ -0,0 +1,71 @@
+import duckdb
+import pyarrow as pa
+import pytest
+
+from sql.run.arrow import ArrowStream, ArrowBuffer, get_native_cursor
+
+
+@pytest.fixture
+def reader():
+    table = pa.table({"x": list(range(10)), "y": [str(i) for i in range(10)]})
+    return pa.RecordBatchReader.from_batches(table.schema, table.to_batches(4))
+
+
+def test_stream_read_returns_requested_number_of_rows(reader):
+    stream = ArrowStream(reader)
+
+    assert sum(batch.num_rows for batch in stream.read(2)) == 2
+    assert sum(batch.num_rows for batch in stream.read(5)) == 5
+    assert sum(batch.num_rows for batch in stream.read(5)) == 3
+    assert stream.exhausted
+    assert stream.read(5) == []
+
+
+def test_stream_read_all(reader):
+    stream = ArrowStream(reader)
+    stream.read(3)
+
+    batches = stream.read_all()
+
+    assert pa.Table.from_batches(batches).column("x").to_pylist() == list(
+        range(3, 10)
+    )
+
+
+def test_stream_from_duckdb_cursor():
+    conn = duckdb.connect()
+    cursor = conn.execute("SELECT * FROM range(5)")
+
+    stream = ArrowStream.from_cursor(get_native_cursor(cursor))
+
+    assert stream.schema.names == ["range"]
+    assert sum(batch.num_rows for batch in stream.read_all()) == 5
+
+
+def test_stream_from_cursor_without_arrow_support():
+    class Cursor:
+        description = [("x",)]
+
+    assert ArrowStream.from_cursor(Cursor()) is None
+
+
+def test_buffer(reader):
+    stream = ArrowStream(reader)
+    buffer = ArrowBuffer(stream.schema)
+
+    buffer.extend(stream.read(3))
+    buffer.extend(stream.read(4))
+
+    assert len(buffer) == 7
+    assert buffer[0] == (0, "0")
+    assert buffer[-1] == (6, "6")
+    assert buffer[3:5] == [(3, "3"), (4, "4")]
+    assert buffer == [(i, str(i)) for i in range(7)]
+    assert buffer.column(0) == list(range(7))
+    assert buffer.to_table().num_rows == 7
+
+    with pytest.raises(TypeError):
+        buffer["key"]
+
+    with pytest.raises(IndexError):
+        buffer[7]
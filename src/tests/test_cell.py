@@ -0,0 +1,104 @@
+from unittest.mock import patch
+
+import pytest
+import sqlparse
+
+from sql.cell import ParsedCell, as_parsed_cell, parse_statements
+from sql.connection import detect_duckdb_summarize_or_select
+from sql.store import SQLStore
+
+
+@pytest.mark.parametrize(
+    "sql",
+    [
+        "SELECT 1",
+        "SELECT 1; -- trailing comment",
+        "-- comment\nSELECT 1; SELECT 2 /* another */ ;\n\n",
+        "SELECT '--not a comment' AS a -- comment\nFROM t",
+        "CREATE TABLE t (x INT);\nINSERT INTO t VALUES (1);\nSELECT * FROM t  \n",
+        "FROM t",
+        "/* only a comment */",
+    ],
+)
+def test_parse_statements_same_as_split_and_format(sql):
+    expected = [
+        sqlparse.format(statement, strip_comments=True)
+        for statement in sqlparse.split(sql)
+    ]
+
+    assert [statement.sql for statement in parse_statements(sql)] == [
+        statement for statement in expected if statement
+    ]
+
+
+@pytest.mark.parametrize(
+    "sql, query_type",
+    [
+        ("SELECT * FROM t", "SELECT"),
+        ("-- comment\nINSERT INTO t VALUES (1)", "INSERT"),
+        ("FROM t", None),
+        ("", None),
+    ],
+)
+def test_query_type(sql, query_type):
+    assert ParsedCell(sql).query_type == query_type
+
+
+def test_parses_once():
+    cell = ParsedCell("SELECT * FROM a JOIN b ON a.x = b.x; SELECT 1")
+
+    with patch("sql.cell.parse_statements", wraps=parse_statements) as parse:
+        assert [statement.type for statement in cell.statements] == [
+            "SELECT",
+            "SELECT",
+        ]
+        assert cell.query_type == "SELECT"
+
+    parse.assert_called_once()
+    assert cell.tables == ["a", "b"]
+    assert cell.tables is cell.tables
+
+
+def test_as_parsed_cell():
+    cell = ParsedCell("SELECT 1")
+
+    assert as_parsed_cell(cell) is cell
+    assert as_parsed_cell("SELECT 1").sql == "SELECT 1"
+
+
+@pytest.mark.parametrize(
+    "sql, expected",
+    [
+        ("SELECT * FROM t", True),
+        ("-- comment\nSUMMARIZE t", True),
+        ("FROM t", True),
+        ("CREATE TABLE t (x INT)", False),
+    ],
+)
+def test_detect_duckdb_summarize_or_select_parsed(sql, expected):
+    (statement,) = parse_statements(sql)
+
+    assert detect_duckdb_summarize_or_select(statement) is expected
+    assert detect_duckdb_summarize_or_select(sql) is expected
+
+
+def test_infer_dependencies_from_parsed_cell():
+    store = SQLStore()
+    store.store("first", "SELECT * FROM a")
+
+    assert store.infer_dependencies(ParsedCell("SELECT * FROM first"), None) == [
+        "first"
+    ]
+
+
+def test_magic_parses_the_cell_once(ip):
+    with patch("sql.cell.parse_statements", wraps=parse_statements) as parse, patch(
+        "sql.connection.connection.sqlparse"
+    ) as sqlparse_connection:
+        result = ip.run_cell("%%sql\nSELECT * FROM test;\nSELECT * FROM test").result
+
+    parse.assert_called_once()
+    sqlparse_connection.split.assert_not_called()
+    assert [result_set.dict() for result_set in result] == [
+        {"n": (1, 2), "name": ("foo", "bar")}
+    ] * 2
@@ -1,5 +1,9 @@
+from datetime import datetime
+from decimal import Decimal
+
 import pytest
 
+from sql.column_guesser import Column, is_quantity_column
 from sql.magic import SqlMagic
 from sql import _current
 from IPython.core.interactiveshell import InteractiveShell
@@ -123,3 +127,42 @@ class TestTwoStrThreeNum(Harness):
         results.guess_plot_columns()
         assert results.ys == [[1.02, 2.02, 3.02], [1.04, 2.04, 3.04]]
         assert results.x == [1.01, 2.01, 3.01]
+
+
+@pytest.mark.parametrize(
+    "values, expected",
+    [
+        ([1, 2.5, None], True),
+        ([Decimal("1.1"), datetime(2024, 1, 1), None], True),
+        ([None, None], True),
+        ([], True),
+        ([1, "a"], False),
+        (["a", None], False),
+    ],
+)
+def test_is_quantity_column(values, expected):
+    assert is_quantity_column(values) is expected
+
+
+def test_column():
+    column = Column([1, 2], name="x", is_quantity=False)
+
+    assert column == [1, 2]
+    assert column.name == "x"
+    assert not column.is_quantity
+    assert Column() == []
+    assert Column().is_quantity
+
+
+def test_plot_columnar_results(tbl):
+    ip.run_line_magic("config", "SqlMagic.columnar_results = True")
+
+    try:
+        results = sql_env.query("SELECT name, y1, name2, y2, y3 FROM manycoltbl")
+        results.guess_plot_columns()
+    finally:
+        ip.run_line_magic("config", "SqlMagic.columnar_results = False")
+
+    assert results.ys == [[1.02, 2.02, 3.02], [1.04, 2.04, 3.04]]
+    assert results.x == [1.01, 2.01, 3.01]
+    assert results.x.name == "y1"
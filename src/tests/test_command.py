@@ -175,6 +175,11 @@ def test_args(ip, sql_magic):
         "save": None,
         "with_": ["author_one"],
         "no_execute": False,
+        "export": None,
+        "no_cache": False,
+        "timeout": None,
+        "async_": False,
+        "parallel": None,
     }
 
 
@@ -1,3 +1,5 @@
+import dataclasses
+import gc
 import os
 import sys
 from unittest.mock import ANY, Mock, patch
@@ -25,6 +27,7 @@ from sql.connection import (
     is_spark,
     ResultSetCollection,
     detect_duckdb_summarize_or_select,
+    transpile_query,
 )
 from sql.warnings import JupySQLRollbackPerformed
 from sql.connection import error_handling
@@ -111,6 +114,35 @@ def test_get_database_information():
     }
 
 
+def test_capabilities():
+    conn = SQLAlchemyConnection(engine=create_engine("sqlite://"))
+
+    capabilities = conn.capabilities
+
+    assert capabilities.dialect == "sqlite"
+    assert capabilities.driver == "pysqlite"
+    assert capabilities.sqlglot_dialect == "sqlite"
+    assert capabilities.use_backticks
+    assert set(capabilities.identifiers) >= {"", '"', "`"}
+
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        capabilities.dialect = "duckdb"
+
+
+def test_capabilities_are_resolved_once(monkeypatch):
+    conn = SQLAlchemyConnection(engine=create_engine("sqlite://"))
+    get_database_information = Mock(wraps=conn._get_database_information)
+    monkeypatch.setattr(conn, "_get_database_information", get_database_information)
+
+    for _ in range(3):
+        conn.is_use_backtick_template()
+        conn.get_curr_identifiers()
+        conn._transpile_query("SELECT 1")
+
+    # once for the capabilities and once for the sqlglot dialect
+    assert get_database_information.call_count == 2
+
+
 def test_get_sqlglot_dialect_no_curr_connection(mock_database, monkeypatch):
     conn = SQLAlchemyConnection(engine=sqlalchemy.create_engine("someurl://"))
     monkeypatch.setattr(conn, "_get_database_information", lambda: {"dialect": None})
@@ -1050,6 +1082,46 @@ def test_transpile_query(monkeypatch, fixture_name, request, query_input, query_
     assert transpiled == query_output
 
 
+def test_transpile_query_is_cached(monkeypatch, conn_sqlalchemy_duckdb):
+    monkeypatch.setattr(conn_sqlalchemy_duckdb, "_get_sqlglot_dialect", lambda: "tsql")
+    transpile_query.cache_clear()
+
+    with patch.object(sqlglot, "parse", wraps=sqlglot.parse) as parse:
+        first = conn_sqlalchemy_duckdb._transpile_query("SELECT * FROM foo LIMIT 1")
+        second = conn_sqlalchemy_duckdb._transpile_query("SELECT * FROM foo LIMIT 1")
+
+    assert first == second == "SELECT TOP 1 * FROM foo"
+    parse.assert_called_once()
+
+    info = transpile_query.cache_info()
+    assert (info.hits, info.misses) == (1, 1)
+
+    # the dialect is part of the key
+    assert transpile_query("SELECT * FROM foo LIMIT 1", "postgres") == (
+        "SELECT * FROM foo LIMIT 1"
+    )
+
+
+@pytest.mark.parametrize(
+    "fixture_name",
+    [
+        "mock_sqlalchemy_execute",
+        "mock_dbapi_execute",
+    ],
+    ids=[
+        "sqlalchemy",
+        "dbapi",
+    ],
+)
+def test_execute_without_transpiling(fixture_name, request):
+    mock_execute, conn = request.getfixturevalue(fixture_name)
+    conn._is_duckdb_native = False
+
+    conn.execute("SELECT * FROM foo LIMIT 1", transpile=False)
+
+    assert str(mock_execute.call_args_list[0][0][0]) == "SELECT * FROM foo LIMIT 1"
+
+
 def test_transpile_query_doesnt_transpile_if_it_doesnt_need_to(monkeypatch):
     conn = SQLAlchemyConnection(engine=create_engine("duckdb://"))
 
@@ -1317,3 +1389,252 @@ def test_database_in_directory_that_doesnt_exist(tmp_empty, uri, expected):
 )
 def test_detect_duckdb_summarize_or_select(query, expected_output):
     assert detect_duckdb_summarize_or_select(query) == expected_output
+
+
+SLOW_QUERY = {
+    "duckdb": "SELECT COUNT(*) FROM range(100000000) a, range(100) b",
+    "sqlite": (
+        "WITH RECURSIVE r(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM r) "
+        "SELECT COUNT(*) FROM r"
+    ),
+}
+
+
+@pytest.mark.parametrize(
+    "make_connection, database",
+    [
+        (lambda: SQLAlchemyConnection(create_engine("duckdb://")), "duckdb"),
+        (lambda: SQLAlchemyConnection(create_engine("sqlite://")), "sqlite"),
+        (lambda: DBAPIConnection(duckdb.connect()), "duckdb"),
+        (lambda: DBAPIConnection(sqlite3.connect(":memory:")), "sqlite"),
+    ],
+    ids=["duckdb-sqlalchemy", "sqlite-sqlalchemy", "duckdb-dbapi", "sqlite-dbapi"],
+)
+def test_cancellable_timeout(cleanup, make_connection, database):
+    conn = make_connection()
+
+    with pytest.raises(UsageError) as excinfo:
+        with conn.cancellable(timeout=1):
+            conn.raw_execute(SLOW_QUERY[database])
+
+    assert excinfo.value.error_type == "RuntimeError"
+    assert "took longer than the timeout (1 seconds)" in str(excinfo.value)
+    # the connection can run more queries
+    assert conn.raw_execute("SELECT 42").fetchall() == [(42,)]
+
+
+def test_cancellable_does_not_cancel_finished_statements(cleanup, monkeypatch):
+    conn = SQLAlchemyConnection(create_engine("duckdb://"))
+    cancel = Mock()
+    monkeypatch.setattr(conn, "_cancel_function", lambda: cancel)
+
+    with conn.cancellable(timeout=1):
+        conn.raw_execute("SELECT 42")
+
+    assert not cancel.called
+
+
+def test_cancellable_keyboard_interrupt(cleanup, monkeypatch):
+    conn = SQLAlchemyConnection(create_engine("duckdb://"))
+    cancel = Mock()
+    rollback = Mock()
+    monkeypatch.setattr(conn, "_cancel_function", lambda: cancel)
+    monkeypatch.setattr(conn, "_rollback_after_cancel", rollback)
+
+    with pytest.raises(KeyboardInterrupt):
+        with conn.cancellable():
+            raise KeyboardInterrupt
+
+    cancel.assert_called_once_with()
+    rollback.assert_called_once_with()
+
+
+def test_cancellable_without_cancel_support(cleanup, monkeypatch, capsys):
+    conn = SQLAlchemyConnection(create_engine("duckdb://"))
+    monkeypatch.setattr(conn, "_cancel_function", lambda: None)
+
+    with conn.cancellable(timeout=1):
+        conn.raw_execute("SELECT 42")
+
+    assert "doesn't support cancelling queries" in capsys.readouterr().out
+
+
+def test_server_side_timeout(cleanup, monkeypatch):
+    conn = SQLAlchemyConnection(create_engine("duckdb://"))
+    connection = Mock()
+    monkeypatch.setattr(conn, "_dialect", "postgresql")
+    monkeypatch.setattr(conn, "_connection_sqlalchemy", connection)
+
+    assert conn._set_server_side_timeout(5)
+    assert conn._set_server_side_timeout(5)
+    assert conn._set_server_side_timeout(0)
+
+    assert connection.exec_driver_sql.call_args_list == [
+        ((("SET statement_timeout = 5000",),)),
+        ((("SET statement_timeout = 0",),)),
+    ]
+
+
+def test_server_side_timeout_is_set_again_in_copies(cleanup, monkeypatch):
+    conn = SQLAlchemyConnection(create_engine("duckdb://"))
+    monkeypatch.setattr(conn, "_dialect", "postgresql")
+    monkeypatch.setattr(conn, "_connection_sqlalchemy", Mock())
+    conn._set_server_side_timeout(5)
+
+    worker = conn._checkout_connection()
+    connection = Mock()
+    worker._connection_sqlalchemy = connection
+
+    # the connection from the pool might have another timeout
+    assert worker._server_side_timeout is None
+    assert worker._set_server_side_timeout(5)
+    assert worker._set_server_side_timeout(5)
+
+    assert connection.exec_driver_sql.call_args_list == [
+        ((("SET statement_timeout = 5000",),)),
+    ]
+
+
+def test_cancellable_stops_prefetch_before_setting_timeout(cleanup, monkeypatch):
+    conn = SQLAlchemyConnection(create_engine("duckdb://"))
+    calls = []
+    monkeypatch.setattr(
+        conn._result_sets, "stop_prefetch", lambda: calls.append("stop_prefetch")
+    )
+    monkeypatch.setattr(
+        conn,
+        "_set_server_side_timeout",
+        lambda timeout: calls.append("set_timeout") or True,
+    )
+
+    with conn.cancellable(timeout=5):
+        pass
+
+    assert calls == ["stop_prefetch", "set_timeout"]
+
+
+def test_server_side_timeout_error(cleanup, monkeypatch):
+    conn = SQLAlchemyConnection(create_engine("duckdb://"))
+    rollback = Mock()
+    monkeypatch.setattr(conn, "_set_server_side_timeout", lambda timeout: True)
+    monkeypatch.setattr(conn, "_rollback_after_cancel", rollback)
+
+    with pytest.raises(UsageError) as excinfo:
+        with conn.cancellable(timeout=5):
+            raise Exception("canceling statement due to statement timeout")
+
+    assert "took longer than the timeout (5 seconds)" in str(excinfo.value)
+    rollback.assert_called_once_with()
+
+
+@pytest.fixture
+def ip_pooled(ip_empty, tmp_empty):
+    ip_empty.run_cell("%config SqlMagic.connection_pooling = True")
+    ip_empty.run_cell("%config SqlMagic.pool_size = 2")
+    ip_empty.run_cell("%sql duckdb:///pooled.duckdb")
+    ip_empty.run_cell("%sql CREATE TABLE numbers AS SELECT * FROM range(1000)")
+    yield ip_empty
+    ConnectionManager.close_all()
+
+
+def test_connection_pooling_options(ip_empty, tmp_empty):
+    ip_empty.run_cell("%config SqlMagic.connection_pooling = True")
+    ip_empty.run_cell("%config SqlMagic.pool_size = 3")
+    ip_empty.run_cell("%config SqlMagic.pool_recycle = 60")
+    ip_empty.run_cell("%sql sqlite:///pooled.db")
+
+    pool = ConnectionManager.current._connection.engine.pool
+
+    assert ConnectionManager.current._pooled
+    assert pool.size() == 3
+    assert pool._pre_ping
+    assert pool._recycle == 60
+
+
+def test_connection_pooling_disabled_for_in_memory_databases(ip_empty):
+    ip_empty.run_cell("%config SqlMagic.connection_pooling = True")
+    ip_empty.run_cell("%sql duckdb://")
+    ip_empty.run_cell("%sql CREATE TABLE numbers AS SELECT * FROM range(10)")
+
+    assert not ConnectionManager.current._pooled
+    assert len(ip_empty.run_cell("%sql SELECT * FROM numbers").result) == 10
+
+
+def test_connection_pooling_returns_connections(ip_pooled):
+    conn = ConnectionManager.current
+    pool = conn._connection.engine.pool
+
+    result = ip_pooled.run_line_magic("sql", "SELECT * FROM numbers")
+
+    # the results still need the connection to fetch the remaining rows
+    assert pool.checkedout() == 2
+    assert result._conn._pool_parent is conn
+
+    result.fetchall()
+
+    assert pool.checkedout() == 1
+    assert result._conn is conn
+    assert len(result) == 1000
+
+
+def test_connection_pooling_results_do_not_share_cursors(ip_pooled):
+    first = ip_pooled.run_line_magic("sql", "SELECT * FROM numbers")
+    second = ip_pooled.run_line_magic("sql", "SELECT * FROM numbers WHERE range < 10")
+
+    assert len(first) == 1000
+    assert len(second) == 10
+    assert first.reexecutions == second.reexecutions == 0
+
+
+def test_connection_pooling_releases_least_recent_results(ip_pooled):
+    conn = ConnectionManager.current
+    pool = conn._connection.engine.pool
+
+    results = [
+        ip_pooled.run_line_magic("sql", f"SELECT * FROM numbers WHERE range < {n}")
+        for n in (100, 200, 300)
+    ]
+
+    assert pool.checkedout() == 3
+    assert results[0]._conn is conn
+    assert [len(result) for result in results] == [100, 200, 300]
+    assert [result.reexecutions for result in results] == [1, 0, 0]
+
+
+def test_connection_pooling_releases_garbage_collected_results(ip_pooled):
+    pool = ConnectionManager.current._connection.engine.pool
+
+    result = ip_pooled.run_line_magic("sql", "SELECT * FROM numbers")
+    assert pool.checkedout() == 2
+
+    del result
+    gc.collect()
+
+    assert pool.checkedout() == 1
+
+
+def test_connection_pooling_releases_connection_on_error(ip_pooled):
+    pool = ConnectionManager.current._connection.engine.pool
+
+    with pytest.raises(UsageError):
+        ip_pooled.run_cell("%sql SELECT * FROM not_a_table")
+
+    assert pool.checkedout() == 1
+
+
+def test_connection_pooling_multiple_queries(ip_pooled):
+    pool = ConnectionManager.current._connection.engine.pool
+
+    results = ip_pooled.run_cell(
+        "%sql SELECT * FROM numbers; SELECT * FROM numbers WHERE range < 500"
+    ).result
+
+    # both results share the same pooled connection
+    assert pool.checkedout() == 2
+
+    results[0].fetchall()
+    assert pool.checkedout() == 2
+
+    results[1].fetchall()
+    assert pool.checkedout() == 1
+    assert [len(result) for result in results] == [1000, 500]
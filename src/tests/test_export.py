@@ -0,0 +1,158 @@
+import gzip
+import json
+from pathlib import Path
+
+import pytest
+import pyarrow.parquet as pq
+from IPython.core.error import UsageError
+from sqlalchemy import create_engine
+
+from sql.connection import SQLAlchemyConnection
+from sql.run import export, resultset
+
+from conftest import make_result_set
+
+
+NUMBERS = "SELECT x, 'n' || x::VARCHAR AS name FROM numbers"
+
+
+@pytest.fixture(params=[False, True], ids=["rows", "arrow"])
+def result_set(request, numbers_conn, result_set_config):
+    result_set_config.columnar_results = request.param
+    return make_result_set(numbers_conn, result_set_config, NUMBERS)
+
+
+def _expected_csv():
+    return "x,name\r\n" + "".join(f"{i},n{i}\r\n" for i in range(10))
+
+
+def test_to_csv(result_set, tmp_empty):
+    assert result_set.to_csv("numbers.csv", batch_size=3) == 10
+    assert Path("numbers.csv").read_bytes().decode() == _expected_csv()
+    # rows are not kept in memory
+    assert len(result_set._results) == 2
+
+
+def test_to_csv_gzip(result_set, tmp_empty):
+    assert result_set.to_csv("numbers.csv.gz") == 10
+
+    with gzip.open("numbers.csv.gz", "rt", newline="") as f:
+        assert f.read() == _expected_csv()
+
+
+def test_to_csv_explicit_compression(result_set, tmp_empty):
+    result_set.to_csv("numbers.csv", compression="gzip")
+
+    with gzip.open("numbers.csv", "rt", newline="") as f:
+        assert f.read() == _expected_csv()
+
+
+def test_to_csv_zstd(result_set, tmp_empty):
+    zstandard = pytest.importorskip("zstandard")
+
+    result_set.to_csv("numbers.csv.zst")
+
+    with zstandard.open("numbers.csv.zst", "rt", newline="") as f:
+        assert f.read() == _expected_csv()
+
+
+def test_to_csv_format_params(result_set, tmp_empty):
+    result_set.to_csv("numbers.csv", delimiter=";", lineterminator="\n")
+
+    assert Path("numbers.csv").read_text().splitlines()[:2] == ["x;name", "0;n0"]
+
+
+def test_to_csv_invalid_compression(result_set, tmp_empty):
+    with pytest.raises(UsageError) as excinfo:
+        result_set.to_csv("numbers.csv", compression="bz2")
+
+    assert excinfo.value.error_type == "ValueError"
+    assert "Invalid compression: 'bz2'" in str(excinfo.value)
+
+
+def test_to_ndjson(result_set, tmp_empty):
+    assert result_set.to_ndjson("numbers.ndjson.gz", batch_size=4) == 10
+
+    with gzip.open("numbers.ndjson.gz", "rt") as f:
+        rows = [json.loads(line) for line in f]
+
+    assert rows == [{"x": i, "name": f"n{i}"} for i in range(10)]
+
+
+def test_to_parquet(result_set, tmp_empty):
+    assert result_set.to_parquet("numbers.parquet", batch_size=4) == 10
+
+    table = pq.read_table("numbers.parquet")
+
+    assert table.column_names == ["x", "name"]
+    assert table.column("x").to_pylist() == list(range(10))
+
+
+def test_to_parquet_empty_result(numbers_conn, result_set_config, tmp_empty):
+    rs = make_result_set(numbers_conn, result_set_config, f"{NUMBERS} WHERE x > 100")
+
+    assert rs.to_parquet("empty.parquet") == 0
+    assert pq.read_table("empty.parquet").column_names == ["x", "name"]
+
+
+def test_to_parquet_leading_nulls(result_set_config, tmp_empty):
+    conn = SQLAlchemyConnection(create_engine("sqlite://"))
+    conn.execute("CREATE TABLE t (x INTEGER, y TEXT)")
+    conn.execute(
+        "INSERT INTO t VALUES "
+        "(NULL, NULL), (NULL, NULL), (NULL, NULL), (NULL, NULL), (1, 'a'), (2, 'b')"
+    )
+
+    rs = make_result_set(conn, result_set_config, "SELECT * FROM t")
+
+    assert rs.to_parquet("nulls.parquet", batch_size=2) == 6
+
+    table = pq.read_table("nulls.parquet")
+    assert table.column("x").to_pylist() == [None, None, None, None, 1, 2]
+    assert table.column("y").to_pylist() == [None, None, None, None, "a", "b"]
+    assert str(table.schema.field("x").type) == "int64"
+
+
+def test_to_parquet_column_type_changes(result_set_config, tmp_empty, monkeypatch):
+    monkeypatch.setattr(resultset, "_ARROW_SCHEMA_SAMPLE_ROWS", 2)
+    conn = SQLAlchemyConnection(create_engine("sqlite://"))
+    conn.execute("CREATE TABLE t (x INTEGER)")
+    conn.execute("INSERT INTO t VALUES (NULL), (NULL), (NULL), (NULL), (1)")
+
+    result_set_config.displaylimit = 1
+    rs = make_result_set(conn, result_set_config, "SELECT * FROM t")
+
+    with pytest.raises(UsageError) as excinfo:
+        rs.to_parquet("nulls.parquet", batch_size=2)
+
+    assert "the type of column(s) 'x' changed after 4 rows" in str(excinfo.value)
+
+
+@pytest.mark.parametrize(
+    "path, expected",
+    [
+        ("data.csv", "csv"),
+        ("data.CSV", "csv"),
+        ("data.csv.gz", "csv"),
+        ("data.parquet", "parquet"),
+        ("data.ndjson.zst", "ndjson"),
+        ("data.jsonl", "ndjson"),
+    ],
+)
+def test_infer_format(path, expected):
+    assert export.infer_format(path) == expected
+
+
+@pytest.mark.parametrize("path", ["data", "data.txt", "data.gz"])
+def test_infer_format_error(path):
+    with pytest.raises(UsageError) as excinfo:
+        export.infer_format(path)
+
+    assert "Cannot infer the export format" in str(excinfo.value)
+
+
+def test_export_parquet_with_compression_extension(result_set, tmp_empty):
+    with pytest.raises(UsageError) as excinfo:
+        export.export(result_set, "numbers.parquet.gz")
+
+    assert "Parquet files are compressed internally" in str(excinfo.value)
@@ -0,0 +1,218 @@
+import threading
+import time
+from unittest.mock import Mock
+
+import duckdb
+import pandas as pd
+import pytest
+from IPython.core.error import UsageError
+
+from sql import _current
+from sql.connection import ConnectionManager
+from sql.run import future as future_module
+from sql.run.future import QueryFuture
+from sql.run.resultset import ResultSet
+
+
+@pytest.fixture
+def ip_async(ip_empty, tmp_path):
+    ip_empty.run_cell(f"%sql sqlite:///{tmp_path / 'async.db'}")
+    ip_empty.run_cell("%sql CREATE TABLE numbers AS SELECT 1 AS x UNION SELECT 2")
+    yield ip_empty
+
+
+def test_async_returns_future(ip_async):
+    future = ip_async.run_cell("%sql --async SELECT * FROM numbers ORDER BY x").result
+
+    assert isinstance(future, QueryFuture)
+
+    result = future.result(timeout=10)
+
+    assert future.done()
+    assert future.status == "done"
+    assert isinstance(result, ResultSet)
+    assert result._done_fetching()
+    assert result.dict() == {"x": (1, 2)}
+    # the results are bound to the user's connection, not the worker's
+    assert result._conn is ConnectionManager.current
+
+
+def test_async_cell_assigns_future(ip_async):
+    ip_async.run_cell(
+        """%%sql future <<  --async
+SELECT * FROM numbers
+"""
+    )
+
+    assert isinstance(ip_async.user_ns["future"], QueryFuture)
+    assert len(ip_async.user_ns["future"].result(timeout=10)) == 2
+
+
+def test_async_runs_on_separate_connections(ip_async):
+    first = ip_async.run_cell("%sql --async SELECT * FROM numbers").result
+    second = ip_async.run_cell("%sql --async SELECT * FROM numbers").result
+
+    assert first._worker is not ConnectionManager.current
+    assert first._worker is not second._worker
+    assert len(first.result(timeout=10)) == len(second.result(timeout=10)) == 2
+
+
+def test_async_with_native_duckdb(ip_empty):
+    conn = duckdb.connect()
+    ip_empty.push({"conn": conn})
+    ip_empty.run_cell("%sql conn")
+    ip_empty.run_cell("%sql CREATE TABLE numbers AS SELECT * FROM range(5)")
+
+    futures = [
+        ip_empty.run_cell("%sql --async SELECT * FROM numbers").result
+        for _ in range(3)
+    ]
+
+    assert all(future._worker is not ConnectionManager.current for future in futures)
+    assert [len(future.result(timeout=10)) for future in futures] == [5, 5, 5]
+
+
+def test_async_shares_in_memory_duckdb_connection(ip_empty):
+    ip_empty.run_cell("%sql duckdb://")
+    ip_empty.run_cell("%sql CREATE TABLE numbers AS SELECT * FROM range(5)")
+
+    future = ip_empty.run_cell("%sql --async SELECT * FROM numbers").result
+
+    assert future._worker is ConnectionManager.current
+    assert len(future.result(timeout=10)) == 5
+
+
+def test_async_and_sync_queries_on_shared_connection(ip_empty, monkeypatch):
+    ip_empty.run_cell("%sql duckdb://")
+    ip_empty.run_cell("%sql CREATE TABLE numbers AS SELECT * FROM range(5)")
+
+    started = threading.Event()
+    events = []
+
+    def run_statements(*args, **kwargs):
+        started.set()
+        # give the synchronous query time to start while this one runs
+        time.sleep(0.5)
+        result = original_run_statements(*args, **kwargs)
+        events.append("async")
+        return result
+
+    original_run_statements = future_module.run_statements
+    monkeypatch.setattr(future_module, "run_statements", run_statements)
+
+    future = ip_empty.run_cell(
+        "%sql --async SELECT SUM(range) AS total FROM numbers"
+    ).result
+    started.wait(timeout=10)
+
+    assert future._worker is ConnectionManager.current
+
+    result = ip_empty.run_cell("%sql SELECT 42 AS x").result
+    events.append("sync")
+
+    # the synchronous query waited for the one in the background
+    assert events == ["async", "sync"]
+    assert result.dict() == {"x": (42,)}
+    assert future.result(timeout=10).dict() == {"total": (10,)}
+
+
+def test_async_result_does_not_run_again(ip_empty, tmp_empty):
+    ip_empty.run_cell("%sql duckdb:///async.duckdb")
+    ip_empty.run_cell("%sql CREATE TABLE numbers AS SELECT range AS x FROM range(5)")
+
+    result = ip_empty.run_cell(
+        "%sql --async SELECT * FROM numbers WHERE x < 3"
+    ).result.result(timeout=10)
+
+    assert result.DataFrame()["x"].tolist() == [0, 1, 2]
+    assert result.PolarsDataFrame()["x"].to_list() == [0, 1, 2]
+    assert result._reexecutions == 0
+
+
+def test_async_in_memory_sqlite(ip_empty):
+    ip_empty.run_cell("%sql sqlite://")
+
+    with pytest.raises(UsageError) as excinfo:
+        ip_empty.run_cell("%sql --async SELECT 1")
+
+    assert "in-memory SQLite" in str(excinfo.value)
+
+
+def test_async_autopandas(ip_async):
+    ip_async.run_cell("%config SqlMagic.autopandas = True")
+
+    future = ip_async.run_cell("%sql --async SELECT * FROM numbers").result
+
+    assert isinstance(future.result(timeout=10), pd.DataFrame)
+
+
+def test_async_autolimit(ip_async):
+    ip_async.run_cell("%config SqlMagic.autolimit = 1")
+
+    future = ip_async.run_cell("%sql --async SELECT * FROM numbers").result
+
+    assert len(future.result(timeout=10)) == 1
+
+
+def test_async_multiple_queries(ip_async):
+    future = ip_async.run_cell(
+        "%sql --async SELECT * FROM numbers; SELECT COUNT(*) AS n FROM numbers"
+    ).result
+
+    results = future.result(timeout=10)
+
+    assert [result.dict() for result in results] == [{"x": (1, 2)}, {"n": (2,)}]
+    assert all(result._conn is ConnectionManager.current for result in results)
+
+
+def test_async_error(ip_async):
+    future = ip_async.run_cell("%sql --async SELECT * FROM not_a_table").result
+
+    assert "no such table" in str(future.exception(timeout=10))
+    assert future.status == "failed"
+
+    with pytest.raises(UsageError) as excinfo:
+        future.result()
+
+    assert excinfo.value.error_type == "RuntimeError"
+    assert "no such table" in str(excinfo.value)
+
+
+def test_async_with_column_local_vars(ip_async):
+    ip_async.run_cell("%config SqlMagic.column_local_vars = True")
+
+    with pytest.raises(UsageError) as excinfo:
+        ip_async.run_cell("%sql --async SELECT * FROM numbers")
+
+    assert "column_local_vars" in str(excinfo.value)
+
+
+def test_result_before_starting(ip_async):
+    future = QueryFuture(
+        ConnectionManager.current, "SELECT 1", _current._get_sql_magic()
+    )
+
+    assert future.status == "pending"
+
+    with pytest.raises(UsageError) as excinfo:
+        future.result()
+
+    assert excinfo.value.error_type == "RuntimeError"
+
+
+def test_displays_live_status(ip_async, monkeypatch):
+    handle = Mock()
+    monkeypatch.setattr(future_module, "display", Mock(return_value=handle))
+    monkeypatch.setattr(future_module, "STATUS_REFRESH_INTERVAL", 0.01)
+
+    future = QueryFuture(
+        ConnectionManager.current, "SELECT * FROM numbers", _current._get_sql_magic()
+    )
+    future._ipython_display_()
+
+    assert repr(future_module.display.call_args[0][0]) == "Query hasn't started"
+
+    future.start().wait(timeout=10)
+
+    message = handle.update.call_args[0][0]
+    assert repr(message).startswith("Query finished in")
@@ -0,0 +1,53 @@
+import subprocess
+import sys
+
+import pytest
+
+from sql._lazy import LazyModule, lazy_import
+
+
+def test_lazy_import_missing_package():
+    assert lazy_import("some_missing_package") is None
+    assert lazy_import("some_missing_package.submodule") is None
+
+
+def test_lazy_import_defers_import(monkeypatch):
+    monkeypatch.delitem(sys.modules, "json.tool", raising=False)
+
+    module = lazy_import("json.tool")
+
+    assert isinstance(module, LazyModule)
+    assert repr(module) == "<lazy module 'json.tool'>"
+    assert "json.tool" not in sys.modules
+
+    assert callable(module.main)
+    assert "json.tool" in sys.modules
+
+
+def test_lazy_module_sees_patched_attributes(monkeypatch):
+    import json
+
+    module = lazy_import("json")
+    monkeypatch.setattr(json, "dumps", "patched")
+
+    assert module.dumps == "patched"
+
+
+def test_lazy_module_missing_attribute():
+    with pytest.raises(AttributeError):
+        lazy_import("json").not_an_attribute
+
+
+def test_loading_the_extension_does_not_import_optional_packages():
+    code = (
+        "import sys\n"
+        "import sql.magic\n"
+        "optional = {'pandas', 'matplotlib', 'numpy', 'pyarrow', 'ipywidgets'}\n"
+        "print(sorted((optional | {'sqlglot'}) & set(sys.modules)))"
+    )
+
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+
+    assert result.stdout.strip() == "[]"
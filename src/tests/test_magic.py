@@ -1,5 +1,6 @@
 from unittest.mock import ANY
 import uuid
+import gzip
 import logging
 import platform
 import sqlite3
@@ -20,7 +21,7 @@ from sqlalchemy import create_engine
 from IPython.core.error import UsageError
 from sql.connection import ConnectionManager
 from sql.magic import SqlMagic, get_query_type
-from sql.run.resultset import ResultSet
+from sql.run.resultset import MultiResultSet, ResultSet
 from sql import magic
 from sql.warnings import JupySQLQuotedNamedParametersWarning
 from sql._testing import TestingShell
@@ -220,7 +221,7 @@ def test_duplicate_column_names_accepted(ip):
 
 
 def test_persist_missing_pandas(ip, monkeypatch):
-    monkeypatch.setattr(magic, "DataFrame", None)
+    monkeypatch.setattr(magic, "pd", None)
 
     ip.run_cell("results = %sql SELECT * FROM test;")
     ip.run_cell("results_dframe = results.DataFrame()")
@@ -679,6 +680,81 @@ def test_displaylimit_enabled_with_invalid_values(
     assert expected_error_msg in caplog.text
 
 
+@pytest.mark.parametrize(
+    "option",
+    [
+        "background_fetch_max_bytes",
+        "fetch_batch_size",
+        "pool_recycle",
+        "pool_size",
+        "prefetch_rows",
+        "query_cache_disk_max_bytes",
+        "query_timeout",
+        "result_memory_limit",
+    ],
+)
+def test_fetch_options_with_negative_values(ip, option, caplog):
+    with caplog.at_level(logging.ERROR):
+        ip.run_cell(f"%config SqlMagic.{option} = -1")
+
+    assert f"-1: {option} cannot be a negative integer" in caplog.text
+
+
+def test_fetch_options(ip):
+    ip.run_cell("%config SqlMagic.fetch_batch_size = 1")
+    ip.run_cell("%config SqlMagic.prefetch_rows = 3")
+
+    result = runsql(ip, "SELECT * FROM test;")
+
+    # the preview fetched all the rows
+    assert result.round_trips == 1
+    assert len(result) == 2
+    assert result.round_trips == 1
+
+
+def test_result_memory_limit(ip):
+    ip.run_cell("%config SqlMagic.result_memory_limit = 1")
+
+    result = runsql(ip, "SELECT * FROM test UNION ALL SELECT * FROM test;")
+
+    assert result.dict() == {"n": (1, 2, 1, 2), "name": ("foo", "bar", "foo", "bar")}
+    assert result._results.spilled
+
+
+SLOW_QUERY = (
+    "WITH RECURSIVE r(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM r) "
+    "SELECT COUNT(*) FROM r"
+)
+
+
+def test_timeout(ip):
+    with pytest.raises(UsageError) as excinfo:
+        ip.run_cell(f"%sql --timeout 1 {SLOW_QUERY}")
+
+    assert excinfo.value.error_type == "RuntimeError"
+    assert "took longer than the timeout (1 seconds)" in str(excinfo.value)
+    assert runsql(ip, "SELECT * FROM test;").dict() == {
+        "n": (1, 2),
+        "name": ("foo", "bar"),
+    }
+
+
+def test_query_timeout(ip):
+    ip.run_cell("%config SqlMagic.query_timeout = 1")
+
+    with pytest.raises(UsageError) as excinfo:
+        ip.run_cell(f"%sql {SLOW_QUERY}")
+
+    assert "took longer than the timeout (1 seconds)" in str(excinfo.value)
+
+
+def test_negative_timeout(ip):
+    with pytest.raises(UsageError) as excinfo:
+        ip.run_cell("%sql --timeout -1 SELECT * FROM test")
+
+    assert "--timeout cannot be a negative integer" in str(excinfo.value)
+
+
 @pytest.mark.parametrize(
     "query_clause, expected_truncated_length",
     [
@@ -861,6 +937,31 @@ def test_csv_to_file(ip):
             assert len(content.splitlines()) == 3
 
 
+@pytest.mark.parametrize("autopandas", [False, True])
+def test_export(ip, tmp_empty, capsys, autopandas):
+    ip.run_line_magic("config", f"SqlMagic.autopandas = {autopandas}")
+
+    result = ip.run_cell("%sql --export test.csv SELECT * FROM test").result
+
+    assert result is None
+    assert Path("test.csv").read_text().splitlines() == ["n,name", "1,foo", "2,bar"]
+    assert "Exported 2 rows to test.csv" in capsys.readouterr().out
+
+
+def test_export_cell_magic(ip, tmp_empty):
+    ip.run_cell(
+        """%%sql --export test.ndjson.gz
+SELECT * FROM test
+"""
+    )
+
+    with gzip.open("test.ndjson.gz", "rt") as f:
+        assert f.read().splitlines() == [
+            '{"n": 1, "name": "foo"}',
+            '{"n": 2, "name": "bar"}',
+        ]
+
+
 def test_sql_from_file(ip):
     ip.run_line_magic("config", "SqlMagic.autopandas = False")
     with tempfile.TemporaryDirectory() as tempdir:
@@ -2480,9 +2581,50 @@ SELECT 2;
 )
 def test_query_comment_after_semicolon(ip, query, expected):
     result = ip.run_cell(query).result
+
+    if isinstance(result, MultiResultSet):
+        result = result[-1]
+
     assert list(result.dict().values())[-1][0] == expected
 
 
+def test_multiple_queries(ip):
+    result = ip.run_cell(
+        """%%sql
+SELECT * FROM author WHERE last_name = 'Shakespeare';
+SELECT COUNT(*) AS n FROM author"""
+    ).result
+
+    assert isinstance(result, MultiResultSet)
+    assert len(result) == 2
+    assert result[1].dict() == {"n": (2,)}
+
+    out = repr(result)
+    assert "SELECT * FROM author WHERE last_name = 'Shakespeare' (" in out
+    assert "SELECT COUNT(*) AS n FROM author (" in out
+    html = result._repr_html_()
+    assert html.count("<table") == 2
+    assert "<code>SELECT COUNT(*) AS n FROM author (" in html
+
+
+def test_multiple_queries_autopandas(ip):
+    ip.run_cell("%config SqlMagic.autopandas = True")
+
+    result = ip.run_cell("%sql SELECT * FROM author; SELECT * FROM website").result
+
+    assert all(isinstance(df, pd.DataFrame) for df in result)
+    assert "<table" in result._repr_html_()
+
+
+def test_multiple_queries_with_column_local_vars(ip):
+    ip.run_cell("%config SqlMagic.column_local_vars = True")
+
+    ip.run_cell("%sql SELECT * FROM author; SELECT 1 AS x")
+
+    # like before, the variables are defined from the last query
+    assert ip.user_global_ns["x"] == (1,)
+
+
 @pytest.mark.parametrize(
     "query, error_type, error_message",
     [
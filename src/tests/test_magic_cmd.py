@@ -14,7 +14,8 @@ import sqlite3
 
 
 VALID_COMMANDS_MESSAGE = (
-    "Valid commands are: tables, columns, test, profile, explore, snippets, connect"
+    "Valid commands are: tables, columns, test, profile, explore, snippets, connect, "
+    "cache"
 )
 
 
@@ -0,0 +1,170 @@
+import threading
+import time
+
+import pytest
+from IPython.core.error import UsageError
+
+from sql.run import parallel
+from sql.run.parallel import StatementTimings, find_dependencies, find_tables
+
+
+@pytest.fixture
+def ip_parallel(ip_empty, tmp_empty):
+    ip_empty.run_cell("%sql duckdb:///parallel.duckdb")
+    yield ip_empty
+
+
+@pytest.mark.parametrize(
+    "statement, expected",
+    [
+        ("SELECT * FROM a JOIN b ON a.x = b.x", (set(), {"a", "b"})),
+        ("FROM a", (set(), {"a"})),
+        ("CREATE TABLE a AS SELECT * FROM b", ({"a"}, {"a", "b"})),
+        ("CREATE TABLE s.a (x INT)", ({"a"}, {"a"})),
+        ("INSERT INTO a (x) SELECT x FROM b", ({"a"}, {"a", "b"})),
+        ("UPDATE a SET x = 1", ({"a"}, {"a"})),
+        ("DELETE FROM A WHERE x IN (SELECT x FROM b)", ({"a"}, {"a", "b"})),
+        ("DROP TABLE IF EXISTS a", ({"a"}, {"a"})),
+        ("SELECT * INTO a FROM b", ({"a"}, {"a", "b"})),
+        ("SET threads = 1", None),
+        ("not sql at all", None),
+    ],
+)
+def test_find_tables(statement, expected):
+    assert find_tables(statement, "duckdb") == expected
+
+
+@pytest.mark.parametrize(
+    "statements, expected",
+    [
+        (
+            [
+                "CREATE TABLE a AS SELECT 1",
+                "CREATE TABLE b AS SELECT 2",
+                "CREATE TABLE c AS SELECT * FROM a, b",
+            ],
+            [[], [], [0, 1]],
+        ),
+        (
+            ["SELECT * FROM a", "DROP TABLE a", "SELECT * FROM b"],
+            [[], [0], []],
+        ),
+        (
+            ["CREATE TABLE a AS SELECT 1", "SET threads = 1", "SELECT 1"],
+            [[], [0], [1]],
+        ),
+        (
+            [
+                "CREATE VIEW v AS SELECT * FROM a",
+                "INSERT INTO a VALUES (1)",
+                "SELECT * FROM v",
+            ],
+            [[], [0], [0, 1]],
+        ),
+    ],
+    ids=["independent", "write-after-read", "unknown", "view"],
+)
+def test_find_dependencies(statements, expected):
+    assert find_dependencies(statements, "duckdb") == expected
+
+
+def test_parallel(ip_parallel):
+    timings = ip_parallel.run_cell(
+        """%%sql --parallel 2
+CREATE TABLE a AS SELECT * FROM range(10);
+CREATE TABLE b AS SELECT * FROM range(20);
+CREATE TABLE c AS SELECT (SELECT COUNT(*) FROM a) + (SELECT COUNT(*) FROM b) AS n
+"""
+    ).result
+
+    assert isinstance(timings, StatementTimings)
+    assert [timing["statement"][:14] for timing in timings.timings] == [
+        "CREATE TABLE a",
+        "CREATE TABLE b",
+        "CREATE TABLE c",
+    ]
+    # c starts once a and b finished
+    first, second, third = timings.timings
+    assert third["started"] >= first["started"] + first["elapsed"]
+    assert third["started"] >= second["started"] + second["elapsed"]
+    assert ip_parallel.run_cell("%sql SELECT * FROM c").result.dict() == {"n": (30,)}
+
+
+def test_parallel_runs_statements_concurrently(ip_parallel, monkeypatch):
+    running = []
+    max_running = []
+    lock = threading.Lock()
+
+    def run_statements(conn, sql, config, **kwargs):
+        with lock:
+            running.append(sql)
+            max_running.append(len(running))
+
+        time.sleep(0.1)
+
+        with lock:
+            running.remove(sql)
+
+    monkeypatch.setattr(parallel, "run_statements", run_statements)
+
+    ip_parallel.run_cell(
+        """%%sql --parallel 3
+INSERT INTO a VALUES (1);
+INSERT INTO b VALUES (1);
+INSERT INTO c VALUES (1);
+INSERT INTO a VALUES (2)
+"""
+    )
+
+    assert max(max_running) == 3
+
+
+def test_parallel_in_memory_database(ip_empty):
+    ip_empty.run_cell("%sql duckdb://")
+
+    timings = ip_empty.run_cell(
+        """%%sql --parallel 2
+CREATE TABLE a AS SELECT 1 AS x;
+CREATE TABLE b AS SELECT 2 AS y
+"""
+    ).result
+
+    assert len(timings.timings) == 2
+    assert ip_empty.run_cell("%sql SELECT * FROM a, b").result.dict() == {
+        "x": (1,),
+        "y": (2,),
+    }
+
+
+def test_parallel_error(ip_parallel):
+    with pytest.raises(UsageError) as excinfo:
+        ip_parallel.run_cell(
+            """%%sql --parallel 2
+CREATE TABLE a AS SELECT * FROM not_a_table;
+CREATE TABLE b AS SELECT * FROM a
+"""
+        )
+
+    assert "not_a_table" in str(excinfo.value)
+    # b depends on a, so it never ran
+    tables = ip_parallel.run_cell(
+        "%sql SELECT COUNT(*) AS n FROM information_schema.tables"
+    ).result
+    assert tables.dict() == {"n": (0,)}
+
+
+@pytest.mark.parametrize(
+    "line, message",
+    [
+        ("%sql --parallel 0 SELECT 1", "--parallel must be a positive integer"),
+        (
+            "%sql --parallel 2 --async SELECT 1",
+            "--parallel cannot be used with --async or --export",
+        ),
+    ],
+)
+def test_parallel_invalid_arguments(ip_parallel, line, message):
+    with pytest.raises(UsageError) as excinfo:
+        ip_parallel.run_cell(line)
+
+    assert message in str(excinfo.value)
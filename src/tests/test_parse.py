@@ -302,6 +302,11 @@ def complete_with_defaults(mapping):
         "save": None,
         "with_": None,
         "no_execute": False,
+        "export": None,
+        "no_cache": False,
+        "timeout": None,
+        "async_": False,
+        "parallel": None,
     }
 
     return {**defaults, **mapping}
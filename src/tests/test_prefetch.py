@@ -0,0 +1,133 @@
+import sqlite3
+
+import pytest
+
+from sql.connection import DBAPIConnection
+from sql.run.buffer import ColumnarBuffer, RowBuffer
+
+from conftest import make_result_set
+
+
+@pytest.fixture
+def config(result_set_config):
+    result_set_config.displaylimit = 2
+    result_set_config.fetch_batch_size = 3
+    result_set_config.prefetch_rows = 0
+    result_set_config.background_fetch = True
+    result_set_config.background_fetch_max_bytes = 0
+    return result_set_config
+
+
+def _wait(result_set):
+    result_set._prefetch._thread.join()
+
+
+@pytest.mark.parametrize("columnar_results", [False, True], ids=["rows", "arrow"])
+def test_fetches_remaining_rows_in_the_background(
+    numbers_conn, config, columnar_results
+):
+    config.columnar_results = columnar_results
+
+    rs = make_result_set(numbers_conn, config)
+    _wait(rs)
+
+    assert rs._done_fetching()
+    assert len(rs._results) == 10
+    assert rs.dict() == {"x": tuple(range(10))}
+
+
+def test_fetches_in_batches(numbers_conn, config):
+    rs = make_result_set(numbers_conn, config)
+    _wait(rs)
+
+    # preview (2 rows) + 3 batches (3, 3 and 2 rows)
+    assert rs.round_trips == 4
+
+
+def test_disabled_by_default(numbers_conn, config):
+    del config.background_fetch
+
+    rs = make_result_set(numbers_conn, config)
+
+    assert rs._prefetch is None
+    assert len(rs._results) == 2
+
+
+def test_stops_when_reaching_memory_limit(numbers_conn, config):
+    config.background_fetch_max_bytes = 1
+
+    rs = make_result_set(numbers_conn, config)
+    _wait(rs)
+
+    assert len(rs._results) == 2
+    assert not rs._done_fetching()
+    # the remaining rows are fetched when needed
+    assert len(rs) == 10
+
+
+def test_new_query_stops_background_fetch(numbers_conn, config):
+    numbers_conn.execute(
+        "CREATE TABLE large AS SELECT range AS x FROM range(1_000_000)"
+    )
+    config.fetch_batch_size = 100
+
+    first = make_result_set(numbers_conn, config, "SELECT * FROM large")
+    second = make_result_set(numbers_conn, config)
+
+    assert not first._prefetch.running
+    # only the last result set is fetched in the background
+    first.fetch_for_repr_if_needed()
+    assert not first._prefetch.running
+
+    _wait(second)
+    assert second.dict() == {"x": tuple(range(10))}
+    assert len(first) == 1_000_000
+
+
+def test_data_frame_after_background_fetch(numbers_conn, config):
+    rs = make_result_set(numbers_conn, config)
+    _wait(rs)
+
+    assert rs.DataFrame().x.tolist() == list(range(10))
+    assert rs.reexecutions == 0
+
+
+def test_close_stops_background_fetch(numbers_conn, config):
+    numbers_conn.execute(
+        "CREATE TABLE large AS SELECT range AS x FROM range(1_000_000)"
+    )
+    config.fetch_batch_size = 100
+
+    rs = make_result_set(numbers_conn, config, "SELECT * FROM large")
+    rs.close()
+
+    assert not rs._prefetch.running
+
+
+def test_background_fetch_dbapi_connection(config):
+    conn = DBAPIConnection(sqlite3.connect(""))
+    conn.raw_execute("CREATE TABLE numbers (x INTEGER)")
+    conn.raw_execute(
+        "INSERT INTO numbers VALUES " + ", ".join(f"({i})" for i in range(10))
+    )
+
+    rs = make_result_set(conn, config)
+    _wait(rs)
+
+    assert rs.dict() == {"x": tuple(range(10))}
+
+
+@pytest.mark.parametrize("buffer_class", [RowBuffer, ColumnarBuffer])
+def test_buffer_nbytes(buffer_class):
+    buffer = buffer_class(2)
+    assert buffer.nbytes() == 0
+
+    buffer.extend([(1, "a"), (2, "b")])
+    size = buffer.nbytes()
+    assert size > 0
+
+    buffer.extend([(3, "c"), (4, "d")])
+    assert buffer.nbytes() == 2 * size
+
+    buffer.clear()
+    assert buffer.nbytes() == 0
@@ -1,5 +1,6 @@
+import sqlite3
 import string
-from unittest.mock import Mock, call
+from unittest.mock import Mock, call, patch
 
 import duckdb
 from sqlalchemy import create_engine, text
@@ -13,10 +14,19 @@ import sqlalchemy
 
 from sql.connection import DBAPIConnection, SQLAlchemyConnection
 from sql.run.resultset import ResultSet
+from sql.run.buffer import ColumnarBuffer, RowBuffer
+from sql.run.index import ColumnIndex
+from sql.run.arrow import ArrowBuffer
+from sql.run.table import render_html_table
+from sql.run.convert import DataFrameConverter, register_converter, _converters
 from sql.connection.connection import IS_SQLALCHEMY_ONE
 
 import warnings
 
+from IPython.core.error import UsageError
+
+from conftest import make_result_set
+
 
 @pytest.fixture
 def config():
@@ -44,6 +54,13 @@ def result_set(result, config):
     return ResultSet(result_set, config, statement="select * from df", conn=conn)
 
 
+@pytest.fixture
+def result_set_columnar(result, config):
+    config.columnar_results = True
+    result_set, conn = result
+    return ResultSet(result_set, config, statement="select * from df", conn=conn)
+
+
 def test_resultset_getitem(result_set):
     assert result_set[0] == (0,)
     assert result_set[0:2] == [(0,), (1,)]
@@ -62,16 +79,10 @@ def test_resultset_dicts(result_set):
 
 
 def test_resultset_dataframe(result_set, config):
-    # since this will use the native method, the issue will be re-executed
-    # so we need to create the df here so duckdb can find it
-    df = pd.DataFrame({"x": range(3)})  # noqa
     assert result_set.DataFrame().equals(pd.DataFrame({"x": range(3)}))
 
 
 def test_resultset_polars_dataframe(result_set):
-    # since this will use the native method, the issue will be re-executed
-    # so we need to create the df here so duckdb can find it
-    df = pd.DataFrame({"x": range(3)})  # noqa
     assert result_set.PolarsDataFrame().frame_equal(pl.DataFrame({"x": range(3)}))
 
 
@@ -115,6 +126,71 @@ def test_resultset_repr_html_with_reduced_feedback(result_set, ip_empty, feedbac
     assert "polars" not in html
 
 
+def test_resultset_columnar_uses_arrow_buffer_with_duckdb(result_set_columnar):
+    assert isinstance(result_set_columnar._results, ArrowBuffer)
+
+
+def test_resultset_columnar_getitem(result_set_columnar):
+    assert result_set_columnar[0] == (0,)
+    assert result_set_columnar[0:2] == [(0,), (1,)]
+
+    # force fetching
+    list(result_set_columnar)
+
+    assert result_set_columnar[-1] == (2,)
+
+
+def test_resultset_columnar_getitem_out_of_range(result_set_columnar):
+    with pytest.raises(IndexError):
+        result_set_columnar[10]
+
+
+def test_resultset_columnar_iter_and_len(result_set_columnar):
+    assert list(result_set_columnar) == [(0,), (1,), (2,)]
+    assert len(result_set_columnar) == 3
+    assert result_set_columnar == [(0,), (1,), (2,)]
+
+
+def test_resultset_columnar_dict(result_set_columnar):
+    assert result_set_columnar.dict() == {"x": (0, 1, 2)}
+    assert list(result_set_columnar.dicts()) == [{"x": 0}, {"x": 1}, {"x": 2}]
+
+
+def test_resultset_columnar_csv(result_set_columnar, tmp_empty):
+    result_set_columnar.csv("file.csv")
+
+    assert Path("file.csv").read_text() == "x\n0\n1\n2\n"
+
+
+@pytest.mark.parametrize("columnar_results", [False, True])
+def test_convert_to_dataframe_from_columns(sqlite_sqlalchemy, columnar_results):
+    sqlite_sqlalchemy.execute("CREATE TABLE a (x INT, y TEXT)")
+    sqlite_sqlalchemy.execute("INSERT INTO a VALUES (1, 'a'), (2, 'b'), (3, 'c')")
+
+    mock = Mock()
+    mock.displaylimit = 1
+    mock.autolimit = 0
+    mock.columnar_results = columnar_results
+    mock.polars_dataframe_kwargs = {}
+
+    statement = "SELECT * FROM a"
+    rs = ResultSet(
+        sqlite_sqlalchemy.raw_execute(statement),
+        mock,
+        statement=statement,
+        conn=sqlite_sqlalchemy,
+    )
+
+    assert rs.DataFrame().to_dict() == {
+        "x": {0: 1, 1: 2, 2: 3},
+        "y": {0: "a", 1: "b", 2: "c"},
+    }
+    assert rs.PolarsDataFrame().to_dict(as_series=False) == {
+        "x": [1, 2, 3],
+        "y": ["a", "b", "c"],
+    }
+
+
 @pytest.mark.parametrize(
     "fname, parameters",
     [
@@ -322,6 +398,118 @@ def test_convert_to_dataframe_using_native_duckdb(
     assert d == expected_value
 
 
+@pytest.mark.parametrize("to_df_method", ["DataFrame", "PolarsDataFrame"])
+def test_convert_partially_fetched_without_reexecuting_dbapi(
+    to_df_method, mock_config
+):
+    session = duckdb.connect()
+    session.execute("CREATE TABLE a (x INT);")
+    session.execute("INSERT INTO a(x) VALUES (1),(2),(3),(4),(5);")
+    statement = "SELECT * FROM a"
+    results = session.execute(statement)
+
+    rs = ResultSet(
+        results, mock_config, statement=statement, conn=DBAPIConnection(session)
+    )
+
+    assert len(rs._results) == 2
+
+    df = getattr(rs, to_df_method)()
+
+    assert list(df["x"]) == [1, 2, 3, 4, 5]
+    assert rs.reexecutions == 0
+
+
+@pytest.mark.parametrize("to_df_method", ["DataFrame", "PolarsDataFrame"])
+def test_convert_partially_fetched_without_reexecuting_sqlalchemy(
+    to_df_method, mock_config
+):
+    conn = SQLAlchemyConnection(create_engine("duckdb://"))
+    conn.execute("CREATE TABLE a (x INT);")
+    conn.execute("INSERT INTO a(x) VALUES (1),(2),(3),(4),(5);")
+    statement = "SELECT * FROM a"
+
+    rs = ResultSet(
+        conn.raw_execute(statement), mock_config, statement=statement, conn=conn
+    )
+    conn.raw_execute = Mock(side_effect=ValueError("statement re-executed"))
+
+    df = getattr(rs, to_df_method)()
+
+    assert list(df["x"]) == [1, 2, 3, 4, 5]
+    assert rs.reexecutions == 0
+
+
+@pytest.mark.parametrize("to_df_method", ["DataFrame", "PolarsDataFrame"])
+def test_convert_without_fetching_preview(to_df_method, mock_config):
+    conn = SQLAlchemyConnection(create_engine("duckdb://"))
+    conn.execute("CREATE TABLE a (x INT);")
+    conn.execute("INSERT INTO a(x) VALUES (1),(2),(3),(4),(5);")
+    statement = "SELECT * FROM a"
+
+    rs = ResultSet(
+        conn.raw_execute(statement),
+        mock_config,
+        statement=statement,
+        conn=conn,
+        fetch_preview=False,
+    )
+
+    assert len(rs._results) == 0
+
+    df = getattr(rs, to_df_method)()
+
+    assert list(df["x"]) == [1, 2, 3, 4, 5]
+    assert rs.reexecutions == 0
+
+
+def test_counts_reexecutions_when_refreshing_sqlaproxy():
+    conn = SQLAlchemyConnection(create_engine("duckdb://"))
+    conn.execute("CREATE TABLE numbers (x INTEGER)")
+    conn.execute("INSERT INTO numbers VALUES (1), (2), (3), (4), (5)")
+
+    mock = Mock()
+    mock.displaylimit = 10
+    mock.autolimit = 0
+
+    statement = "SELECT * FROM numbers"
+    first_set = ResultSet(
+        conn.raw_execute(statement), mock, statement=statement, conn=conn
+    )
+    ResultSet(conn.raw_execute(statement), mock, statement=statement, conn=conn)
+
+    assert first_set.reexecutions == 0
+
+    df = first_set.DataFrame()
+
+    assert list(df["x"]) == [1, 2, 3, 4, 5]
+    assert first_set.reexecutions == 1
+
+
+@pytest.mark.parametrize("to_df_method", ["DataFrame", "PolarsDataFrame"])
+def test_convert_fully_fetched_outdated_result_without_reexecuting(to_df_method):
+    conn = SQLAlchemyConnection(create_engine("duckdb://"))
+    conn.execute("CREATE TABLE numbers (x INTEGER)")
+    conn.execute("INSERT INTO numbers VALUES (1), (2), (3)")
+
+    mock = Mock()
+    mock.displaylimit = 10
+    mock.autolimit = 0
+
+    statement = "SELECT * FROM numbers"
+    first_set = ResultSet(
+        conn.raw_execute(statement), mock, statement=statement, conn=conn
+    )
+    first_set.fetchall()
+    # the second query makes the first result set outdated
+    ResultSet(conn.raw_execute("SELECT 42"), mock, statement="SELECT 42", conn=conn)
+
+    df = getattr(first_set, to_df_method)()
+
+    assert list(df["x"]) == [1, 2, 3]
+    assert first_set.reexecutions == 0
+
+
 def test_done_fetching_if_reached_autolimit(results):
     mock = Mock()
     mock.autolimit = 2
@@ -758,3 +946,440 @@ INSERT INTO Cities VALUES ('US', 'New York City', 2020, 8772);
     }
     expected = getattr(library, "DataFrame")(expected_result)
     assert getattr(result, equal_func)(expected)
+
+
+@pytest.fixture
+def config_columnar():
+    mock = Mock()
+    mock.displaylimit = 3
+    mock.autolimit = 0
+    mock.columnar_results = True
+    mock.polars_dataframe_kwargs = {}
+    yield mock
+
+
+@pytest.mark.parametrize("session", ["duckdb_sqlalchemy", "duckdb_dbapi"])
+def test_columnar_results_read_arrow_batches(session, request, config_columnar):
+    session = request.getfixturevalue(session)
+    statement = "SELECT range AS x, range::VARCHAR AS y FROM range(5000)"
+
+    rs = ResultSet(
+        session.raw_execute(statement),
+        config_columnar,
+        statement=statement,
+        conn=session,
+    )
+
+    assert isinstance(rs._results, ArrowBuffer)
+    assert len(rs._results) == 2
+    assert rs[1] == (1, "1")
+
+    session.raw_execute = Mock(side_effect=ValueError("statement re-executed"))
+
+    df = rs.DataFrame()
+
+    assert df.shape == (5000, 2)
+    assert df["x"].tolist() == list(range(5000))
+    assert rs.PolarsDataFrame()["y"].to_list() == [str(i) for i in range(5000)]
+    assert len(rs) == 5000
+
+
+def test_columnar_results_reads_arrow_batches_when_refreshing(config_columnar):
+    conn = SQLAlchemyConnection(create_engine("duckdb://"))
+    conn.execute("CREATE TABLE numbers AS SELECT range AS x FROM range(10)")
+    conn.execute("CREATE TABLE characters (c VARCHAR)")
+
+    statement = "SELECT * FROM numbers"
+    first_set = ResultSet(
+        conn.raw_execute(statement), config_columnar, statement=statement, conn=conn
+    )
+
+    statement = "SELECT * FROM characters"
+    ResultSet(
+        conn.raw_execute(statement), config_columnar, statement=statement, conn=conn
+    )
+
+    assert list(first_set) == [(i,) for i in range(10)]
+
+
+def test_columnar_results_without_arrow_support(sqlite_sqlalchemy, config_columnar):
+    sqlite_sqlalchemy.execute("CREATE TABLE a (x INT)")
+    sqlite_sqlalchemy.execute("INSERT INTO a VALUES (1), (2), (3)")
+
+    statement = "SELECT * FROM a"
+    rs = ResultSet(
+        sqlite_sqlalchemy.raw_execute(statement),
+        config_columnar,
+        statement=statement,
+        conn=sqlite_sqlalchemy,
+    )
+
+    assert isinstance(rs._results, ColumnarBuffer)
+    assert rs.DataFrame().to_dict() == {"x": {0: 1, 1: 2, 2: 3}}
+
+
+def test_register_converter(result_set):
+    class ConstantConverter(DataFrameConverter):
+        def can_convert(self, result_set):
+            return True
+
+        def convert(self, result_set, converter_name, constructor, kwargs):
+            return constructor({"converted": [True]})
+
+    register_converter(ConstantConverter())
+
+    try:
+        assert result_set.DataFrame().to_dict() == {"converted": {0: True}}
+    finally:
+        _converters.pop(0)
+
+
+@pytest.fixture(params=[False, True], ids=["rows", "arrow"])
+def numbers_result_set(request, numbers_conn, result_set_config):
+    result_set_config.columnar_results = request.param
+    return make_result_set(numbers_conn, result_set_config)
+
+
+def test_iter_batches(numbers_result_set):
+    batches = list(numbers_result_set.iter_batches(4))
+
+    # the first batch contains the rows fetched for the preview
+    assert [list(batch) for batch in batches] == [
+        [(0,), (1,)],
+        [(2,), (3,), (4,), (5,)],
+        [(6,), (7,), (8,), (9,)],
+    ]
+
+
+def test_iter_batches_does_not_store_rows(numbers_result_set):
+    for _ in numbers_result_set.iter_batches(4):
+        pass
+
+    assert len(numbers_result_set._results) == 2
+
+
+def test_iter_batches_after_fetching_all_rows(numbers_result_set):
+    numbers_result_set.fetchall()
+
+    batches = list(numbers_result_set.iter_batches(4))
+
+    assert [len(batch) for batch in batches] == [4, 4, 2]
+    # since the rows were already fetched, we can still use them
+    assert len(numbers_result_set) == 10
+
+
+def test_fetching_after_iter_batches_raises(numbers_result_set, ip_empty):
+    list(numbers_result_set.iter_batches(4))
+
+    with pytest.raises(UsageError) as excinfo:
+        numbers_result_set.DataFrame()
+
+    assert excinfo.value.error_type == "RuntimeError"
+    assert "already been consumed by iter_batches" in str(excinfo.value)
+
+    with pytest.raises(UsageError):
+        list(numbers_result_set.iter_batches(4))
+
+    # displaying the result set shows the rows we have
+    assert "| 0 |" in str(numbers_result_set)
+
+
+@pytest.mark.parametrize("size", [0, -1, 1.5, "1"])
+def test_iter_batches_invalid_size(numbers_result_set, size):
+    with pytest.raises(UsageError) as excinfo:
+        next(numbers_result_set.iter_batches(size))
+
+    assert excinfo.value.error_type == "ValueError"
+    assert "size must be a positive integer" in str(excinfo.value)
+
+
+def test_iter_dataframes(numbers_result_set):
+    frames = list(numbers_result_set.iter_dataframes(5))
+
+    assert [len(frame) for frame in frames] == [2, 5, 3]
+    assert pd.concat(frames, ignore_index=True).equals(pd.DataFrame({"x": range(10)}))
+
+
+def test_iter_dataframes_polars(numbers_result_set):
+    frames = list(numbers_result_set.iter_dataframes(5, library="polars"))
+
+    assert pl.concat(frames)["x"].to_list() == list(range(10))
+
+
+def test_iter_dataframes_invalid_library(numbers_result_set):
+    with pytest.raises(UsageError) as excinfo:
+        next(numbers_result_set.iter_dataframes(5, library="spark"))
+
+    assert "Invalid library: 'spark'" in str(excinfo.value)
+
+
+def test_iter_arrow(numbers_result_set):
+    import pyarrow as pa
+
+    batches = list(numbers_result_set.iter_arrow(5))
+
+    assert all(isinstance(batch, pa.RecordBatch) for batch in batches)
+    assert [batch.num_rows for batch in batches] == [2, 5, 3]
+    assert pa.Table.from_batches(batches).column("x").to_pylist() == list(range(10))
+
+
+@pytest.mark.parametrize("columnar_results", [False, True], ids=["rows", "arrow"])
+@pytest.mark.parametrize(
+    "connection", ["sqlite_sqlalchemy", "duckdb_sqlalchemy", "duckdb_dbapi"]
+)
+def test_iter_arrow_leading_nulls(request, connection, columnar_results):
+    import pyarrow as pa
+
+    conn = request.getfixturevalue(connection)
+    conn.execute("CREATE TABLE t (x INTEGER, y VARCHAR)")
+    conn.execute(
+        "INSERT INTO t VALUES "
+        "(NULL, NULL), (NULL, NULL), (NULL, NULL), (1, NULL), (2, 'a'), (3, 'b')"
+    )
+
+    statement = "SELECT * FROM t"
+    config = Mock()
+    config.displaylimit = 2
+    config.autolimit = 0
+    config.columnar_results = columnar_results
+
+    rs = ResultSet(
+        conn.raw_execute(statement), config, statement=statement, conn=conn
+    )
+    batches = list(rs.iter_arrow(2))
+
+    assert {batch.schema for batch in batches} == {batches[0].schema}
+    assert not pa.types.is_null(batches[0].schema.field("x").type)
+    assert not pa.types.is_null(batches[0].schema.field("y").type)
+
+    table = pa.Table.from_batches(batches)
+    assert table.column("x").to_pylist() == [None, None, None, 1, 2, 3]
+    assert table.column("y").to_pylist() == [None, None, None, None, "a", "b"]
+
+
+def test_iter_batches_sqlite(sqlite_sqlalchemy):
+    statement = "SELECT * FROM (SELECT 1 UNION ALL SELECT 2 UNION ALL SELECT 3)"
+    config = Mock()
+    config.displaylimit = 1
+    config.autolimit = 0
+
+    rs = ResultSet(
+        sqlite_sqlalchemy.raw_execute(statement),
+        config,
+        statement=statement,
+        conn=sqlite_sqlalchemy,
+    )
+
+    assert [row for batch in rs.iter_batches(1) for row in batch] == [
+        (1,),
+        (2,),
+        (3,),
+    ]
+
+
+def test_only_displayed_rows_are_rendered(numbers_conn, ip_empty):
+    config = Mock()
+    config.displaylimit = 1
+    config.autolimit = 0
+    config.style = "DEFAULT"
+
+    statement = "SELECT * FROM numbers"
+    rs = ResultSet(
+        numbers_conn.raw_execute(statement),
+        config,
+        statement=statement,
+        conn=numbers_conn,
+    )
+    # fetch rows beyond the displaylimit
+    list(rs)
+
+    assert str(rs) == "+---+\n| x |\n+---+\n| 0 |\n+---+"
+    assert "<td>1</td>" not in rs._repr_html_()
+
+
+def test_rendered_table_is_cached_until_fetching_more_rows(numbers_conn, ip_empty):
+    config = Mock()
+    config.displaylimit = 3
+    config.autolimit = 0
+    config.style = "DEFAULT"
+
+    statement = "SELECT * FROM numbers"
+    rs = ResultSet(
+        numbers_conn.raw_execute(statement),
+        config,
+        statement=statement,
+        conn=numbers_conn,
+    )
+    rs._init_table = Mock(wraps=rs._init_table)
+
+    with patch(
+        "sql.run.resultset.render_html_table", wraps=render_html_table
+    ) as render:
+        html = rs._repr_html_()
+        assert rs._repr_html_() == html
+        assert str(rs) == str(rs)
+        assert render.call_count == 1
+        assert rs._init_table.call_count == 1
+
+        config.displaylimit = 5
+        html_more_rows = rs._repr_html_()
+
+        assert render.call_count == 2
+    assert "<td>4</td>" in html_more_rows
+    assert "<td>4</td>" not in html
+
+
+@pytest.fixture
+def config_fetch(result_set_config):
+    result_set_config.displaylimit = 2
+    result_set_config.fetch_batch_size = 3
+    result_set_config.prefetch_rows = 0
+    return result_set_config
+
+
+def test_fetchall_in_batches(numbers_conn, config_fetch):
+    rs = make_result_set(numbers_conn, config_fetch)
+    rs._sqlaproxy = Mock(wraps=rs._sqlaproxy)
+
+    assert len(rs) == 10
+    assert rs._sqlaproxy.fetchmany.call_args_list == [
+        call(size=3),
+        call(size=3),
+        call(size=3),
+    ]
+    rs._sqlaproxy.fetchall.assert_not_called()
+    # one round trip for the preview plus three batches
+    assert rs.round_trips == 4
+
+
+def test_fetchall_without_batches(numbers_conn, config_fetch):
+    config_fetch.fetch_batch_size = 0
+    rs = make_result_set(numbers_conn, config_fetch)
+
+    assert len(rs) == 10
+    assert rs.round_trips == 2
+
+
+def test_fetch_for_repr_fetches_at_least_fetch_batch_size(numbers_conn, config_fetch):
+    config_fetch.displaylimit = 3
+    rs = make_result_set(numbers_conn, config_fetch)
+
+    rs.fetch_for_repr_if_needed()
+
+    assert len(rs._results) == 5
+    assert rs.round_trips == 2
+
+
+def test_fetch_for_repr_does_not_exceed_autolimit(numbers_conn, config_fetch):
+    config_fetch.displaylimit = 3
+    config_fetch.autolimit = 4
+    config_fetch.fetch_batch_size = 100
+    rs = make_result_set(numbers_conn, config_fetch)
+
+    rs.fetch_for_repr_if_needed()
+
+    assert len(rs._results) == 4
+    assert rs._done_fetching()
+
+
+def test_prefetch_rows(numbers_conn, config_fetch):
+    config_fetch.prefetch_rows = 3
+    rs = make_result_set(numbers_conn, config_fetch)
+
+    assert len(rs._results) == 3
+
+    rs._repr_html_()
+
+    assert rs.round_trips == 1
+
+
+def test_sets_cursor_arraysize(config_fetch):
+    conn = DBAPIConnection(sqlite3.connect(""))
+    statement = "SELECT 1"
+
+    rs = ResultSet(
+        conn.raw_execute(statement), config_fetch, statement=statement, conn=conn
+    )
+
+    assert rs.sqlaproxy.arraysize == 3
+
+
+@pytest.fixture(params=[False, True], ids=["rows", "columnar"])
+def languages_result_set(request):
+    conn = SQLAlchemyConnection(create_engine("duckdb://"))
+    conn.execute(
+        "CREATE TABLE languages AS SELECT * FROM (VALUES "
+        "('Python', 1991), ('Java', 1995), ('Ruby', 1995), ('Python', 2008)"
+        ") AS t(name, year)"
+    )
+
+    config = Mock()
+    config.displaylimit = 2
+    config.autolimit = 0
+    config.columnar_results = request.param
+
+    statement = "SELECT * FROM languages"
+    yield ResultSet(conn.raw_execute(statement), config, statement=statement, conn=conn)
+    conn.close()
+
+
+def test_getitem_by_leftmost_column(languages_result_set):
+    assert languages_result_set["Java"] == ("Java", 1995)
+    assert languages_result_set["Ruby"] == ("Ruby", 1995)
+
+
+def test_getitem_by_leftmost_column_errors(languages_result_set):
+    with pytest.raises(KeyError, match="2 results for"):
+        languages_result_set["Python"]
+
+    with pytest.raises(KeyError, match="Go"):
+        languages_result_set["Go"]
+
+    with pytest.raises(KeyError):
+        languages_result_set[["unhashable"]]
+
+
+def test_getitem_by_leftmost_column_builds_index_once(languages_result_set):
+    languages_result_set["Java"]
+    results = languages_result_set._results
+
+    with patch.object(results, "column", wraps=results.column) as column:
+        languages_result_set["Ruby"]
+        languages_result_set["Java"]
+
+    column.assert_not_called()
+
+
+def test_index_by(languages_result_set):
+    by_year = languages_result_set.index_by("year")
+
+    assert by_year[1991] == ("Python", 1991)
+    assert by_year.rows(1995) == [("Java", 1995), ("Ruby", 1995)]
+    assert by_year.rows(2000) == []
+    assert sorted(by_year) == [1991, 1995, 2008]
+    assert len(by_year) == 3
+    assert languages_result_set.index_by("year") is by_year
+
+
+def test_index_by_missing_column(languages_result_set):
+    with pytest.raises(UsageError) as excinfo:
+        languages_result_set.index_by("country")
+
+    assert excinfo.value.error_type == "ValueError"
+    assert "Column 'country' does not exist" in str(excinfo.value)
+
+
+def test_index_adds_new_rows():
+    results = RowBuffer(2)
+    results.extend([("a", 1)])
+    result_set = Mock(_results=results)
+
+    index = ColumnIndex(result_set, 0)
+    assert index["a"] == ("a", 1)
+
+    results.extend([("b", 2)])
+    assert index["b"] == ("b", 2)
+
+    results.clear()
+    results.extend([("c", 3)])
+    assert list(index) == ["c"]
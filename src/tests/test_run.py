@@ -15,7 +15,7 @@ from sql.run.run import (
     select_df_type,
 )
 from sql.run.pgspecial import handle_postgres_special
-from sql.run.resultset import ResultSet
+from sql.run.resultset import MultiResultSet, ResultSet
 
 
 @pytest.fixture
@@ -141,7 +141,12 @@ def test_sql_is_empty(mock_conns):
 )
 def test_run(connection, config, expected_type, sql):
     out = run_statements(connection, sql, config)
-    assert isinstance(out, expected_type)
+
+    if ";" in sql:
+        assert isinstance(out, MultiResultSet)
+        assert all(isinstance(result, expected_type) for result in out)
+    else:
+        assert isinstance(out, expected_type)
 
 
 def test_do_not_fail_if_sqlalchemy_autocommit_not_supported():
@@ -153,3 +158,88 @@ def test_do_not_fail_if_sqlalchemy_autocommit_not_supported():
     run_statements(conn, "SELECT 1", Config)
 
     # TODO: test .commit called or not depending on config!
+
+
+def test_run_multiple_queries():
+    conn = DBAPIConnection(duckdb.connect())
+
+    out = run_statements(
+        conn,
+        """
+CREATE TABLE numbers AS SELECT * FROM range(5) AS t(x);
+SELECT * FROM numbers WHERE x < 2;
+INSERT INTO numbers VALUES (5);
+SELECT COUNT(*) AS n FROM numbers
+""",
+        Config,
+    )
+
+    assert isinstance(out, MultiResultSet)
+    # only the statements that return rows are included
+    assert out.statements == [
+        "SELECT * FROM numbers WHERE x < 2;",
+        "SELECT COUNT(*) AS n FROM numbers",
+    ]
+    assert [result.dict() for result in out] == [{"x": (0, 1)}, {"n": (6,)}]
+    assert all(timing["elapsed"] >= 0 for timing in out.timings)
+
+
+@pytest.mark.parametrize(
+    "make_connection",
+    [
+        lambda: SQLAlchemyConnection(create_engine("duckdb://")),
+        lambda: DBAPIConnection(duckdb.connect()),
+    ],
+    ids=["duckdb-sqlalchemy", "duckdb"],
+)
+def test_run_multiple_queries_includes_other_statements_that_return_rows(
+    make_connection,
+):
+    out = run_statements(
+        make_connection(),
+        """
+CREATE TABLE numbers AS SELECT * FROM range(5) AS t(x);
+SELECT * FROM numbers WHERE x < 2;
+SHOW TABLES;
+INSERT INTO numbers VALUES (5);
+DESCRIBE numbers
+""",
+        Config,
+    )
+
+    assert isinstance(out, MultiResultSet)
+    assert out.statements == [
+        "SELECT * FROM numbers WHERE x < 2;",
+        "SHOW TABLES;",
+        "DESCRIBE numbers",
+    ]
+    assert out[0].dict() == {"x": (0, 1)}
+    assert out[1].dict()["name"] == ("numbers",)
+    assert out[2].dict()["column_name"] == ("x",)
+
+
+def test_run_multiple_queries_fetches_lazily():
+    conn = DBAPIConnection(duckdb.connect())
+
+    class ConfigLimit(Config):
+        displaylimit = 2
+
+    out = run_statements(
+        conn,
+        "SELECT * FROM range(100); SELECT * FROM range(10)",
+        ConfigLimit,
+    )
+
+    assert [len(result._results) for result in out] == [2, 2]
+    assert [len(result) for result in out] == [100, 10]
+
+
+def test_run_single_query_after_other_statements():
+    conn = DBAPIConnection(duckdb.connect())
+
+    out = run_statements(
+        conn, "CREATE TABLE t AS SELECT 1 AS x; SELECT * FROM t", Config
+    )
+
+    assert isinstance(out, ResultSet)
+    assert out.dict() == {"x": (1,)}
@@ -0,0 +1,185 @@
+from unittest.mock import Mock
+
+import pyarrow as pa
+import pytest
+from sqlalchemy import create_engine
+
+from sql.connection import SQLAlchemyConnection
+from sql.run.buffer import ColumnarBuffer, RowBuffer
+from sql.run.resultset import ResultSet
+from sql.run.spill import ArrowSpillBuffer, SpillBuffer, _SpillFile
+
+
+@pytest.fixture(params=[RowBuffer, ColumnarBuffer])
+def spill_buffer(request):
+    buffer = SpillBuffer(request.param(2), max_bytes=1)
+    buffer.extend([(0, "a"), (1, "b")])
+    buffer.extend([(2, "c"), (3, "d")])
+    buffer.extend([(4, "e")])
+    return buffer
+
+
+def _expected_rows():
+    return [(0, "a"), (1, "b"), (2, "c"), (3, "d"), (4, "e")]
+
+
+def test_spill_buffer_keeps_rows_up_to_the_limit_in_memory(spill_buffer):
+    assert spill_buffer.spilled
+    assert len(spill_buffer._memory) == 2
+    assert spill_buffer.nbytes() == spill_buffer._memory.nbytes()
+
+
+def test_spill_buffer_reads_spilled_rows(spill_buffer):
+    assert len(spill_buffer) == 5
+    assert list(spill_buffer) == _expected_rows()
+    assert spill_buffer == _expected_rows()
+    assert spill_buffer.columns() == [[0, 1, 2, 3, 4], ["a", "b", "c", "d", "e"]]
+    assert spill_buffer.column(1) == ["a", "b", "c", "d", "e"]
+
+
+@pytest.mark.parametrize(
+    "key",
+    [
+        0,
+        1,
+        2,
+        3,
+        4,
+        -1,
+        -5,
+        slice(0, 2),
+        slice(1, 4),
+        slice(None, None, 2),
+        slice(None, None, -1),
+        slice(None, 1, -1),
+        slice(4, 0, -2),
+        slice(-1, -4, -1),
+        slice(1, None, -1),
+        slice(-4, None, -1),
+        slice(3, 1),
+        slice(10, None, -3),
+    ],
+)
+def test_spill_buffer_getitem(spill_buffer, key):
+    assert spill_buffer[key] == _expected_rows()[key]
+
+
+def test_spill_buffer_getitem_errors(spill_buffer):
+    with pytest.raises(IndexError):
+        spill_buffer[5]
+
+    with pytest.raises(TypeError):
+        spill_buffer["a"]
+
+
+def test_spill_file_closes_previous_map():
+    spill_file = _SpillFile()
+    spill_file.writer().write(b"a")
+    first = spill_file.map()
+    spill_file.writer().write(b"b")
+    second = spill_file.map()
+
+    assert first.closed
+    assert second[:] == b"ab"
+
+    spill_file.close()
+
+    assert second.closed
+
+
+def test_spill_buffer_clear(spill_buffer):
+    spill_buffer.clear()
+
+    assert not spill_buffer.spilled
+    assert list(spill_buffer) == []
+
+    spill_buffer.extend([(5, "f")])
+    assert list(spill_buffer) == [(5, "f")]
+
+
+def test_spill_buffer_without_reaching_the_limit():
+    buffer = SpillBuffer(RowBuffer(1), max_bytes=1_000_000)
+    buffer.extend([(1,), (2,)])
+
+    assert not buffer.spilled
+    assert buffer[:] == [(1,), (2,)]
+
+
+def test_arrow_spill_buffer():
+    schema = pa.schema([("x", pa.int64())])
+    buffer = ArrowSpillBuffer(schema, max_bytes=1)
+
+    for start in range(0, 9, 3):
+        values = pa.array(range(start, start + 3), type=pa.int64())
+        buffer.extend([pa.record_batch([values], schema=schema)])
+
+    assert buffer.spilled
+    assert len(buffer._batches) == 1
+    assert len(buffer) == 9
+    assert list(buffer) == [(i,) for i in range(9)]
+    assert buffer[7] == (7,)
+    assert buffer[2:5] == [(2,), (3,), (4,)]
+    assert buffer.to_table().column("x").to_pylist() == list(range(9))
+
+    buffer.clear()
+    assert not buffer.spilled
+    assert len(buffer) == 0
+
+
+@pytest.fixture
+def conn():
+    conn = SQLAlchemyConnection(create_engine("duckdb://"))
+    conn.execute(
+        "CREATE TABLE numbers AS "
+        "SELECT range AS x, 'n' || range::VARCHAR AS name FROM range(100)"
+    )
+    yield conn
+    conn.close()
+
+
+@pytest.fixture(params=[False, True], ids=["rows", "arrow"])
+def result_set(request, conn):
+    config = Mock()
+    config.displaylimit = 3
+    config.autolimit = 0
+    config.columnar_results = request.param
+    config.fetch_batch_size = 10
+    config.result_memory_limit = 1
+    config.polars_dataframe_kwargs = {}
+
+    statement = "SELECT * FROM numbers"
+    return ResultSet(
+        conn.raw_execute(statement), config, statement=statement, conn=conn
+    )
+
+
+def test_result_set_spills_to_disk(result_set):
+    assert len(result_set) == 100
+    assert result_set._results.spilled
+    assert result_set[50] == (50, "n50")
+    assert result_set[99] == (99, "n99")
+    assert list(result_set)[-1] == (99, "n99")
+
+
+def test_result_set_lookup_spilled_rows(result_set):
+    assert result_set.index_by("name")["n88"] == (88, "n88")
+    assert result_set[73] == (73, "n73")
+
+
+def test_result_set_convert_spilled_rows(result_set):
+    df = result_set.DataFrame()
+
+    assert df.x.tolist() == list(range(100))
+    assert df.columns.tolist() == ["x", "name"]
+
+
+def test_result_set_csv_spilled_rows(result_set):
+    csv = result_set.csv()
+
+    assert csv.splitlines()[0] == "x,name"
+    assert csv.splitlines()[-1] == "99,n99"
+    assert len(csv.splitlines()) == 101
+
+
+def test_result_set_dict_spilled_rows(result_set):
+    assert result_set.dict()["x"] == tuple(range(100))
@@ -0,0 +1,61 @@
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+from sql.run.table import CustomPrettyTable, render_html_table
+
+
+@pytest.mark.parametrize(
+    "field_names, rows",
+    [
+        (["x"], [(1,), (2,), (3,)]),
+        (["x"], []),
+        (
+            ["a", "b", "c", "d"],
+            [
+                (1, 1.5, "foo", None),
+                (True, Decimal("1.10"), "multi\nline", date(2024, 1, 1)),
+                (-1, float("nan"), "tab\there", "  two spaces"),
+            ],
+        ),
+    ],
+    ids=["simple", "empty", "types"],
+)
+def test_render_html_table_matches_prettytable_layout(field_names, rows):
+    pretty = CustomPrettyTable(field_names)
+    pretty.add_rows(rows)
+    # leading spaces are made visible
+    expected = pretty.get_html_string().replace("<td>  ", "<td>&nbsp;&nbsp;")
+
+    assert render_html_table(field_names, rows) == expected
+
+
+def test_render_html_table_escapes_cells():
+    html = render_html_table(["<b>"], [("<script>alert('x')</script>",), ("a & b",)])
+
+    assert "<th>&lt;b&gt;</th>" in html
+    assert "<td>&lt;script&gt;alert('x')&lt;/script&gt;</td>" in html
+    assert "<td>a &amp; b</td>" in html
+
+
+def test_render_html_table_links():
+    html = render_html_table(["link"], [("https://example.com/?a=1&b=2",), ("http",)])
+
+    assert (
+        "<td><a href=https://example.com/?a=1&amp;b=2>"
+        "https://example.com/?a=1&amp;b=2</a></td>"
+    ) in html
+    assert "<td><a href=http>http</a></td>" in html
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        (" one", "<td> one</td>"),
+        ("   three", "<td>&nbsp;&nbsp;&nbsp;three</td>"),
+        ("trailing  ", "<td>trailing  </td>"),
+    ],
+)
+def test_render_html_table_leading_spaces(value, expected):
+    assert expected in render_html_table(["x"], [(value,)])
@@ -1,4 +1,6 @@
 from datetime import datetime
+from unittest.mock import patch
+from jinja2 import Template
 from IPython.core.error import UsageError
 import pytest
 from sql import util
@@ -524,3 +526,62 @@ def test_check_duplicate_arguments_does_not_raise_usageerror(
     assert util.check_duplicate_arguments(
         magic_execute, cmd_from, args, ALLOWED_DUPLICATES[cmd_from]
     )
+
+
+@pytest.mark.parametrize(
+    "source",
+    [
+        "SELECT * FROM t",
+        "SELECT * FROM t\n",
+        "SELECT *\r\nFROM t\r\n\n",
+        "SELECT *\rFROM t",
+        "",
+        "{{table}}",
+        "SELECT * FROM {{table}} {# comment #}\n",
+        "{% if table %}SELECT * FROM {{table}}{% endif %}",
+    ],
+)
+def test_render_template_same_as_jinja(source):
+    namespace = {"table": "numbers"}
+    expected = Template(source).render(namespace)
+
+    assert util.render_template(source, namespace) == expected
+
+
+def test_render_template_skips_jinja_without_markers():
+    util._compile_template.cache_clear()
+
+    assert util.render_template("SELECT * FROM t", {}) == "SELECT * FROM t"
+    assert util._compile_template.cache_info().currsize == 0
+
+
+def test_render_template_caches_compiled_templates():
+    util._compile_template.cache_clear()
+
+    util.render_template("SELECT * FROM {{table}}", {"table": "a"})
+    rendered = util.render_template("SELECT * FROM {{table}}", {"table": "b"})
+
+    assert rendered == "SELECT * FROM b"
+    assert util._compile_template.cache_info().hits == 1
+
+
+def test_namespace_view():
+    local_ns = {"x": 1}
+    user_ns = {"x": 2, "y": 3}
+
+    view = util.namespace_view(local_ns, user_ns)
+    view["z"] = 4
+
+    assert (view["x"], view["y"], view["z"]) == (1, 3, 4)
+    assert local_ns == {"x": 1}
+    assert user_ns == {"x": 2, "y": 3}
+
+
+def test_magic_reads_variables_without_copying_the_namespace(ip, monkeypatch):
+    ip.user_ns["limit"] = 1
+
+    with patch.object(util, "namespace_view", wraps=util.namespace_view) as view:
+        result = ip.run_cell("%sql SELECT * FROM test LIMIT {{limit}}").result
+
+    assert view.call_args[0][1] is ip.user_ns
+    assert result.dict() == {"n": (1,), "name": ("foo",)}